@@ -0,0 +1,70 @@
+# Áudio sintetizado sem cópias em base64
+#
+# Os resultados carregam o MP3 como bytes brutos (ou um caminho em disco,
+# lido só quando alguém pede os bytes). O base64 só é gerado quando alguém pede (prévia ou
+# exibição na interface); o caminho de lote grava os bytes diretamente.
+
+import base64
+import mmap
+import os
+import shutil
+from typing import Optional, Union
+
+from audio_stream import iter_chunks, write_chunks
+
+
+class AudioPayload:
+    """MP3 em bytes, memoryview/mmap ou arquivo, com base64 sob demanda"""
+
+    __slots__ = ("_data", "path")
+
+    def __init__(self, data: Optional[Union[bytes, bytearray, memoryview, mmap.mmap]] = None,
+                 path: Optional[str] = None):
+        if data is None and path is None:
+            raise ValueError("AudioPayload precisa de dados ou de um caminho")
+        self._data = data
+        self.path = path
+
+    @property
+    def data(self) -> Union[bytes, bytearray, memoryview, mmap.mmap]:
+        """Os bytes do áudio (arquivos são lidos uma vez, sem deixar descritor aberto)"""
+        if self._data is None:
+            with open(self.path, "rb") as f:
+                self._data = f.read()
+        return self._data
+
+    def __len__(self) -> int:
+        if self._data is None:
+            return os.path.getsize(self.path)
+        return len(self._data)
+
+    def __bytes__(self) -> bytes:
+        return bytes(self.data)
+
+    def base64(self) -> str:
+        """Áudio em base64 (gerado a cada chamada; use só para exibição)"""
+        return base64.b64encode(self.data).decode()
+
+    def preview(self, length: int = 100) -> str:
+        """Início do áudio em base64, sem codificar o arquivo inteiro"""
+        head = memoryview(self.data)[:length * 3 // 4 + 3]
+        return base64.b64encode(head).decode()[:length] + "..."
+
+    def write_to(self, sink) -> str:
+        """Grava num caminho (cópia no kernel se já estiver em disco), arquivo ou socket"""
+        if not isinstance(sink, (str, os.PathLike)):
+            write_chunks(iter_chunks(self.data), sink)
+            return ""
+        if self.path:
+            os.makedirs(os.path.dirname(os.path.abspath(sink)), exist_ok=True)
+            try:
+                shutil.copyfile(self.path, sink)
+                return os.fspath(sink)
+            except FileNotFoundError:
+                # Removido do cache nesse meio-tempo: grava da memória
+                pass
+        write_chunks(iter_chunks(self.data), sink)
+        return os.fspath(sink)
+
+    def __repr__(self) -> str:
+        return f"AudioPayload({len(self)} bytes{', ' + self.path if self.path else ''})"
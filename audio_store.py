@@ -0,0 +1,168 @@
+# Armazenamento de áudio sintetizado endereçado por conteúdo
+#
+# A chave é o hash da requisição completa de TTS (provedor, voz, idioma,
+# texto, audioConfig). Os MP3 ficam em disco como bytes brutos, em
+# diretórios fragmentados, com limite de tamanho por LRU. Acertos são lidos
+# para bytes de uma vez (um trecho por sentença é pequeno): um mmap por acerto
+# manteria um descritor aberto até ser coletado, acumulando num lote longo.
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Iterator, Optional
+
+from translation_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+
+class AudioStore:
+    """Cache em disco de MP3 sintetizados, com limite de tamanho (LRU)"""
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.root = root or os.path.join(DEFAULT_CACHE_DIR, "audio")
+        self.max_bytes = max_bytes
+
+        self._lock = threading.Lock()
+        self._index: Optional["OrderedDict[str, int]"] = None
+        self._total_bytes = 0
+        self._stats = {"hits": 0, "misses": 0, "bytes_served": 0, "evictions": 0}
+
+    @staticmethod
+    def make_key(provider: str, endpoint: str, payload: Dict) -> str:
+        """Hash estável da requisição completa"""
+        canonical = json.dumps(
+            {"provider": provider, "endpoint": endpoint, "payload": payload},
+            sort_keys=True,
+            ensure_ascii=False,
+            separators=(",", ":")
+        )
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key[2:4], f"{key}.mp3")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Retorna o áudio ou None; o arquivo é fechado antes de retornar"""
+        path = self.path_for(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            size = len(data)
+            os.utime(path)  # recência visível para outros processos
+        except (OSError, ValueError):
+            with self._lock:
+                self._stats["misses"] += 1
+                if self._index is not None and key in self._index:
+                    self._total_bytes -= self._index.pop(key)
+            return None
+
+        with self._lock:
+            self._stats["hits"] += 1
+            self._stats["bytes_served"] += size
+            index = self._load_index()
+            if key not in index:
+                self._total_bytes += size
+            index[key] = size
+            index.move_to_end(key)
+        return data
+
+    def put(self, key: str, data: bytes) -> str:
+        """Grava o áudio de forma atômica e aplica o limite de tamanho"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            index = self._load_index()
+            self._total_bytes += len(data) - index.get(key, 0)
+            index[key] = len(data)
+            index.move_to_end(key)
+            self._evict_locked()
+        return path
+
+    @contextmanager
+    def writer(self, key: str) -> Iterator[BinaryIO]:
+        """Grava em streaming; o áudio só entra no cache se o bloco terminar sem erro"""
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        f = open(tmp_path, "wb")
+        try:
+            yield f
+        except BaseException:
+            f.close()
+            os.unlink(tmp_path)
+            raise
+        size = f.tell()
+        f.close()
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            index = self._load_index()
+            self._total_bytes += size - index.get(key, 0)
+            index[key] = size
+            index.move_to_end(key)
+            self._evict_locked()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+            index = self._load_index()
+            stats["entries"] = len(index)
+            stats["total_bytes"] = self._total_bytes
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+    def _load_index(self) -> "OrderedDict[str, int]":
+        """Reconstrói o índice LRU a partir do disco (mtime como recência)"""
+        if self._index is not None:
+            return self._index
+
+        entries = []
+        if os.path.isdir(self.root):
+            for dirpath, _, filenames in os.walk(self.root):
+                for filename in filenames:
+                    if not filename.endswith(".mp3"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(dirpath, filename))
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, filename[:-4], st.st_size))
+
+        entries.sort()
+        self._index = OrderedDict((key, size) for _, key, size in entries)
+        self._total_bytes = sum(size for _, _, size in entries)
+        return self._index
+
+    def _evict_locked(self):
+        index = self._index
+        while self._total_bytes > self.max_bytes and len(index) > 1:
+            key, size = index.popitem(last=False)
+            self._total_bytes -= size
+            self._stats["evictions"] += 1
+            try:
+                os.unlink(self.path_for(key))
+            except OSError:
+                pass
+
+
+_default_store: Optional[AudioStore] = None
+_default_lock = threading.Lock()
+
+
+def get_default_audio_store() -> AudioStore:
+    """Armazenamento de áudio compartilhado do processo"""
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = AudioStore(max_bytes=int(os.environ.get("AUDIO_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)))
+        return _default_store
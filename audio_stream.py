@@ -0,0 +1,121 @@
+# Streaming de áudio sintetizado
+#
+# Decodifica o base64 do JSON do Google TTS à medida que a resposta chega
+# (sem montar o documento inteiro) e grava os pedaços de MP3 direto num
+# arquivo ou socket, mantendo a memória por job constante.
+
+import base64
+import binascii
+import os
+import threading
+import time
+from typing import Iterable, Iterator, Union
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+
+class Base64StreamDecoder:
+    """Decodifica base64 recebido em pedaços de tamanho arbitrário"""
+
+    def __init__(self):
+        self._pending = b""
+
+    def feed(self, data: bytes) -> bytes:
+        data = self._pending + data.translate(None, b" \t\r\n\\")
+        usable = len(data) - len(data) % 4
+        self._pending = data[usable:]
+        return binascii.a2b_base64(data[:usable]) if usable else b""
+
+    def finish(self) -> bytes:
+        """Decodifica o que restou (completando o padding, se preciso)"""
+        data, self._pending = self._pending, b""
+        if not data:
+            return b""
+        return base64.b64decode(data + b"=" * (-len(data) % 4))
+
+
+def iter_json_base64_field(chunks: Iterable[bytes], field: str) -> Iterator[bytes]:
+    """Extrai e decodifica um campo string base64 de um JSON recebido em pedaços
+
+    Só o valor do campo é lido; o resto do documento é ignorado.
+    """
+    marker = f'"{field}"'.encode()
+    decoder = Base64StreamDecoder()
+    buffer = b""
+    state = "search"
+
+    for chunk in chunks:
+        buffer += chunk
+        if state == "search":
+            index = buffer.find(marker)
+            if index < 0:
+                buffer = buffer[-(len(marker) - 1):]
+                continue
+            buffer = buffer[index + len(marker):]
+            state = "colon"
+        if state == "colon":
+            stripped = buffer.lstrip(b" \t\r\n:")
+            if not stripped:
+                buffer = b""
+                continue
+            if stripped[:1] != b'"':
+                raise ValueError(f"campo {field} não é uma string")
+            buffer = stripped[1:]
+            state = "value"
+        if state == "value":
+            end = buffer.find(b'"')
+            if end < 0:
+                audio = decoder.feed(buffer)
+                buffer = b""
+            else:
+                audio = decoder.feed(buffer[:end]) + decoder.finish()
+                buffer = b""
+                state = "done"
+            if audio:
+                yield audio
+        if state == "done":
+            return
+
+    if state != "done":
+        raise ValueError(f"resposta terminou antes do fim do campo {field}")
+
+
+def iter_chunks(data, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[bytes]:
+    """Fatia bytes (ou um mmap) em pedaços"""
+    view = memoryview(data)
+    for start in range(0, len(view), chunk_size):
+        yield bytes(view[start:start + chunk_size])
+
+
+def write_chunks(chunks: Iterable[bytes], sink: Union[str, os.PathLike, object]) -> dict:
+    """Grava os pedaços num caminho (atomicamente), arquivo ou socket
+
+    Retorna bytes gravados e o tempo até o primeiro pedaço de áudio.
+    """
+    start = time.monotonic()
+    stats = {"bytes_written": 0, "time_to_first_audio": None}
+
+    def consume(write):
+        for chunk in chunks:
+            if stats["time_to_first_audio"] is None:
+                stats["time_to_first_audio"] = time.monotonic() - start
+            write(chunk)
+            stats["bytes_written"] += len(chunk)
+
+    if isinstance(sink, (str, os.PathLike)):
+        os.makedirs(os.path.dirname(os.path.abspath(sink)), exist_ok=True)
+        tmp_path = f"{sink}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                consume(f.write)
+            os.replace(tmp_path, sink)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+    elif hasattr(sink, "sendall"):
+        consume(sink.sendall)
+    else:
+        consume(sink.write)
+
+    return stats
@@ -0,0 +1,315 @@
+# Processamento em lote pela linha de comando (sem Streamlit)
+#
+# Lê roteiros de um CSV ou JSONL em streaming, processa pelo pipeline do
+# VideoProcessor e grava um JSONL de resultados e os MP3 no diretório de
+# saída. Uso:
+#
+#   python batch_cli.py roteiros.csv --output-dir saida --languages en,es,fr
+#
+# Com --job-store o progresso é gravado em SQLite: uma execução reiniciada
+# pula os (vídeo, idioma) já concluídos e só reprocessa pendentes/falhas.
+
+import argparse
+import csv
+import json
+import os
+import re
+import socket
+import sys
+import time
+from typing import Callable, Dict, Iterator, Optional, TextIO, Tuple
+
+from hedging import Hedger
+from job_store import PENDING, RUNNING, JobStore, LeaseHeartbeat
+from metrics import TextfileExporter
+from video_core import VideoProcessor
+
+
+def read_scripts(path: str,
+                 text_field: str = "text",
+                 id_field: str = "id",
+                 input_format: Optional[str] = None) -> Iterator[Tuple[str, str]]:
+    """Gera (video_id, texto) linha a linha, sem carregar o arquivo inteiro"""
+    if input_format is None:
+        input_format = "csv" if path.lower().endswith(".csv") else "jsonl"
+
+    stream = sys.stdin if path == "-" else open(path, "r", encoding="utf-8", newline="")
+    try:
+        if input_format == "csv":
+            rows = csv.DictReader(stream)
+        else:
+            rows = (json.loads(line) for line in stream if line.strip())
+
+        for line_number, row in enumerate(rows, start=1):
+            text = (row.get(text_field) or "").strip()
+            if not text:
+                continue
+            yield str(row.get(id_field) or line_number), text
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def worker_id_for(pid: int) -> str:
+    return f"{socket.gethostname()}-{pid}"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def release_dead_local_workers(store: JobStore) -> int:
+    """Devolve à fila as unidades de processos deste host que morreram sem release()
+
+    Sem isso, depois de um crash elas só voltariam quando o lease expirasse.
+    """
+    prefix = worker_id_for(0)[:-1]
+    released = 0
+    for worker_id in store.running_workers():
+        pid = worker_id[len(prefix):] if worker_id and worker_id.startswith(prefix) else ""
+        if pid.isdigit() and int(pid) != os.getpid() and not _pid_alive(int(pid)):
+            released += store.release(worker_id, crashed=True)
+    return released
+
+
+def claimed_videos(store: JobStore,
+                   worker_id: str,
+                   batch_size: int,
+                   should_stop: Optional[Callable[[], bool]] = None,
+                   poll_interval: Optional[float] = None,
+                   wait_interval: float = 0.05,
+                   max_wait_interval: float = 1.0) -> Iterator[Tuple[str, str, list]]:
+    """Reivindica trabalho do job store aos poucos até não restar nada
+
+    Com poll_interval, aguarda novos jobs em vez de encerrar. Sem ele, só
+    encerra quando nenhum outro worker detém unidades: as de um worker que
+    caiu voltam a ser reivindicáveis quando o lease expira. O que foi
+    reivindicado e não chegou a ser entregue fica para o release().
+
+    Enquanto outros workers terminam suas unidades, a consulta começa em
+    wait_interval e dobra até max_wait_interval (bem abaixo do heartbeat do
+    lease), para o último worker ocioso não atrasar o fim do lote.
+    """
+    waiting = False
+    delay = wait_interval
+    while not (should_stop and should_stop()):
+        claims = store.claim(worker_id, limit=batch_size)
+        if not claims:
+            if release_dead_local_workers(store):
+                continue
+            others = sum(count for owner, count in store.running_workers().items() if owner != worker_id)
+            if poll_interval is None and not others:
+                return
+            if others and not waiting:
+                print(f"Aguardando {others} unidades em andamento em outros workers "
+                      f"(retomadas se o lease expirar)", file=sys.stderr, flush=True)
+            waiting = bool(others)
+            if others:
+                time.sleep(delay if poll_interval is None else min(delay, poll_interval))
+                delay = min(delay * 2, max_wait_interval)
+            else:
+                time.sleep(poll_interval)
+            continue
+        waiting = False
+        delay = wait_interval
+        for claim in claims:
+            if should_stop and should_stop():
+                return
+            yield claim["video_id"], claim["text"], claim["languages"]
+
+
+def _safe_name(video_id: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", video_id)[:128] or "video"
+
+
+def summarize_result(result: Dict) -> Dict:
+    """Contadores de vazão de um vídeo processado"""
+    ok = [lang_result for lang_result in result["languages"] if lang_result["success"]]
+    return {
+        "videos": 1,
+        "characters": sum(lang_result["characters"] for lang_result in ok),
+        "languages_ok": len(ok),
+        "languages_failed": len(result["languages"]) - len(ok)
+    }
+
+
+class ThroughputReporter:
+    """Imprime vídeos/min e caracteres/s periodicamente"""
+
+    def __init__(self, stream: TextIO = sys.stderr, interval: float = 10.0):
+        self.stream = stream
+        self.interval = interval
+        self.start_time = time.monotonic()
+        self._last_report = self.start_time
+        self.videos = 0
+        self.languages_ok = 0
+        self.languages_failed = 0
+        self.characters = 0
+
+    def record(self, result: Dict):
+        self.add(**summarize_result(result))
+
+    def add(self, videos: int = 0, characters: int = 0, languages_ok: int = 0, languages_failed: int = 0):
+        self.videos += videos
+        self.characters += characters
+        self.languages_ok += languages_ok
+        self.languages_failed += languages_failed
+
+        now = time.monotonic()
+        if now - self._last_report >= self.interval:
+            self._last_report = now
+            self.report()
+
+    def report(self, final: bool = False):
+        elapsed = max(time.monotonic() - self.start_time, 1e-9)
+        prefix = "Concluído" if final else "Progresso"
+        print(
+            f"{prefix}: {self.videos} vídeos | {self.videos / elapsed * 60:.1f} vídeos/min "
+            f"({self.videos / elapsed * 3600:.0f}/h) | "
+            f"{self.characters / elapsed:.0f} chars/s | "
+            f"idiomas ok/falha: {self.languages_ok}/{self.languages_failed} | {elapsed:.1f}s",
+            file=self.stream,
+            flush=True
+        )
+
+
+def write_result(result: Dict, output_dir: str, results_file: TextIO, save_audio: bool = True):
+    """Grava os MP3 do vídeo e uma linha JSONL sem o áudio embutido"""
+    video_dir = os.path.join(output_dir, "audio", _safe_name(result["video_id"]))
+
+    for lang_result in result["languages"]:
+        audio = lang_result.pop("audio", None)
+        if save_audio and lang_result["success"] and audio is not None:
+            audio_path = os.path.join(video_dir, f"{lang_result['language']}.mp3")
+            lang_result["audio_path"] = audio.write_to(audio_path)
+
+    results_file.write(json.dumps(result, ensure_ascii=False) + "\n")
+    results_file.flush()
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Processa roteiros em lote (CSV ou JSONL)")
+    parser.add_argument("input", help="Arquivo CSV/JSONL de roteiros ('-' para stdin, JSONL)")
+    parser.add_argument("--output-dir", default="batch_output", help="Diretório de saída")
+    parser.add_argument("--languages", default="en,es,fr", help="Idiomas alvo separados por vírgula")
+    parser.add_argument("--provider", default="google_cloud", choices=["google_cloud", "elevenlabs"])
+    parser.add_argument("--format", dest="input_format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--text-field", default="text")
+    parser.add_argument("--id-field", default="id")
+    parser.add_argument("--translate-concurrency", type=int, default=16)
+    parser.add_argument("--synthesize-concurrency", type=int, default=8)
+    parser.add_argument("--max-in-flight", type=int, default=16, help="Vídeos em processamento simultâneo")
+    parser.add_argument("--batch-window-ms", type=float, default=50, help="Janela de micro-batching das traduções")
+    parser.add_argument("--hedge-percentile", type=float, default=None,
+                        help="Duplica chamadas de TTS acima deste percentil de latência (ex.: 95)")
+    parser.add_argument("--hedge-alternate", action="store_true",
+                        help="Envia a cópia de hedge ao provedor alternativo")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Orçamento de tempo por vídeo, em segundos, incluindo retentativas")
+    parser.add_argument("--report-interval", type=float, default=10, help="Segundos entre relatórios de vazão")
+    parser.add_argument("--no-audio", action="store_true", help="Não gravar os MP3")
+    parser.add_argument("--job-store", default=None, help="Arquivo SQLite para checkpoint/retomada")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Tentativas por (vídeo, idioma) no job store")
+    parser.add_argument("--enqueue-only", action="store_true",
+                        help="Só registra os roteiros no job store (para worker_pool.py)")
+    parser.add_argument("--metrics-file", default=None,
+                        help="Grava histogramas de latência em texto Prometheus (textfile collector)")
+    parser.add_argument("--metrics-port", type=int, default=None,
+                        help="Expõe os histogramas em http://127.0.0.1:PORTA/metrics")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    languages = list(dict.fromkeys(lang.strip() for lang in args.languages.split(",") if lang.strip()))
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    processor = VideoProcessor(
+        translation_batch_window_ms=args.batch_window_ms,
+        deadline_seconds=args.deadline,
+        hedger=Hedger(percentile=args.hedge_percentile) if args.hedge_percentile else None,
+        hedge_to_alternate=args.hedge_alternate
+    )
+    reporter = ThroughputReporter(interval=args.report_interval)
+    exporter = None
+    if args.metrics_file:
+        exporter = TextfileExporter(processor.metrics, args.metrics_file, interval=args.report_interval).start()
+    if args.metrics_port:
+        processor.metrics.serve(args.metrics_port)
+
+    scripts = read_scripts(args.input, args.text_field, args.id_field, args.input_format)
+
+    store = None
+    heartbeat = None
+    worker_id = worker_id_for(os.getpid())
+    if args.job_store:
+        store = JobStore(args.job_store, max_attempts=args.max_attempts)
+        released = release_dead_local_workers(store)
+        if released:
+            print(f"Job store: {released} unidades de uma execução interrompida devolvidas à fila",
+                  file=sys.stderr, flush=True)
+        added = store.enqueue(scripts, languages)
+        print(f"Job store: {added} vídeos novos | unidades: {store.counts()}", file=sys.stderr, flush=True)
+        if store.deferred:
+            print(f"Job store: {store.deferred} vídeos alterados ainda em processamento por outro worker; "
+                  f"enfileire de novo para reprocessá-los", file=sys.stderr, flush=True)
+        if args.enqueue_only:
+            return 0
+        heartbeat = LeaseHeartbeat(store, worker_id).start()
+        videos = claimed_videos(store, worker_id, args.max_in_flight)
+    else:
+        videos = scripts
+
+    results = processor.process_videos(
+        videos,
+        languages,
+        args.provider,
+        translate_concurrency=args.translate_concurrency,
+        synthesize_concurrency=args.synthesize_concurrency,
+        max_videos_in_flight=args.max_in_flight
+    )
+
+    try:
+        with open(os.path.join(args.output_dir, "results.jsonl"), "a", encoding="utf-8") as results_file:
+            for result in results:
+                write_result(result, args.output_dir, results_file, save_audio=not args.no_audio)
+                if store is not None:
+                    store.record(worker_id, result)
+                reporter.record(result)
+    finally:
+        if heartbeat is not None:
+            heartbeat.stop()
+        if store is not None:
+            # Interrupção: o que ficou reivindicado volta para a fila
+            store.release(worker_id)
+        if exporter is not None:
+            exporter.stop()
+
+    reporter.report(final=True)
+    if processor.hedger is not None:
+        hedge_stats = processor.hedger.stats()
+        print(f"Hedging: {hedge_stats['hedge_rate']:.1%} das chamadas de TTS duplicadas, "
+              f"{hedge_stats['hedge_wins']} vencidas pela cópia, custo extra R$ {hedge_stats['extra_cost']:.4f}",
+              file=sys.stderr, flush=True)
+    for name, health in processor.provider_health().items():
+        if health["opened"]:
+            print(f"Circuito {name}: {health['state']} (aberto {health['opened']}x, "
+                  f"{health['rejected']} chamadas recusadas)", file=sys.stderr, flush=True)
+    if store is not None:
+        counts = store.counts()
+        print(f"Job store: {counts}", file=sys.stderr, flush=True)
+        if counts[PENDING] or counts[RUNNING]:
+            print(f"Job store: {counts[PENDING] + counts[RUNNING]} unidades não concluídas; "
+                  f"execute de novo para retomá-las", file=sys.stderr, flush=True)
+            return 1
+    return 0 if reporter.languages_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,342 @@
+# Benchmark ponta a ponta do VideoProcessor e do CostAnalyzer
+#
+# Sobe o mock_provider_server.py no próprio processo, aponta os serviços para
+# ele e roda process_multilingual_video numa grade de cenários (idiomas ×
+# tamanho do roteiro × concorrência × cache frio/quente/editado). Para cada cenário
+# mede vídeos/s, latência p50/p95/p99 por vídeo, pico de RSS e chamadas HTTP
+# por vídeo; o resultado vai para um JSON comparável entre execuções. Uso:
+#
+#   python benchmark.py --languages 1,3 --chars 500,2000 --concurrency 1,8 --output bench.json
+#   python benchmark.py --baseline bench.json --output bench-novo.json
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+from mock_provider_server import EndpointProfile, LatencyModel, MockProviderServer
+
+LANGUAGE_POOL = ["en", "es", "fr", "de", "it"]
+
+SENTENCES = [
+    "Hoje vamos falar sobre {topic} e como isso muda o dia a dia das empresas.",
+    "O primeiro passo é entender o problema antes de escolher uma ferramenta.",
+    "Neste vídeo {index} mostramos exemplos práticos com números reais.",
+    "Se você gostou do conteúdo sobre {topic}, deixe seu comentário.",
+    "A automação reduz custos, mas exige cuidado com a qualidade.",
+    "Vamos comparar os resultados e tirar conclusões juntos."
+]
+TOPICS = ["inteligência artificial", "finanças pessoais", "marketing digital", "produtividade", "educação"]
+
+
+def make_script(index: int, chars: int, variant: str = "") -> str:
+    """Roteiro determinístico de ~chars caracteres, único por índice (e variante)"""
+    sentences = []
+    length = 0
+    for i in itertools.count():
+        template = SENTENCES[(index + i) % len(SENTENCES)]
+        sentence = template.format(topic=TOPICS[(index + i) % len(TOPICS)], index=index)
+        sentence = f"{sentence[:-1]} ({variant}{index}.{i})."
+        sentences.append(sentence)
+        length += len(sentence) + 1
+        if length >= chars:
+            break
+    return " ".join(sentences)
+
+
+def edit_one_sentence(script: str) -> str:
+    """O roteiro com só a sentença do meio alterada"""
+    from text_segmentation import join_sentences, split_sentences
+
+    sentences = split_sentences(script)
+    middle = len(sentences) // 2
+    sentences[middle] = f"{sentences[middle][:-1]} (editada)."
+    return join_sentences(sentences)
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(round(p / 100 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+class PeakRSS:
+    """Amostra o RSS do processo em segundo plano e guarda o pico do intervalo"""
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    @staticmethod
+    def current() -> int:
+        try:
+            with open("/proc/self/statm") as f:
+                return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError):
+            # Sem /proc: pico do processo inteiro (KiB no Linux, bytes no macOS)
+            maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            return maxrss if sys.platform == "darwin" else maxrss * 1024
+
+    def __enter__(self) -> "PeakRSS":
+        self.peak = self.current()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, self.current())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, self.current())
+
+
+def run_scenario(server: MockProviderServer,
+                 languages: int,
+                 chars: int,
+                 concurrency: int,
+                 cache: str,
+                 videos: int,
+                 provider: str,
+                 workdir: str) -> Dict:
+    """Um cenário: processador novo, caches próprios, vídeos em paralelo"""
+    from audio_store import AudioStore
+    from circuit_breaker import CircuitBreakerRegistry
+    from http_transport import HttpTransport
+    from metrics import MetricsRegistry
+    from rate_limiter import RateLimiter
+    from translation_cache import TranslationCache
+    from video_core import VideoProcessor
+
+    name = f"lang{languages}-chars{chars}-conc{concurrency}-{cache}"
+    scenario_dir = os.path.join(workdir, name)
+    transport = HttpTransport(pool_maxsize=max(16, concurrency * languages * 2))
+    processor = VideoProcessor(
+        transport=transport,
+        audio_store=AudioStore(os.path.join(scenario_dir, "audio")),
+        translation_cache=TranslationCache(os.path.join(scenario_dir, "translations.sqlite3")),
+        # Sem cotas: mede o pipeline, não o limitador
+        rate_limiter=RateLimiter({}),
+        breakers=CircuitBreakerRegistry(),
+        metrics=MetricsRegistry()
+    )
+    target_languages = LANGUAGE_POOL[:languages]
+    scripts = [make_script(i, chars, variant=name) for i in range(videos)]
+    # Editado: mesma abertura com uma sentença alterada no meio do roteiro
+    edited_scripts = [edit_one_sentence(script) for script in scripts]
+
+    def process(script: str, expected_synthesized: Optional[int] = None) -> float:
+        start = time.perf_counter()
+        result = processor.process_multilingual_video(script, target_languages, provider)
+        if result["success_count"] != len(target_languages):
+            errors = [r.get("error") for r in result["languages"] if not r["success"]]
+            raise RuntimeError(f"{name}: idiomas com falha: {errors[:1]}")
+        synthesized = [r["segments_synthesized"] for r in result["languages"]]
+        if expected_synthesized is not None and any(count != expected_synthesized for count in synthesized):
+            raise RuntimeError(f"{name}: edição de uma sentença re-sintetizou {synthesized} sentenças por idioma")
+        return time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        if cache in ("warm", "edited"):
+            # Mesmos roteiros uma vez antes: a medição só vê os caches
+            list(executor.map(process, scripts))
+        if cache == "edited":
+            # O reprocessamento precisa acompanhar o tamanho da edição
+            scripts = edited_scripts
+            measure = lambda script: process(script, expected_synthesized=1)
+        else:
+            measure = process
+
+        server.reset_stats()
+        requests_before = transport.stats()["requests"]
+        with PeakRSS() as rss:
+            start = time.perf_counter()
+            latencies = list(executor.map(measure, scripts))
+            elapsed = time.perf_counter() - start
+
+    server_stats = server.stats()
+    http_calls = transport.stats()["requests"] - requests_before
+    return {
+        "name": name,
+        "languages": languages,
+        "chars": chars,
+        "concurrency": concurrency,
+        "cache": cache,
+        "videos": videos,
+        "provider": provider,
+        "elapsed_seconds": elapsed,
+        "videos_per_second": videos / elapsed if elapsed else 0.0,
+        "latency_p50": percentile(latencies, 50),
+        "latency_p95": percentile(latencies, 95),
+        "latency_p99": percentile(latencies, 99),
+        "peak_rss_mb": rss.peak / 1024 / 1024,
+        "http_calls_per_video": http_calls / videos,
+        "provider_requests": {endpoint: stats["requests"] for endpoint, stats in server_stats.items()},
+        "provider_errors": sum(stats["errors"] + stats["throttled"] for stats in server_stats.values())
+    }
+
+
+def benchmark_cost_analyzer(iterations: int = 2000) -> Dict:
+    """Tempo por chamada de CostAnalyzer.calculate_monthly_costs"""
+    from video_core import CostAnalyzer, VideoGenerationConfig
+
+    analyzer = CostAnalyzer()
+    configs = [
+        VideoGenerationConfig(videos_per_day=50 + i % 500, avg_chars_per_video=200 + (i * 37) % 5000,
+                              languages=LANGUAGE_POOL[:1 + i % len(LANGUAGE_POOL)])
+        for i in range(iterations)
+    ]
+    start = time.perf_counter()
+    for config in configs:
+        analyzer.calculate_monthly_costs(config)
+    elapsed = time.perf_counter() - start
+    return {"iterations": iterations, "seconds": elapsed, "us_per_call": elapsed / iterations * 1e6}
+
+
+def measure_cold_start(modules=("video_core", "worker_pool", "streamlit_app"), repeats: int = 5) -> Dict:
+    """Tempo de import num interpretador novo (melhor de N), descontada a partida do Python"""
+    root = os.path.dirname(os.path.abspath(__file__))
+
+    def best(code: str) -> Optional[float]:
+        timings = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, "-c", code], capture_output=True, cwd=root)
+            if completed.returncode != 0:
+                return None
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    interpreter = best("pass") or 0.0
+    results = {"interpreter_seconds": interpreter}
+    for module in modules:
+        elapsed = best(f"import {module}")
+        results[module] = None if elapsed is None else max(elapsed - interpreter, 0.0)
+    return results
+
+
+def environment_info() -> Dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), timeout=5).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        commit = ""
+    return {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count()
+    }
+
+
+def compare(current: List[Dict], baseline_path: str):
+    """Imprime a variação de vazão e p95 em relação a uma execução anterior"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {scenario["name"]: scenario for scenario in json.load(f)["scenarios"]}
+    print(f"\nComparação com {baseline_path}:", file=sys.stderr)
+    for scenario in current:
+        previous = baseline.get(scenario["name"])
+        if previous is None:
+            continue
+        speedup = scenario["videos_per_second"] / previous["videos_per_second"] if previous["videos_per_second"] else 0
+        p95_delta = scenario["latency_p95"] - previous["latency_p95"]
+        print(f"  {scenario['name']:<36} vazão {speedup:5.2f}x | p95 {p95_delta * 1000:+8.1f} ms",
+              file=sys.stderr)
+
+
+def _int_list(value: str) -> List[int]:
+    return [int(item) for item in value.split(",") if item.strip()]
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark ponta a ponta contra provedores simulados")
+    parser.add_argument("--languages", type=_int_list, default=[1, 3], help="Quantidades de idiomas (ex.: 1,3,5)")
+    parser.add_argument("--chars", type=_int_list, default=[500, 2000], help="Tamanhos de roteiro em caracteres")
+    parser.add_argument("--concurrency", type=_int_list, default=[1, 8], help="Vídeos processados em paralelo")
+    parser.add_argument("--cache", default="cold,warm,edited",
+                        help="Estados do cache: cold, warm, edited (uma sentença alterada)")
+    parser.add_argument("--videos", type=int, default=20, help="Vídeos por cenário")
+    parser.add_argument("--provider", default="google_cloud", choices=["google_cloud", "elevenlabs"])
+    parser.add_argument("--latency", default="lognormal:0.08,0.4", help="Latência dos provedores simulados")
+    parser.add_argument("--tts-latency-per-char", type=float, default=0.0002, help="Segundos extras por caractere no TTS")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-429", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cost-iterations", type=int, default=2000, help="Chamadas no benchmark do CostAnalyzer")
+    parser.add_argument("--skip-cold-start", action="store_true", help="Não medir o tempo de import dos módulos")
+    parser.add_argument("--output", default="benchmark.json", help="Arquivo JSON de resultados")
+    parser.add_argument("--baseline", default=None, help="JSON de uma execução anterior para comparar")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    caches = [cache.strip() for cache in args.cache.split(",") if cache.strip()]
+
+    latency = LatencyModel.parse(args.latency)
+    profiles = {
+        endpoint: EndpointProfile(
+            latency=latency,
+            latency_per_char=args.tts_latency_per_char if endpoint.endswith("_tts") else 0.0,
+            error_rate=args.error_rate,
+            rate_429=args.rate_429,
+            retry_after=0.2
+        )
+        for endpoint in ("token", "translate", "google_tts", "elevenlabs_tts")
+    }
+
+    scenarios = []
+    with MockProviderServer(profiles, seed=args.seed) as server, \
+            tempfile.TemporaryDirectory(prefix="video-bench-") as workdir:
+        # Os serviços leem as URLs e credenciais ao serem criados
+        os.environ.update(server.env())
+        os.environ.pop("GOOGLE_APPLICATION_CREDENTIALS", None)
+
+        grid = list(itertools.product(args.languages, args.chars, args.concurrency, caches))
+        for i, (languages, chars, concurrency, cache) in enumerate(grid, 1):
+            result = run_scenario(server, languages, chars, concurrency, cache, args.videos, args.provider, workdir)
+            scenarios.append(result)
+            print(f"[{i}/{len(grid)}] {result['name']:<36} {result['videos_per_second']:7.2f} vídeos/s | "
+                  f"p50 {result['latency_p50'] * 1000:7.1f} p95 {result['latency_p95'] * 1000:7.1f} "
+                  f"p99 {result['latency_p99'] * 1000:7.1f} ms | RSS {result['peak_rss_mb']:6.1f} MB | "
+                  f"{result['http_calls_per_video']:.1f} HTTP/vídeo", file=sys.stderr, flush=True)
+
+    report = {
+        "environment": environment_info(),
+        "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "baseline")},
+        "scenarios": scenarios,
+        "cost_analyzer": benchmark_cost_analyzer(args.cost_iterations)
+    }
+    print(f"CostAnalyzer: {report['cost_analyzer']['us_per_call']:.1f} µs por configuração", file=sys.stderr)
+    if not args.skip_cold_start:
+        report["cold_start"] = measure_cold_start()
+        print("Import a frio: " + ", ".join(
+            f"{module} {seconds * 1000:.0f} ms" if seconds is not None else f"{module} indisponível"
+            for module, seconds in report["cold_start"].items() if module != "interpreter_seconds"
+        ), file=sys.stderr)
+
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Resultados em {args.output}", file=sys.stderr)
+
+    if args.baseline:
+        compare(scenarios, args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
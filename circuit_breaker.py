@@ -0,0 +1,161 @@
+# Circuit breaker por provedor/endpoint
+#
+# Acompanha a taxa de falhas (timeouts, erros de conexão, 5xx) numa janela
+# deslizante. Acima do limite o circuito abre e as chamadas falham na hora,
+# sem esperar o timeout; depois de um intervalo, algumas chamadas de prova
+# (meio-aberto) decidem se ele fecha de novo.
+
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Valor numérico do estado, para exportar como métrica
+STATE_CODES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+
+class CircuitOpenError(Exception):
+    """Chamada recusada sem ir à rede: o circuito do provedor está aberto"""
+
+
+class CircuitBreaker:
+    """Circuit breaker com taxa de falhas em janela deslizante e estado meio-aberto"""
+
+    def __init__(self,
+                 name: str,
+                 failure_rate_threshold: float = 0.5,
+                 window_seconds: float = 30.0,
+                 min_calls: int = 5,
+                 open_seconds: float = 15.0,
+                 half_open_max_calls: int = 1):
+        self.name = name
+        self.failure_rate_threshold = failure_rate_threshold
+        self.window_seconds = window_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.half_open_max_calls = half_open_max_calls
+
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._calls: Deque[Tuple[float, bool]] = deque()
+        self._stats = {"rejected": 0, "opened": 0, "failures": 0, "successes": 0}
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._current_state(time.monotonic())
+
+    def allow(self) -> bool:
+        """Reserva uma chamada; False quando o circuito está aberto"""
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_max_calls:
+                self._probes += 1
+                return True
+            self._stats["rejected"] += 1
+            return False
+
+    def check(self):
+        """Como allow(), mas levanta CircuitOpenError"""
+        if not self.allow():
+            raise CircuitOpenError(f"circuito {self.name} aberto")
+
+    def record_success(self):
+        now = time.monotonic()
+        with self._lock:
+            self._stats["successes"] += 1
+            if self._current_state(now) == HALF_OPEN:
+                # Prova bem-sucedida: fecha e recomeça a janela
+                self._state = CLOSED
+                self._calls.clear()
+                return
+            self._record(now, True)
+
+    def record_failure(self):
+        now = time.monotonic()
+        with self._lock:
+            self._stats["failures"] += 1
+            state = self._current_state(now)
+            if state == HALF_OPEN:
+                self._open(now)
+                return
+            self._record(now, False)
+            if state == CLOSED and len(self._calls) >= self.min_calls and \
+                    self._failure_rate() >= self.failure_rate_threshold:
+                self._open(now)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            state = self._current_state(time.monotonic())
+            stats = dict(self._stats)
+            stats.update({
+                "state": state,
+                "state_code": STATE_CODES[state],
+                "calls_in_window": len(self._calls),
+                "failure_rate": self._failure_rate()
+            })
+        return stats
+
+    def _current_state(self, now: float) -> str:
+        if self._state == OPEN and now - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+        return self._state
+
+    def _open(self, now: float):
+        self._state = OPEN
+        self._opened_at = now
+        self._stats["opened"] += 1
+
+    def _record(self, now: float, success: bool):
+        self._calls.append((now, success))
+        while self._calls and now - self._calls[0][0] > self.window_seconds:
+            self._calls.popleft()
+
+    def _failure_rate(self) -> float:
+        if not self._calls:
+            return 0.0
+        return sum(1 for _, success in self._calls if not success) / len(self._calls)
+
+
+class CircuitBreakerRegistry:
+    """Um breaker por chave "provedor:endpoint", criado sob demanda"""
+
+    def __init__(self, **breaker_options):
+        self.breaker_options = breaker_options
+        self._lock = threading.Lock()
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def get(self, name: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = CircuitBreaker(name, **self.breaker_options)
+                self._breakers[name] = breaker
+            return breaker
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            breakers = dict(self._breakers)
+        return {name: breaker.stats() for name, breaker in breakers.items()}
+
+
+_default_registry: Optional[CircuitBreakerRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_default_breakers() -> CircuitBreakerRegistry:
+    """Breakers compartilhados do processo"""
+    global _default_registry
+    with _default_lock:
+        if _default_registry is None:
+            _default_registry = CircuitBreakerRegistry()
+        return _default_registry
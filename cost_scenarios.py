@@ -0,0 +1,198 @@
+# Cenários de custo vetorizados
+#
+# Avalia de uma vez grades de vídeos/dia × caracteres/vídeo × número de
+# idiomas × fração migrada para o provedor alvo, com as mesmas tarifas e
+# regras do CostAnalyzer (memória de tradução e hedging). Tamanhos de roteiro
+# podem vir de uma distribuição (amostras ou lognormal) com pesos por faixa.
+# O resultado é colunar: um dicionário de arrays NumPy do mesmo tamanho, uma
+# linha por cenário, convertível para DataFrame com to_frame().
+
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+from video_core import CostAnalyzer
+
+DAYS_PER_MONTH = 30
+
+Columns = Dict[str, np.ndarray]
+
+
+def provider_rates(provider_id: str, analyzer: Optional[CostAnalyzer] = None) -> Tuple[float, float]:
+    """Tarifas (TTS, tradução) por caractere de um provedor do CostAnalyzer"""
+    provider = (analyzer or CostAnalyzer()).providers[provider_id]
+    return provider["tts_cost_per_char"], provider["translate_cost_per_char"]
+
+
+def evaluate_grid(videos_per_day: Sequence[float],
+                  chars_per_video: Sequence[float],
+                  language_counts: Sequence[int],
+                  migrated_share: Sequence[float] = (1.0,),
+                  current_provider: str = "elevenlabs",
+                  target_provider: str = "google_cloud",
+                  translation_cache_hit_ratio: float = 0.0,
+                  hedge_rate: float = 0.0,
+                  migration_cost: float = 0.0,
+                  chars_weights: Optional[Sequence[float]] = None,
+                  analyzer: Optional[CostAnalyzer] = None) -> Columns:
+    """Custos mensais do produto cartesiano dos eixos, sem laço em Python
+
+    migrated_share é a fração dos vídeos atendida pelo provedor alvo (o resto
+    fica no atual). chars_weights dá a probabilidade de cada tamanho de
+    roteiro (coluna "weight"; 1 quando omitido). migration_cost é o custo
+    único da migração, usado no payback.
+    """
+    analyzer = analyzer or CostAnalyzer()
+    current_tts, current_translate = provider_rates(current_provider, analyzer)
+    target_tts, target_translate = provider_rates(target_provider, analyzer)
+
+    chars_axis = np.asarray(chars_per_video, dtype=float)
+    weights_axis = np.ones_like(chars_axis) if chars_weights is None else np.asarray(chars_weights, dtype=float)
+    if weights_axis.shape != chars_axis.shape:
+        raise ValueError("chars_weights precisa ter o mesmo tamanho de chars_per_video")
+
+    # Grade em ordem "ij": reshape(len(videos), len(chars), len(idiomas), len(share)) recupera os eixos
+    videos, chars, languages, share = (
+        axis.ravel() for axis in np.meshgrid(
+            np.asarray(videos_per_day, dtype=float),
+            chars_axis,
+            np.asarray(language_counts, dtype=float),
+            np.asarray(migrated_share, dtype=float),
+            indexing="ij"
+        )
+    )
+    weight = np.broadcast_to(weights_axis[None, :, None, None],
+                             (len(videos_per_day), len(chars_axis), len(language_counts), len(migrated_share))).ravel()
+
+    monthly_videos = videos * DAYS_PER_MONTH
+    monthly_chars = monthly_videos * languages * chars
+    # Cópias de hedge são cobradas no TTS; a memória de tradução só reduz a tradução
+    tts_chars = monthly_chars * (1 + hedge_rate)
+    translated_chars = monthly_chars * (1 - translation_cache_hit_ratio)
+
+    current_cost = tts_chars * current_tts + translated_chars * current_translate
+    target_cost = tts_chars * target_tts + translated_chars * target_translate
+    tts_cost = tts_chars * (share * target_tts + (1 - share) * current_tts)
+    translate_cost = translated_chars * (share * target_translate + (1 - share) * current_translate)
+    total_cost = tts_cost + translate_cost
+    savings = current_cost - total_cost
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cost_per_video = np.where(monthly_videos > 0, total_cost / monthly_videos, 0.0)
+        payback_months = np.where(savings > 0, migration_cost / savings, np.inf)
+
+    return {
+        "videos_per_day": videos,
+        "chars_per_video": chars,
+        "languages": languages.astype(int),
+        "migrated_share": share,
+        "weight": weight,
+        "monthly_chars": monthly_chars,
+        "tts_cost": tts_cost,
+        "translate_cost": translate_cost,
+        "total_cost": total_cost,
+        "cost_per_video": cost_per_video,
+        "baseline_cost": current_cost,
+        "full_migration_cost": target_cost,
+        "savings": savings,
+        "payback_months": payback_months
+    }
+
+
+def script_length_bins(samples: Optional[Sequence[float]] = None,
+                       mean: float = 1000.0,
+                       sigma: float = 0.5,
+                       bins: int = 20,
+                       size: int = 100_000,
+                       seed: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """Faixas de tamanho de roteiro (centros, pesos) para chars_per_video/chars_weights
+
+    Usa as amostras dadas (ex.: caracteres dos resultados gravados) ou uma
+    lognormal com a média e o sigma informados.
+    """
+    if samples is None:
+        rng = np.random.default_rng(seed)
+        samples = rng.lognormal(np.log(mean) - sigma ** 2 / 2, sigma, size)
+    samples = np.asarray(samples, dtype=float)
+    if samples.size == 0:
+        raise ValueError("Nenhuma amostra de tamanho de roteiro")
+    counts, edges = np.histogram(samples, bins=bins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    keep = counts > 0
+    return centers[keep], counts[keep] / counts.sum()
+
+
+def expected_by(columns: Columns, keys: Sequence[str], value: str = "total_cost") -> Columns:
+    """Média ponderada por "weight" de uma coluna, agrupada pelas chaves"""
+    key_matrix = np.column_stack([columns[key] for key in keys])
+    groups, inverse = np.unique(key_matrix, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    weights = np.bincount(inverse, weights=columns["weight"])
+    totals = np.bincount(inverse, weights=columns["weight"] * columns[value])
+    result = {key: groups[:, i] for i, key in enumerate(keys)}
+    result[value] = totals / weights
+    return result
+
+
+def select(columns: Columns, **filters) -> Columns:
+    """Linhas cujas colunas são iguais (com tolerância) aos valores dados"""
+    mask = np.ones(len(next(iter(columns.values()))), dtype=bool)
+    for name, target in filters.items():
+        mask &= np.isclose(columns[name], target)
+    return {name: values[mask] for name, values in columns.items()}
+
+
+def heatmap(columns: Columns, x: str, y: str, value: str = "total_cost") -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Matriz value[y, x] para um mapa de calor (filtre os outros eixos antes com select)"""
+    x_values, x_index = np.unique(columns[x], return_inverse=True)
+    y_values, y_index = np.unique(columns[y], return_inverse=True)
+    matrix = np.full((len(y_values), len(x_values)), np.nan)
+    matrix[y_index.ravel(), x_index.ravel()] = columns[value]
+    return x_values, y_values, matrix
+
+
+def break_even_videos_per_day(chars_per_video: Sequence[float],
+                              language_counts: Sequence[int],
+                              migration_cost: float,
+                              horizon_months: float,
+                              current_provider: str = "elevenlabs",
+                              target_provider: str = "google_cloud",
+                              translation_cache_hit_ratio: float = 0.0,
+                              hedge_rate: float = 0.0,
+                              analyzer: Optional[CostAnalyzer] = None) -> Columns:
+    """Volume (vídeos/dia) a partir do qual a migração se paga dentro do horizonte
+
+    Uma linha por (caracteres/vídeo, idiomas); infinito se o alvo não for
+    mais barato por caractere.
+    """
+    analyzer = analyzer or CostAnalyzer()
+    current_tts, current_translate = provider_rates(current_provider, analyzer)
+    target_tts, target_translate = provider_rates(target_provider, analyzer)
+    savings_per_char = (
+        (1 + hedge_rate) * (current_tts - target_tts)
+        + (1 - translation_cache_hit_ratio) * (current_translate - target_translate)
+    )
+
+    chars, languages = (
+        axis.ravel() for axis in np.meshgrid(
+            np.asarray(chars_per_video, dtype=float),
+            np.asarray(language_counts, dtype=float),
+            indexing="ij"
+        )
+    )
+    monthly_savings_per_video_day = DAYS_PER_MONTH * languages * chars * savings_per_char
+    with np.errstate(divide="ignore", invalid="ignore"):
+        videos = np.where(monthly_savings_per_video_day > 0,
+                          migration_cost / (horizon_months * monthly_savings_per_video_day), np.inf)
+    return {
+        "chars_per_video": chars,
+        "languages": languages.astype(int),
+        "break_even_videos_per_day": videos
+    }
+
+
+def to_frame(columns: Columns):
+    """Resultado colunar como pandas.DataFrame (pandas importado só aqui)"""
+    import pandas as pd
+
+    return pd.DataFrame(columns)
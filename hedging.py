@@ -0,0 +1,200 @@
+# Requisições de TTS com hedge (redução da latência de cauda)
+#
+# Se uma chamada passa do percentil configurado da latência recente do
+# provedor, uma cópia é enviada (ao mesmo provedor ou ao alternativo). A
+# primeira resposta bem-sucedida vence; a outra é cancelada: não chega a
+# ser enviada, ou a leitura da resposta é abortada e a conexão fechada. A
+# taxa de hedge e o custo extra são contabilizados para a análise de custos.
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Optional, Tuple
+
+
+class HedgeCancelled(Exception):
+    """A chamada perdeu para a sua cópia (ou vice-versa) e foi abortada"""
+
+
+class CancelToken:
+    """Sinal de cancelamento repassado a uma chamada com hedge
+
+    A chamada invoca dispatch() logo antes de enviar a requisição e check()
+    enquanto lê a resposta; ambos levantam HedgeCancelled depois do cancel().
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.cancelled = False
+        self.dispatched = False
+
+    def dispatch(self):
+        with self._lock:
+            if self.cancelled:
+                raise HedgeCancelled("chamada cancelada pelo hedge")
+            self.dispatched = True
+
+    def check(self):
+        if self.cancelled:
+            raise HedgeCancelled("chamada cancelada pelo hedge")
+
+    def cancel(self) -> bool:
+        """Cancela; retorna se a requisição já tinha chegado ao provedor"""
+        with self._lock:
+            self.cancelled = True
+            return self.dispatched
+
+
+class LatencyTracker:
+    """Latências recentes por chave, para estimar percentis"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.window = window
+        self.min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, key: str, seconds: float):
+        with self._lock:
+            samples = self._samples.get(key)
+            if samples is None:
+                samples = self._samples[key] = deque(maxlen=self.window)
+            samples.append(seconds)
+
+    def percentile(self, key: str, p: float) -> Optional[float]:
+        """Percentil p (0-100) das amostras, ou None se ainda forem poucas"""
+        with self._lock:
+            samples = sorted(self._samples.get(key, ()))
+        if len(samples) < self.min_samples:
+            return None
+        index = min(int(round(p / 100 * (len(samples) - 1))), len(samples) - 1)
+        return samples[index]
+
+
+class Hedger:
+    """Executa uma chamada e, se ela demorar, uma cópia concorrente"""
+
+    def __init__(self,
+                 percentile: float = 95.0,
+                 min_delay: float = 0.05,
+                 max_workers: int = 16,
+                 tracker: Optional[LatencyTracker] = None):
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.tracker = tracker or LatencyTracker()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-hedge")
+
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "cancelled": 0, "extra_cost": 0.0}
+
+    def hedge_delay(self, key: str) -> Optional[float]:
+        """Tempo de espera antes da cópia (None = latência ainda desconhecida)"""
+        delay = self.tracker.percentile(key, self.percentile)
+        return None if delay is None else max(delay, self.min_delay)
+
+    def run(self,
+            key: str,
+            primary: Callable[[CancelToken], Dict],
+            hedge: Callable[[CancelToken], Dict],
+            hedge_key: Optional[str] = None,
+            primary_cost: float = 0.0,
+            hedge_cost: float = 0.0) -> Dict:
+        """Retorna o primeiro resultado bem-sucedido entre a chamada e sua cópia
+
+        As chamadas recebem um CancelToken. primary_cost e hedge_cost são os
+        custos estimados de cada requisição (podem ser provedores diferentes);
+        o da perdedora é somado ao resultado como hedge_extra_cost quando ela
+        chega ao provedor e não é a única a ter sucesso.
+        """
+        self._count("calls")
+        primary_future, primary_token = self._submit(key, primary)
+        delay = self.hedge_delay(key)
+        if delay is None:
+            return primary_future.result()
+
+        done, _ = wait([primary_future], timeout=delay)
+        if done:
+            return primary_future.result()
+
+        self._count("hedged")
+        hedge_future, hedge_token = self._submit(hedge_key or key, hedge)
+        pending = {primary_future, hedge_future}
+        winner: Optional[Future] = None
+        while pending and winner is None:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.result().get("success"):
+                    winner = future
+                    break
+
+        if winner is None:
+            # As duas falharam: vale o erro da chamada original, sem custo extra
+            result = dict(primary_future.result())
+            result.update({"hedged": True, "hedge_won": False, "hedge_extra_cost": 0.0})
+            return result
+        if winner is primary_future:
+            loser, loser_token, loser_cost = hedge_future, hedge_token, hedge_cost
+        else:
+            loser, loser_token, loser_cost = primary_future, primary_token, primary_cost
+
+        if loser.done():
+            # Também terminou: só é cobrada se teve sucesso
+            charged = bool(loser.result().get("success"))
+        else:
+            loser.cancel()
+            # Em andamento: a leitura é abortada, mas a requisição já enviada é cobrada
+            charged = loser_token.cancel()
+            self._count("cancelled")
+        extra_cost = loser_cost if charged else 0.0
+        if charged:
+            with self._lock:
+                self._stats["extra_cost"] += loser_cost
+        if winner is hedge_future:
+            self._count("hedge_wins")
+
+        result = dict(winner.result())
+        result.update({"hedged": True, "hedge_won": winner is hedge_future, "hedge_extra_cost": extra_cost})
+        return result
+
+    def stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        stats["hedge_rate"] = stats["hedged"] / stats["calls"] if stats["calls"] else 0.0
+        return stats
+
+    def _submit(self, key: str, func: Callable[[CancelToken], Dict]) -> Tuple[Future, CancelToken]:
+        token = CancelToken()
+
+        def timed():
+            start = time.monotonic()
+            try:
+                result = func(token)
+            except HedgeCancelled as e:
+                result = {"success": False, "error": str(e), "cancelled": True}
+            except Exception as e:
+                result = {"success": False, "error": str(e)}
+            # Só respostas reais do provedor entram no percentil: erros rápidos
+            # baixariam o p95 e acertos de cache não representam a latência
+            if result.get("success") and not result.get("cache_hit"):
+                self.tracker.record(key, time.monotonic() - start)
+            return result
+
+        return self._executor.submit(timed), token
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
+
+
+_default_hedger: Optional[Hedger] = None
+_default_lock = threading.Lock()
+
+
+def get_default_hedger() -> Hedger:
+    """Hedger compartilhado do processo (mantém o histórico de latência)"""
+    global _default_hedger
+    with _default_lock:
+        if _default_hedger is None:
+            _default_hedger = Hedger()
+        return _default_hedger
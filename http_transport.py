@@ -0,0 +1,119 @@
+# Transporte HTTP compartilhado pelos serviços de provedores
+#
+# Uma única requests.Session com pool de conexões keep-alive por host evita
+# um novo handshake TCP + TLS a cada chamada de tradução, TTS ou OAuth.
+
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 16
+
+
+class HttpTransport:
+    """Sessão HTTP com pool de conexões, timeouts configuráveis e estatísticas"""
+
+    def __init__(self,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 pool_block: bool = True):
+        self.timeout: Tuple[float, float] = (connect_timeout, read_timeout)
+
+        # pool_connections: quantos hosts mantêm pool;
+        # pool_maxsize: limite de conexões simultâneas por host.
+        self._adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=pool_block
+        )
+        self.session = requests.Session()
+        self.session.mount("https://", self._adapter)
+        self.session.mount("http://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests = 0
+        self._errors = 0
+        self._total_time = 0.0
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """Executa uma requisição reutilizando conexões do pool"""
+        kwargs.setdefault("timeout", self.timeout)
+        start_time = time.perf_counter()
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._errors += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start_time
+            with self._lock:
+                self._requests += 1
+                self._total_time += elapsed
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def stats(self) -> Dict:
+        """Estatísticas de reutilização de conexões e latência por chamada"""
+        new_connections = 0
+        pool_requests = 0
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            new_connections += pool.num_connections
+            pool_requests += pool.num_requests
+            hosts[f"{pool.scheme}://{pool.host}"] = {
+                "connections_opened": pool.num_connections,
+                "requests": pool.num_requests
+            }
+
+        with self._lock:
+            requests_count = self._requests
+            total_time = self._total_time
+            errors = self._errors
+
+        return {
+            "requests": requests_count,
+            "errors": errors,
+            "connections_opened": new_connections,
+            "connections_reused": max(0, pool_requests - new_connections),
+            "reuse_ratio": (pool_requests - new_connections) / pool_requests if pool_requests else 0.0,
+            "avg_latency_ms": total_time / requests_count * 1000 if requests_count else 0.0,
+            "hosts": hosts
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_default_transport: Optional[HttpTransport] = None
+_default_lock = threading.Lock()
+
+
+def get_default_transport() -> HttpTransport:
+    """Transporte compartilhado do processo, configurável por variáveis de ambiente"""
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None:
+            _default_transport = HttpTransport(
+                connect_timeout=float(os.environ.get("HTTP_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+                read_timeout=float(os.environ.get("HTTP_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+                pool_maxsize=int(os.environ.get("HTTP_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE))
+            )
+        return _default_transport
@@ -0,0 +1,312 @@
+# Armazenamento durável de jobs de lote (SQLite em modo WAL)
+#
+# Guarda o estado de cada (vídeo, idioma) e onde ficou o áudio gerado. Uma
+# execução reiniciada pula o que já foi concluído e só reprocessa unidades
+# pendentes, com falha ou com lease expirado. Vários workers podem
+# reivindicar trabalho do mesmo arquivo de forma atômica.
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS videos (
+    video_id TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS units (
+    video_id TEXT NOT NULL,
+    language TEXT NOT NULL,
+    status TEXT NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker_id TEXT,
+    lease_expires REAL,
+    output_path TEXT,
+    result TEXT,
+    error TEXT,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (video_id, language)
+);
+CREATE INDEX IF NOT EXISTS idx_units_status ON units(status, video_id);
+"""
+
+
+class JobStore:
+    """Estado por vídeo e por idioma com reivindicação atômica de trabalho"""
+
+    def __init__(self, path: str, max_attempts: int = 3, lease_seconds: float = 600):
+        self.path = path
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+        # Vídeos com roteiro alterado cujo reprocessamento ficou adiado (ver enqueue)
+        self.deferred = 0
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=60, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def enqueue(self, videos: Iterable[Tuple[str, str]], languages: List[str], chunk_size: int = 500) -> int:
+        """Registra vídeos e suas unidades; idempotente (vídeos já conhecidos são mantidos)
+
+        Se o texto de um vídeo mudou, suas unidades voltam para pendente. Se
+        algum worker ainda detém uma unidade dele (lease válido), o vídeo fica
+        como está e conta em self.deferred: enfileire de novo depois.
+        """
+        added = 0
+        chunk = []
+        for video in videos:
+            chunk.append(video)
+            if len(chunk) >= chunk_size:
+                added += self._enqueue_chunk(chunk, languages)
+                chunk = []
+        if chunk:
+            added += self._enqueue_chunk(chunk, languages)
+        return added
+
+    def claim(self, worker_id: str, limit: int = 16) -> List[Dict]:
+        """Reivindica até `limit` vídeos com unidades a processar
+
+        Retorna [{"video_id", "text", "languages"}] apenas com os idiomas
+        que ainda precisam ser processados.
+        """
+        now = time.time()
+        claimable = (
+            "(status = ? OR (status = ? AND attempts < ?) OR (status = ? AND lease_expires < ? AND attempts < ?))"
+        )
+        claim_args = (PENDING, FAILED, self.max_attempts, RUNNING, now, self.max_attempts)
+
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                # Lease vencido sem tentativas restantes: a unidade derruba
+                # workers repetidamente e não volta mais para a fila
+                self._conn.execute(
+                    "UPDATE units SET status = ?, error = ?, worker_id = NULL, lease_expires = NULL, "
+                    "updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                    (FAILED, "lease expirado sem conclusão", now, RUNNING, now, self.max_attempts)
+                )
+                video_ids = [row[0] for row in self._conn.execute(
+                    f"SELECT DISTINCT video_id FROM units WHERE {claimable} LIMIT ?",
+                    claim_args + (limit,)
+                )]
+                if not video_ids:
+                    self._conn.execute("COMMIT")
+                    return []
+
+                placeholders = ",".join("?" * len(video_ids))
+                claimed = self._conn.execute(
+                    f"UPDATE units SET status = ?, worker_id = ?, lease_expires = ?, "
+                    f"attempts = attempts + 1, updated_at = ? "
+                    f"WHERE video_id IN ({placeholders}) AND {claimable} "
+                    f"RETURNING video_id, language",
+                    (RUNNING, worker_id, now + self.lease_seconds, now, *video_ids) + claim_args
+                ).fetchall()
+
+                texts = dict(self._conn.execute(
+                    f"SELECT video_id, text FROM videos WHERE video_id IN ({placeholders})",
+                    video_ids
+                ).fetchall())
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+        languages: Dict[str, List[str]] = {}
+        for video_id, language in claimed:
+            languages.setdefault(video_id, []).append(language)
+        return [
+            {"video_id": video_id, "text": texts[video_id], "languages": sorted(languages[video_id])}
+            for video_id in video_ids if video_id in languages
+        ]
+
+    def complete(self, worker_id: str, video_id: str, language: str, result: Dict,
+                 output_path: Optional[str] = None) -> bool:
+        """Marca a unidade como concluída, com o resultado e o caminho do áudio
+
+        Só vale enquanto a unidade pertence ao worker: se o lease venceu e
+        outro worker a reivindicou, retorna False e nada é gravado.
+        """
+        return self._update(worker_id, video_id, language, DONE, output_path=output_path,
+                            result=json.dumps(result, ensure_ascii=False), error=None)
+
+    def fail(self, worker_id: str, video_id: str, language: str, error: str) -> bool:
+        return self._update(worker_id, video_id, language, FAILED, error=error)
+
+    def record(self, worker_id: str, video_result: Dict) -> int:
+        """Registra o resultado de cada idioma de um vídeo processado; retorna quantos foram gravados"""
+        video_id = video_result["video_id"]
+        recorded = 0
+        for lang_result in video_result["languages"]:
+            if lang_result["success"]:
+                recorded += self.complete(worker_id, video_id, lang_result["language"], lang_result,
+                                          lang_result.get("audio_path"))
+            else:
+                recorded += self.fail(worker_id, video_id, lang_result["language"],
+                                      lang_result.get("error", "unknown error"))
+        return recorded
+
+    def renew(self, worker_id: str) -> int:
+        """Estende o lease das unidades em andamento do worker (heartbeat)"""
+        now = time.time()
+        with self._lock:
+            cursor = self._conn.execute(
+                "UPDATE units SET lease_expires = ?, updated_at = ? WHERE worker_id = ? AND status = ?",
+                (now + self.lease_seconds, now, worker_id, RUNNING)
+            )
+            return cursor.rowcount
+
+    def running_workers(self) -> Dict[str, int]:
+        """Unidades em andamento por worker"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT worker_id, COUNT(*) FROM units WHERE status = ? GROUP BY worker_id",
+                (RUNNING,)
+            ).fetchall()
+        return dict(rows)
+
+    def release(self, worker_id: str, crashed: bool = False) -> int:
+        """Devolve à fila o que o worker reivindicou e não concluiu
+
+        Numa saída voluntária a tentativa é devolvida. Se o worker morreu, a
+        tentativa conta e a unidade fica como falha (reprocessada enquanto
+        houver tentativas): uma unidade que derruba o worker não volta para
+        sempre.
+        """
+        if crashed:
+            sql = ("UPDATE units SET status = ?, error = ?, worker_id = NULL, lease_expires = NULL, "
+                   "updated_at = ? WHERE worker_id = ? AND status = ?")
+            args = (FAILED, f"worker {worker_id} encerrado sem concluir", time.time(), worker_id, RUNNING)
+        else:
+            sql = ("UPDATE units SET status = ?, attempts = MAX(attempts - 1, 0), worker_id = NULL, "
+                   "lease_expires = NULL, updated_at = ? WHERE worker_id = ? AND status = ?")
+            args = (PENDING, time.time(), worker_id, RUNNING)
+        with self._lock:
+            return self._conn.execute(sql, args).rowcount
+
+    def completed_results(self, video_id: str) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT result FROM units WHERE video_id = ? AND status = ? ORDER BY language",
+                (video_id, DONE)
+            ).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def unit_results(self) -> Iterator[Dict]:
+        """Resultado de cada unidade concluída e {"success": False, ...} das que falharam"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT language, status, result, error FROM units WHERE status IN (?, ?)",
+                (DONE, FAILED)
+            ).fetchall()
+        for language, status, result, error in rows:
+            if status == DONE:
+                yield json.loads(result)
+            else:
+                yield {"success": False, "language": language, "error": error}
+
+    def counts(self) -> Dict[str, int]:
+        """Quantidade de unidades por estado"""
+        with self._lock:
+            rows = self._conn.execute("SELECT status, COUNT(*) FROM units GROUP BY status").fetchall()
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def close(self):
+        self._conn.close()
+
+    def _enqueue_chunk(self, chunk: List[Tuple[str, str]], languages: List[str]) -> int:
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                placeholders = ",".join("?" * len(chunk))
+                existing = dict(self._conn.execute(
+                    f"SELECT video_id, text FROM videos WHERE video_id IN ({placeholders})",
+                    [video_id for video_id, _ in chunk]
+                ).fetchall())
+
+                new_videos = [(video_id, text, now) for video_id, text in chunk if video_id not in existing]
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO videos (video_id, text, created_at) VALUES (?, ?, ?)",
+                    new_videos
+                )
+
+                # Roteiro editado: atualiza o texto e reprocessa todos os idiomas
+                changed = [(video_id, text) for video_id, text in chunk
+                           if video_id in existing and existing[video_id] != text]
+                if changed:
+                    # Unidades ainda com um worker vivo: resetá-las agora faria o
+                    # vídeo ser processado (e cobrado) duas vezes; fica para depois
+                    busy = {row[0] for row in self._conn.execute(
+                        f"SELECT DISTINCT video_id FROM units WHERE status = ? AND lease_expires >= ? "
+                        f"AND video_id IN ({','.join('?' * len(changed))})",
+                        (RUNNING, now, *[video_id for video_id, _ in changed])
+                    )}
+                    self.deferred += len(busy)
+                    changed = [(video_id, text) for video_id, text in changed if video_id not in busy]
+                self._conn.executemany(
+                    "UPDATE videos SET text = ? WHERE video_id = ?",
+                    [(text, video_id) for video_id, text in changed]
+                )
+                self._conn.executemany(
+                    "UPDATE units SET status = ?, attempts = 0, result = NULL, error = NULL, "
+                    "output_path = NULL, updated_at = ? WHERE video_id = ?",
+                    [(PENDING, now, video_id) for video_id, _ in changed]
+                )
+
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO units (video_id, language, status, updated_at) VALUES (?, ?, ?, ?)",
+                    [(video_id, language, PENDING, now) for video_id, _ in chunk for language in languages]
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return len(new_videos)
+
+    def _update(self, worker_id: str, video_id: str, language: str, status: str, **fields) -> bool:
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._lock:
+            cursor = self._conn.execute(
+                f"UPDATE units SET status = ?, {columns}, worker_id = NULL, lease_expires = NULL, "
+                f"updated_at = ? WHERE video_id = ? AND language = ? AND worker_id = ? AND status = ?",
+                (status, *fields.values(), time.time(), video_id, language, worker_id, RUNNING)
+            )
+            return cursor.rowcount > 0
+
+
+class LeaseHeartbeat:
+    """Renova periodicamente o lease das unidades de um worker enquanto ele processa"""
+
+    def __init__(self, store: JobStore, worker_id: str, interval: Optional[float] = None):
+        self.store = store
+        self.worker_id = worker_id
+        # Bem abaixo do lease: uma renovação perdida não basta para expirar
+        self.interval = interval or store.lease_seconds / 3
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="job-lease", daemon=True)
+
+    def start(self) -> "LeaseHeartbeat":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.store.renew(self.worker_id)
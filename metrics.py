@@ -0,0 +1,224 @@
+# Métricas de latência por estágio
+#
+# Histogramas (tempo, caracteres, bytes) com rótulos de estágio, provedor e
+# idioma, registrados no caminho quente: OAuth, espera por cota, chamadas de
+# tradução e TTS, backoff de retentativas, fila do pipeline e total por
+# idioma. Exportados em texto Prometheus (endpoint HTTP ou arquivo para o
+# textfile collector) e resumidos em p50/p95/p99 no dashboard.
+
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+# Nomes das métricas
+STAGE_SECONDS = "video_stage_seconds"
+REQUEST_CHARS = "video_request_chars"
+AUDIO_BYTES = "video_audio_bytes"
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+CHARS_BUCKETS = (10, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+METRIC_DEFINITIONS = {
+    STAGE_SECONDS: ("Tempo por estágio (oauth, quota_wait, translate, tts, retry_backoff, queue_*, language_total)",
+                    SECONDS_BUCKETS),
+    REQUEST_CHARS: ("Caracteres enviados por requisição", CHARS_BUCKETS),
+    AUDIO_BYTES: ("Bytes de áudio por idioma", BYTES_BUCKETS)
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """Histograma cumulativo com uma janela de amostras recentes para percentis"""
+
+    def __init__(self, buckets: Tuple[float, ...], window: int = 1000):
+        self.buckets = buckets
+        self.bucket_counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+        self.samples: Deque[float] = deque(maxlen=window)
+
+    def observe(self, value: float):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.bucket_counts[i] += 1
+        self.count += 1
+        self.sum += value
+        self.samples.append(value)
+
+    def percentile(self, p: float) -> Optional[float]:
+        samples = sorted(self.samples)
+        if not samples:
+            return None
+        return samples[min(int(round(p / 100 * (len(samples) - 1))), len(samples) - 1)]
+
+
+class MetricsRegistry:
+    """Histogramas rotulados, seguros entre threads"""
+
+    def __init__(self, const_labels: Optional[Dict[str, str]] = None, window: int = 1000):
+        # Rótulos fixos em todas as séries (ex.: worker, em pools de processos)
+        self.const_labels = dict(const_labels or {})
+        self.window = window
+        self._lock = threading.Lock()
+        self._series: Dict[str, Dict[Labels, Histogram]] = {name: {} for name in METRIC_DEFINITIONS}
+
+    def observe(self, name: str, value: float, **labels):
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._series[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(METRIC_DEFINITIONS[name][1], self.window)
+            histogram.observe(value)
+
+    def observe_stage(self, stage: str, seconds: float, provider: str = "", language: str = ""):
+        self.observe(STAGE_SECONDS, seconds, stage=stage, provider=provider, language=_short_language(language))
+
+    def summary(self, name: str = STAGE_SECONDS) -> List[Dict]:
+        """Uma linha por série: rótulos, contagem, média e p50/p95/p99 recentes"""
+        with self._lock:
+            series = list(self._series[name].items())
+            rows = []
+            for key, histogram in series:
+                row = dict(key)
+                row.update({
+                    "count": histogram.count,
+                    "mean": histogram.sum / histogram.count if histogram.count else 0.0,
+                    "p50": histogram.percentile(50),
+                    "p95": histogram.percentile(95),
+                    "p99": histogram.percentile(99)
+                })
+                rows.append(row)
+        return sorted(rows, key=lambda row: tuple(str(row.get(k, "")) for k in ("stage", "provider", "language")))
+
+    def render(self) -> str:
+        """Texto no formato de exposição do Prometheus"""
+        lines = []
+        with self._lock:
+            for name, series in self._series.items():
+                help_text = METRIC_DEFINITIONS[name][0]
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    labels = dict(self.const_labels)
+                    labels.update(key)
+                    for bound, count in zip(histogram.buckets, histogram.bucket_counts):
+                        lines.append(f"{name}_bucket{_format_labels(labels, le=_format_value(bound))} {count}")
+                    lines.append(f"{name}_bucket{_format_labels(labels, le='+Inf')} {histogram.count}")
+                    lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}")
+                    lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str):
+        """Grava o texto atomicamente (para o textfile collector do node_exporter)"""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1"):
+        """Expõe /metrics num servidor HTTP em segundo plano"""
+        # Importado só aqui: workers sem endpoint não pagam pelo http.server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = registry.render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+
+class TextfileExporter:
+    """Regrava o arquivo de métricas periodicamente, e uma última vez no stop()"""
+
+    def __init__(self, registry: MetricsRegistry, path: str, interval: float = 10.0):
+        self.registry = registry
+        self.path = path
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="metrics-textfile", daemon=True)
+
+    def start(self) -> "TextfileExporter":
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.registry.write_textfile(self.path)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.registry.write_textfile(self.path)
+
+
+class StageTimer:
+    """Cronômetro de um estágio: with StageTimer(...) registra a duração ao sair"""
+
+    def __init__(self, registry: Optional[MetricsRegistry], stage: str, provider: str = "", language: str = ""):
+        self.registry = registry
+        self.stage = stage
+        self.provider = provider
+        self.language = language
+
+    def __enter__(self):
+        self._start = time.monotonic()
+        return self
+
+    def __exit__(self, *exc):
+        if self.registry is not None:
+            self.registry.observe_stage(self.stage, time.monotonic() - self._start, self.provider, self.language)
+        return False
+
+
+def _short_language(language: str) -> str:
+    """Rótulo de idioma uniforme: "en-US" (TTS) e "en" (tradução) viram "en\""""
+    return language.split("-")[0] if language else ""
+
+
+def _format_labels(labels: Dict[str, str], **extra) -> str:
+    labels = dict(labels, **extra)
+    if not labels:
+        return ""
+    pairs = (
+        k + '="' + str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in sorted(labels.items())
+    )
+    return "{" + ",".join(pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value))
+
+
+_default_metrics: Optional[MetricsRegistry] = None
+_default_lock = threading.Lock()
+
+
+def get_default_metrics() -> MetricsRegistry:
+    """Registro de métricas compartilhado do processo"""
+    global _default_metrics
+    with _default_lock:
+        if _default_metrics is None:
+            _default_metrics = MetricsRegistry()
+        return _default_metrics
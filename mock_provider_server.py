@@ -0,0 +1,405 @@
+# Servidor local que imita os provedores (Google TTS, Translate, OAuth, ElevenLabs)
+#
+# Responde nos mesmos formatos das APIs reais, com latência sorteada de uma
+# distribuição configurável, taxas de erro 5xx e de 429 (com Retry-After),
+# cota por minuto e tamanho de áudio proporcional ao texto. O sorteio de cada
+# requisição depende só da semente, do endpoint e do número da requisição,
+# então uma mesma carga produz as mesmas latências e falhas. Uso:
+#
+#   python mock_provider_server.py --port 8089 --latency "lognormal:0.3,0.4" --error-rate 0.01
+#   export PROVIDER_BASE_URL=http://127.0.0.1:8089 GOOGLE_CLOUD_API_KEY=mock ELEVENLABS_API_KEY=mock
+#   python batch_cli.py roteiros.csv --output-dir saida
+
+import argparse
+import base64
+import json
+import math
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlsplit
+
+# Endpoints imitados (nomes usados nos perfis e nas estatísticas)
+ENDPOINTS = ("token", "translate", "google_tts", "elevenlabs_tts")
+
+# Quadro MPEG-1 Layer III, 128 kbps, 44,1 kHz: 417 bytes (~26 ms de áudio)
+MP3_FRAME = bytes([0xFF, 0xFB, 0x90, 0x00]) + b"\0" * 413
+
+
+class LatencyModel:
+    """Distribuição de latência em segundos: fixed:S, uniform:A,B, exp:MÉDIA ou lognormal:MEDIANA,SIGMA"""
+
+    def __init__(self, kind: str = "fixed", params: Tuple[float, ...] = (0.0,)):
+        if kind not in ("fixed", "uniform", "exp", "lognormal"):
+            raise ValueError(f"distribuição desconhecida: {kind}")
+        self.kind = kind
+        self.params = params
+
+    @classmethod
+    def parse(cls, spec: str) -> "LatencyModel":
+        kind, _, args = spec.partition(":")
+        params = tuple(float(value) for value in args.split(",") if value) or (0.0,)
+        return cls(kind.strip(), params)
+
+    def sample(self, rng: random.Random) -> float:
+        if self.kind == "fixed":
+            return self.params[0]
+        if self.kind == "uniform":
+            return rng.uniform(self.params[0], self.params[1])
+        if self.kind == "exp":
+            return rng.expovariate(1 / self.params[0]) if self.params[0] > 0 else 0.0
+        median, sigma = self.params[0], self.params[1] if len(self.params) > 1 else 0.5
+        return rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0
+
+    def __repr__(self) -> str:
+        return f"{self.kind}:{','.join(f'{p:g}' for p in self.params)}"
+
+
+@dataclass
+class EndpointProfile:
+    """Comportamento de um endpoint imitado"""
+    latency: LatencyModel = field(default_factory=LatencyModel)
+    # Segundos adicionais por caractere de entrada
+    latency_per_char: float = 0.0
+    error_rate: float = 0.0
+    rate_429: float = 0.0
+    retry_after: float = 1.0
+    # Cota por minuto (0 = sem limite); acima dela, 429
+    requests_per_minute: float = 0
+
+
+class MockProviderServer:
+    """Servidor HTTP em segundo plano com os endpoints dos provedores"""
+
+    def __init__(self,
+                 profiles: Optional[Dict[str, EndpointProfile]] = None,
+                 audio_bytes_per_char: int = 240,
+                 seed: int = 0,
+                 host: str = "127.0.0.1",
+                 port: int = 0):
+        self.profiles = {name: EndpointProfile() for name in ENDPOINTS}
+        self.profiles.update(profiles or {})
+        self.audio_bytes_per_char = audio_bytes_per_char
+        self.seed = seed
+
+        self._lock = threading.Lock()
+        self._sequence: Dict[str, int] = defaultdict(int)
+        self._recent: Dict[str, Deque[float]] = defaultdict(deque)
+        self._stats: Dict[str, Dict] = {
+            name: {"requests": 0, "errors": 0, "throttled": 0, "characters": 0, "bytes_out": 0}
+            for name in ENDPOINTS
+        }
+
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def env(self) -> Dict[str, str]:
+        """Variáveis de ambiente que apontam os serviços para este servidor"""
+        return {
+            "PROVIDER_BASE_URL": self.url,
+            "GOOGLE_CLOUD_API_KEY": "mock",
+            "ELEVENLABS_API_KEY": "mock"
+        }
+
+    def start(self) -> "MockProviderServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="mock-provider", daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Atende em primeiro plano (uso pela linha de comando)"""
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "MockProviderServer":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def stats(self) -> Dict[str, Dict]:
+        with self._lock:
+            return {name: dict(stats) for name, stats in self._stats.items()}
+
+    def reset_stats(self):
+        with self._lock:
+            for stats in self._stats.values():
+                for key in stats:
+                    stats[key] = 0
+
+    def _decide(self, endpoint: str, characters: int) -> Tuple[float, Optional[int]]:
+        """Sorteia latência e falha da requisição (determinístico por semente e sequência)"""
+        profile = self.profiles[endpoint]
+        now = time.monotonic()
+        with self._lock:
+            self._sequence[endpoint] += 1
+            sequence = self._sequence[endpoint]
+            stats = self._stats[endpoint]
+            stats["requests"] += 1
+            stats["characters"] += characters
+
+            over_quota = False
+            if profile.requests_per_minute:
+                recent = self._recent[endpoint]
+                while recent and now - recent[0] > 60:
+                    recent.popleft()
+                over_quota = len(recent) >= profile.requests_per_minute
+                if not over_quota:
+                    recent.append(now)
+
+        rng = random.Random(f"{self.seed}:{endpoint}:{sequence}")
+        latency = profile.latency.sample(rng) + characters * profile.latency_per_char
+        roll = rng.random()
+        if over_quota or roll < profile.rate_429:
+            status = 429
+        elif roll < profile.rate_429 + profile.error_rate:
+            status = rng.choice((500, 503))
+        else:
+            status = None
+        if status is not None:
+            with self._lock:
+                self._stats[endpoint]["throttled" if status == 429 else "errors"] += 1
+        return latency, status
+
+    def _audio(self, characters: int) -> bytes:
+        frames = max(1, characters * self.audio_bytes_per_char // len(MP3_FRAME))
+        return MP3_FRAME * frames
+
+    def _count_bytes(self, endpoint: str, size: int):
+        with self._lock:
+            self._stats[endpoint]["bytes_out"] += size
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, como nas APIs reais (o pool de conexões é exercitado)
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if urlsplit(self.path).path == "/stats":
+                    self._send_json(200, server.stats())
+                else:
+                    self._send_json(404, {"error": "not found"})
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                path = urlsplit(self.path).path
+
+                if path == "/token":
+                    self._token()
+                elif path == "/language/translate/v2":
+                    self._translate(json.loads(body or b"{}"))
+                elif path == "/v1/text:synthesize":
+                    self._google_tts(json.loads(body or b"{}"))
+                else:
+                    match = re.fullmatch(r"/v1/text-to-speech/([^/]+)(/stream)?", path)
+                    if match:
+                        self._elevenlabs_tts(json.loads(body or b"{}"), stream=bool(match.group(2)))
+                    else:
+                        self._send_json(404, {"error": {"code": 404, "message": f"{path} not found"}})
+
+            def _token(self):
+                latency, status = server._decide("token", 0)
+                time.sleep(latency)
+                if status is not None:
+                    self._send_google_error(status)
+                    return
+                self._send_json(200, {"access_token": f"mock-token-{time.time():.0f}",
+                                      "expires_in": 3600, "token_type": "Bearer"}, endpoint="token")
+
+            def _translate(self, payload: Dict):
+                texts = payload.get("q") or []
+                texts = [texts] if isinstance(texts, str) else texts
+                latency, status = server._decide("translate", sum(len(text) for text in texts))
+                time.sleep(latency)
+                if status is not None:
+                    self._send_google_error(status)
+                    return
+                target = payload.get("target", "en")
+                self._send_json(200, {"data": {"translations": [
+                    {"translatedText": f"[{target.upper()}] {text}"} for text in texts
+                ]}}, endpoint="translate")
+
+            def _google_tts(self, payload: Dict):
+                text = payload.get("input", {}).get("text", "")
+                latency, status = server._decide("google_tts", len(text))
+                time.sleep(latency)
+                if status is not None:
+                    self._send_google_error(status)
+                    return
+                audio = server._audio(len(text))
+                self._send_json(200, {
+                    "audioContent": base64.b64encode(audio).decode(),
+                    "audioConfig": payload.get("audioConfig", {})
+                }, endpoint="google_tts")
+
+            def _elevenlabs_tts(self, payload: Dict, stream: bool):
+                text = payload.get("text", "")
+                latency, status = server._decide("elevenlabs_tts", len(text))
+                if status is not None:
+                    time.sleep(latency)
+                    headers = {"Retry-After": f"{server.profiles['elevenlabs_tts'].retry_after:g}"} if status == 429 else {}
+                    self._send_json(status, {"detail": {"status": "error", "message": f"mock {status}"}}, headers)
+                    return
+                audio = server._audio(len(text))
+                self.send_response(200)
+                self.send_header("Content-Type", "audio/mpeg")
+                self.send_header("Content-Length", str(len(audio)))
+                self.end_headers()
+                if not stream:
+                    time.sleep(latency)
+                    self.wfile.write(audio)
+                else:
+                    # Primeiro pedaço depois de uma fração da latência; o resto em seguida
+                    chunks = [audio[i:i + 16384] for i in range(0, len(audio), 16384)]
+                    for i, chunk in enumerate(chunks):
+                        time.sleep(latency * (0.3 if i == 0 else 0.7 / max(len(chunks) - 1, 1)))
+                        self.wfile.write(chunk)
+                        self.wfile.flush()
+                server._count_bytes("elevenlabs_tts", len(audio))
+
+            def _send_google_error(self, status: int):
+                reason = {429: "RESOURCE_EXHAUSTED", 500: "INTERNAL", 503: "UNAVAILABLE"}.get(status, "UNKNOWN")
+                headers = {}
+                if status == 429:
+                    endpoint = "translate" if "translate" in self.path else "google_tts"
+                    headers["Retry-After"] = f"{server.profiles[endpoint].retry_after:g}"
+                self._send_json(status, {"error": {"code": status, "message": f"mock {reason}", "status": reason}},
+                                headers)
+
+            def _send_json(self, status: int, data, headers: Optional[Dict] = None, endpoint: Optional[str] = None):
+                body = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+                if endpoint:
+                    server._count_bytes(endpoint, len(body))
+
+        return Handler
+
+
+def parse_endpoint_values(values, cast=float) -> Dict[str, object]:
+    """Converte ["tts=...", ...] em {endpoint: valor}; "tts" vale para os dois provedores de TTS"""
+    parsed = {}
+    for value in values or []:
+        name, _, raw = value.partition("=")
+        names = ("google_tts", "elevenlabs_tts") if name == "tts" else (name,)
+        for endpoint in names:
+            if endpoint not in ENDPOINTS:
+                raise ValueError(f"endpoint desconhecido: {name} (use {', '.join(ENDPOINTS)} ou tts)")
+            parsed[endpoint] = cast(raw)
+    return parsed
+
+
+def build_profiles(args) -> Dict[str, EndpointProfile]:
+    latencies = parse_endpoint_values(args.endpoint_latency, LatencyModel.parse)
+    per_char = parse_endpoint_values(args.latency_per_char)
+    rpm = parse_endpoint_values(args.rpm)
+    return {
+        endpoint: EndpointProfile(
+            latency=latencies.get(endpoint, LatencyModel.parse(args.latency)),
+            latency_per_char=per_char.get(endpoint, 0.0),
+            error_rate=args.error_rate,
+            rate_429=args.rate_429,
+            retry_after=args.retry_after,
+            requests_per_minute=rpm.get(endpoint, 0)
+        )
+        for endpoint in ENDPOINTS
+    }
+
+
+def write_service_account(path: str, server_url: str):
+    """Gera uma Service Account de teste (chave RSA nova) apontando para o /token local"""
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    pem = key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                            serialization.NoEncryption()).decode()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({
+            "type": "service_account",
+            "project_id": "mock-project",
+            "client_email": "mock@mock-project.iam.gserviceaccount.com",
+            "private_key": pem,
+            "token_uri": f"{server_url}/token"
+        }, f)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Servidor local que imita as APIs de tradução e TTS")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos sorteios de latência e falhas")
+    parser.add_argument("--latency", default="lognormal:0.2,0.5",
+                        help="Distribuição padrão: fixed:S, uniform:A,B, exp:MÉDIA ou lognormal:MEDIANA,SIGMA")
+    parser.add_argument("--endpoint-latency", action="append",
+                        help="Distribuição de um endpoint, ex.: tts=lognormal:0.8,0.6 (repetível)")
+    parser.add_argument("--latency-per-char", action="append",
+                        help="Segundos extras por caractere, ex.: tts=0.0005 (repetível)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 500/503")
+    parser.add_argument("--rate-429", type=float, default=0.0, help="Fração de respostas 429")
+    parser.add_argument("--retry-after", type=float, default=1.0, help="Retry-After dos 429, em segundos")
+    parser.add_argument("--rpm", action="append", help="Cota por minuto de um endpoint, ex.: translate=300")
+    parser.add_argument("--audio-bytes-per-char", type=int, default=240, help="Tamanho do MP3 por caractere")
+    parser.add_argument("--service-account-out", default=None,
+                        help="Grava uma Service Account de teste para exercitar o OAuth local")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    server = MockProviderServer(build_profiles(args), args.audio_bytes_per_char, args.seed, args.host, args.port)
+
+    if args.service_account_out:
+        write_service_account(args.service_account_out, server.url)
+
+    print(f"Provedores simulados em {server.url}", file=sys.stderr)
+    for endpoint, profile in server.profiles.items():
+        print(f"  {endpoint}: latência {profile.latency!r} (+{profile.latency_per_char:g}s/char), "
+              f"erros {profile.error_rate:.1%}, 429 {profile.rate_429:.1%}, "
+              f"cota {profile.requests_per_minute or '∞'}/min", file=sys.stderr)
+    print("Aponte os serviços para cá com:", file=sys.stderr)
+    for name, value in server.env().items():
+        print(f"  export {name}={value}", file=sys.stderr)
+    if args.service_account_out:
+        print(f"  export GOOGLE_APPLICATION_CREDENTIALS=\"$(cat {args.service_account_out})\"", file=sys.stderr)
+    sys.stderr.flush()
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(json.dumps(server.stats(), indent=2), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+# Utilitários de MP3: concatenação de trechos sem re-encode
+#
+# Os trechos sintetizados separadamente são unidos no nível de frames:
+# tags ID3 e o frame de cabeçalho Xing/Info (que descreve a duração de um
+# único arquivo) são removidos de cada trecho antes da junção.
+
+from typing import Iterable, Optional
+
+# Bitrates (kbps) por [versão MPEG 1?][layer] e taxas de amostragem por versão
+_BITRATES = {
+    (True, 1): [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_SAMPLE_RATES = {
+    3: [44100, 48000, 32000],  # MPEG 1
+    2: [22050, 24000, 16000],  # MPEG 2
+    0: [11025, 12000, 8000],   # MPEG 2.5
+}
+
+
+def frame_length(data, offset: int) -> Optional[int]:
+    """Tamanho do frame MP3 que começa em offset, ou None se não houver cabeçalho válido"""
+    if offset + 4 > len(data):
+        return None
+    b1, b2 = data[offset + 1], data[offset + 2]
+    if data[offset] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = (b2 >> 4) & 0x0F
+    sample_rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+
+    if layer == 1:
+        return (12 * bitrate // sample_rate + padding) * 4
+    if layer == 3 and not mpeg1:
+        return 72 * bitrate // sample_rate + padding
+    return 144 * bitrate // sample_rate + padding
+
+
+def strip_tags(data: bytes) -> memoryview:
+    """Remove tag ID3v2 do início e ID3v1 do fim (sem copiar os frames)"""
+    view = memoryview(data)
+    start, end = 0, len(view)
+
+    if end >= 10 and bytes(view[:3]) == b"ID3":
+        size = (view[6] << 21) | (view[7] << 14) | (view[8] << 7) | view[9]
+        footer = 10 if view[5] & 0x10 else 0
+        start = min(end, 10 + size + footer)
+
+    if end - start >= 128 and bytes(view[end - 128:end - 125]) == b"TAG":
+        end -= 128
+
+    return view[start:end]
+
+
+def skip_info_frame(view: memoryview) -> memoryview:
+    """Descarta o frame Xing/Info inicial, se houver"""
+    length = frame_length(view, 0)
+    if length and length <= len(view):
+        header = bytes(view[:min(length, 64)])
+        if b"Xing" in header or b"Info" in header:
+            return view[length:]
+    return view
+
+
+def concat_mp3(chunks: Iterable[bytes]) -> bytes:
+    """Concatena trechos MP3 no nível de frames, na ordem recebida"""
+    parts = []
+    for chunk in chunks:
+        view = strip_tags(chunk)
+        parts.append(skip_info_frame(view))
+    return b"".join(parts)
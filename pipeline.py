@@ -0,0 +1,266 @@
+# Pipeline em estágios: tradução → síntese
+#
+# Cada (vídeo, idioma) passa por um estágio de tradução e um de síntese,
+# ligados por filas limitadas e com concorrência própria. Assim o TTS de um
+# idioma roda enquanto outro idioma (ou o próximo vídeo) ainda está sendo
+# traduzido, e as métricas por estágio mostram onde está o gargalo.
+
+import itertools
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from retry_policy import Deadline
+
+_STOP = object()
+
+
+class Stage:
+    """Estágio com fila limitada e um grupo de workers"""
+
+    def __init__(self,
+                 name: str,
+                 handler: Callable,
+                 concurrency: int,
+                 queue_size: int,
+                 emit: Callable,
+                 on_done: Optional[Callable] = None,
+                 on_wait: Optional[Callable] = None):
+        self.name = name
+        self.handler = handler
+        self.concurrency = concurrency
+        self.queue: "queue.Queue" = queue.Queue(maxsize=queue_size)
+        self.emit = emit
+        self.on_done = on_done
+        # Recebe (item, segundos na fila), para os histogramas de latência
+        self.on_wait = on_wait
+
+        self._lock = threading.Lock()
+        self._workers: List[threading.Thread] = []
+        self._alive = 0
+        self._started_at = 0.0
+        self._stats = {"processed": 0, "errors": 0, "busy_seconds": 0.0, "wait_seconds": 0.0}
+
+    def start(self):
+        self._started_at = time.monotonic()
+        self._alive = self.concurrency
+        for i in range(self.concurrency):
+            worker = threading.Thread(target=self._run, name=f"{self.name}-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def put(self, item):
+        """Enfileira um item (bloqueia quando a fila está cheia: backpressure)"""
+        self.queue.put((time.monotonic(), item))
+
+    def stop(self):
+        """Sinaliza fim da entrada; os workers encerram após esvaziar a fila"""
+        for _ in range(self.concurrency):
+            self.queue.put((time.monotonic(), _STOP))
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            stats = dict(self._stats)
+        elapsed = max(time.monotonic() - self._started_at, 1e-9) if self._started_at else 0.0
+        stats.update({
+            "concurrency": self.concurrency,
+            "queue_depth": self.queue.qsize(),
+            "queue_capacity": self.queue.maxsize,
+            "utilization": stats["busy_seconds"] / (self.concurrency * elapsed) if elapsed else 0.0,
+            "avg_wait_ms": stats["wait_seconds"] / stats["processed"] * 1000 if stats["processed"] else 0.0
+        })
+        return stats
+
+    def _run(self):
+        while True:
+            enqueued_at, item = self.queue.get()
+            if item is _STOP:
+                break
+
+            started = time.monotonic()
+            try:
+                result = self.handler(item)
+                failed = False
+            except Exception as e:
+                result = e
+                failed = True
+            finished = time.monotonic()
+
+            with self._lock:
+                self._stats["processed"] += 1
+                self._stats["errors"] += failed
+                self._stats["busy_seconds"] += finished - started
+                self._stats["wait_seconds"] += started - enqueued_at
+
+            if self.on_wait is not None:
+                self.on_wait(item, started - enqueued_at)
+            self.emit(item, result)
+
+        with self._lock:
+            self._alive -= 1
+            last = self._alive == 0
+        if last and self.on_done is not None:
+            self.on_done()
+
+
+class TranslateTTSPipeline:
+    """Executa vídeos × idiomas pelos estágios de tradução e síntese"""
+
+    def __init__(self,
+                 processor,
+                 translate_concurrency: int = 4,
+                 synthesize_concurrency: int = 8,
+                 queue_size: int = 32,
+                 max_videos_in_flight: int = 16,
+                 deadline_seconds: Optional[float] = None):
+        self.processor = processor
+        self.translate_concurrency = translate_concurrency
+        self.synthesize_concurrency = synthesize_concurrency
+        self.queue_size = queue_size
+        self.max_videos_in_flight = max_videos_in_flight
+        # Orçamento de tempo de cada vídeo, contado a partir da entrada no pipeline
+        self.deadline_seconds = deadline_seconds
+
+        self.translate_stage: Optional[Stage] = None
+        self.synthesize_stage: Optional[Stage] = None
+        self._lock = threading.Lock()
+        # Estado por número de sequência, não por video_id: um id repetido na
+        # entrada vira outro vídeo em vez de sobrescrever o que está em andamento
+        self._videos: Dict[int, Dict] = {}
+        self._sequence = itertools.count()
+        self._completed = 0
+
+    def run(self,
+            videos: Iterable[Tuple],
+            target_languages: List[str],
+            provider: str = "google_cloud") -> Iterator[Dict]:
+        """Processa (video_id, texto) e entrega os resultados à medida que cada vídeo termina
+
+        Um item pode trazer a própria lista de idiomas: (video_id, texto, idiomas).
+        """
+        output: "queue.Queue" = queue.Queue()
+        in_flight = threading.Semaphore(self.max_videos_in_flight)
+        feeder_error: List[BaseException] = []
+        metrics = self.processor.metrics
+
+        def after_translate(unit, state):
+            if isinstance(state, Exception):
+                finish_language(unit, self.processor._error_result(unit[1], state))
+            elif not state["success"]:
+                finish_language(unit, state)
+            else:
+                self.synthesize_stage.put((unit, state))
+
+        def after_synthesize(item, lang_result):
+            unit, state = item
+            if isinstance(lang_result, Exception):
+                lang_result = self.processor._error_result(unit[1], lang_result, state["start_time"])
+            finish_language(unit, lang_result)
+
+        def finish_language(unit, lang_result):
+            seq, lang = unit
+            with self._lock:
+                video = self._videos[seq]
+                video["results"][lang] = lang_result
+                done = len(video["results"]) == len(video["languages"])
+                if done:
+                    del self._videos[seq]
+                    self._completed += 1
+            if done:
+                summary = self.processor._summarize_video(
+                    video["text"], provider,
+                    [video["results"][lang] for lang in video["languages"]],
+                    video["start_time"]
+                )
+                summary["video_id"] = video["video_id"]
+                output.put(summary)
+
+        self.translate_stage = Stage(
+            "translate",
+            lambda unit: self._translate(*unit),
+            self.translate_concurrency, self.queue_size,
+            emit=after_translate,
+            on_done=lambda: self.synthesize_stage.stop(),
+            on_wait=lambda unit, wait: metrics.observe_stage("queue_translate", wait, provider, unit[1])
+        )
+        self.synthesize_stage = Stage(
+            "synthesize",
+            lambda item: self.processor._synthesize_stage(item[1], provider),
+            self.synthesize_concurrency, self.queue_size,
+            emit=after_synthesize,
+            on_done=lambda: output.put(_STOP),
+            on_wait=lambda item, wait: metrics.observe_stage("queue_synthesize", wait, provider, item[0][1])
+        )
+        self.synthesize_stage.start()
+        self.translate_stage.start()
+
+        def feed():
+            try:
+                for video in videos:
+                    video_id, text = video[0], video[1]
+                    # Idiomas repetidos nunca completariam o vídeo (resultados são por idioma)
+                    languages = list(dict.fromkeys(video[2] if len(video) > 2 else target_languages))
+                    in_flight.acquire()
+                    seq = next(self._sequence)
+                    with self._lock:
+                        self._videos[seq] = {
+                            "video_id": video_id,
+                            "text": text,
+                            "languages": languages,
+                            "results": {},
+                            "start_time": time.time(),
+                            "deadline": Deadline(self.deadline_seconds)
+                        }
+                    if not languages:
+                        finish_language_empty(seq)
+                    for lang in languages:
+                        self.translate_stage.put((seq, lang))
+            except BaseException as e:
+                feeder_error.append(e)
+            finally:
+                self.translate_stage.stop()
+
+        def finish_language_empty(seq):
+            with self._lock:
+                video = self._videos.pop(seq)
+                self._completed += 1
+            summary = self.processor._summarize_video(video["text"], provider, [], video["start_time"])
+            summary["video_id"] = video["video_id"]
+            output.put(summary)
+
+        feeder = threading.Thread(target=feed, name="pipeline-feeder", daemon=True)
+        feeder.start()
+
+        while True:
+            item = output.get()
+            if item is _STOP:
+                break
+            # A vaga só é liberada quando o consumidor recebe o resultado,
+            # mantendo a memória limitada mesmo com um consumidor lento
+            in_flight.release()
+            yield item
+
+        feeder.join()
+        if feeder_error:
+            raise feeder_error[0]
+
+    def metrics(self) -> Dict:
+        """Profundidade de fila e utilização por estágio"""
+        with self._lock:
+            videos_in_flight = len(self._videos)
+            completed = self._completed
+        return {
+            "videos_in_flight": videos_in_flight,
+            "videos_completed": completed,
+            "stages": {
+                stage.name: stage.metrics()
+                for stage in (self.translate_stage, self.synthesize_stage)
+                if stage is not None
+            }
+        }
+
+    def _translate(self, seq: int, lang: str) -> Dict:
+        with self._lock:
+            video = self._videos[seq]
+        return self.processor._translate_stage(video["text"], lang, video["deadline"])
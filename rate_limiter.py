@@ -0,0 +1,366 @@
+# Limitador de taxa por provedor e endpoint
+#
+# Token bucket com duas dimensões (requisições e caracteres por minuto),
+# compartilhado entre threads e, com o estado em SQLite, entre processos do
+# mesmo host. As chamadas esperam pela cota antes de ir à rede, então a
+# vazão fica no teto da cota em vez de estourá-la com 429. Com SQLite, cada
+# processo reserva um lote curto de cota (lease) e atende as chamadas em
+# memória; o arquivo só é consultado quando o lote acaba ou expira.
+
+import email.utils
+import json
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from translation_cache import DEFAULT_CACHE_DIR
+
+
+@dataclass
+class Quota:
+    """Cota por minuto de um endpoint (0 = sem limite naquela dimensão)"""
+    requests_per_minute: float = 0
+    chars_per_minute: float = 0
+    # Rajada permitida, em segundos de cota acumulada
+    burst_seconds: float = 10
+
+
+# Limites padrão conservadores; ajuste com RATE_LIMITS (JSON) conforme o projeto
+DEFAULT_QUOTAS = {
+    "google_cloud:translate": Quota(requests_per_minute=3000, chars_per_minute=600_000),
+    "google_cloud:tts": Quota(requests_per_minute=1000, chars_per_minute=150_000),
+    "elevenlabs:tts": Quota(requests_per_minute=120),
+}
+
+# Penalidade após um 429 sem Retry-After
+DEFAULT_PENALTY_SECONDS = 5.0
+
+# Segundos de cota reservados de uma vez do SQLite (e validade da reserva)
+DEFAULT_LEASE_SECONDS = 1.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Converte o cabeçalho Retry-After (segundos ou data HTTP) em segundos"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(when.timestamp() - time.time(), 0.0)
+
+
+def _take(state: Tuple[float, float, float, float],
+          quota: Quota,
+          now: float,
+          requests: float,
+          chars: float) -> Tuple[Tuple[float, float, float, float], float]:
+    """Reabastece o bucket e tenta consumir; retorna (novo estado, espera necessária)
+
+    Estado: (requisições disponíveis, caracteres disponíveis, atualizado_em, bloqueado_até).
+    """
+    available_requests, available_chars, updated_at, blocked_until = state
+    elapsed = max(now - updated_at, 0.0)
+
+    request_rate = quota.requests_per_minute / 60
+    char_rate = quota.chars_per_minute / 60
+    request_capacity = max(request_rate * quota.burst_seconds, 1.0)
+    char_capacity = max(char_rate * quota.burst_seconds, 1.0)
+
+    available_requests = min(request_capacity, available_requests + elapsed * request_rate)
+    available_chars = min(char_capacity, available_chars + elapsed * char_rate)
+
+    wait = max(blocked_until - now, 0.0)
+    # Uma requisição maior que a rajada passa com o bucket cheio e deixa saldo negativo
+    if request_rate:
+        needed = min(requests, request_capacity)
+        wait = max(wait, (needed - available_requests) / request_rate)
+    if char_rate:
+        needed = min(chars, char_capacity)
+        wait = max(wait, (needed - available_chars) / char_rate)
+
+    if wait <= 0:
+        if request_rate:
+            available_requests -= requests
+        if char_rate:
+            available_chars -= chars
+        wait = 0.0
+
+    return (available_requests, available_chars, now, blocked_until), wait
+
+
+def _credit(state: Tuple[float, float, float, float],
+            quota: Quota,
+            requests: float,
+            chars: float) -> Tuple[float, float, float, float]:
+    """Devolve ao bucket cota reservada e não usada, sem passar da capacidade"""
+    available_requests, available_chars, updated_at, blocked_until = state
+    request_capacity = max(quota.requests_per_minute / 60 * quota.burst_seconds, 1.0)
+    char_capacity = max(quota.chars_per_minute / 60 * quota.burst_seconds, 1.0)
+    return (
+        min(request_capacity, available_requests + requests),
+        min(char_capacity, available_chars + chars),
+        updated_at,
+        blocked_until
+    )
+
+
+@dataclass
+class _Lease:
+    """Cota já retirada do SQLite e ainda não usada pelo processo"""
+    requests: float = 0.0
+    chars: float = 0.0
+    expires: float = 0.0
+
+
+class RateLimiter:
+    """Token buckets por chave "provedor:endpoint" (em memória ou em SQLite)"""
+
+    def __init__(self,
+                 quotas: Optional[Dict[str, Quota]] = None,
+                 db_path: Optional[str] = None,
+                 max_sleep: float = 1.0,
+                 lease_seconds: float = DEFAULT_LEASE_SECONDS):
+        self.quotas = dict(DEFAULT_QUOTAS if quotas is None else quotas)
+        self.db_path = db_path
+        self.max_sleep = max_sleep
+        # Quanto de cota (em segundos de vazão) cada ida ao SQLite reserva; a
+        # reserva expira nesse prazo para respeitar 429 vistos por outros processos.
+        # 0 consulta o SQLite em toda chamada
+        self.lease_seconds = lease_seconds
+
+        # Protege só o estado em memória; nunca é mantido durante uma transação
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float, float, float]] = {}
+        self._leases: Dict[str, _Lease] = {}
+        self._stats: Dict[str, Dict] = {}
+
+        # Uma conexão por thread: as transações de threads diferentes não
+        # disputam o mesmo objeto de conexão
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        if db_path:
+            os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+            conn = self._connection()
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS buckets (
+                    key TEXT PRIMARY KEY,
+                    requests REAL NOT NULL,
+                    chars REAL NOT NULL,
+                    updated_at REAL NOT NULL,
+                    blocked_until REAL NOT NULL
+                )
+            """)
+
+    def acquire(self, key: str, requests: float = 1, chars: float = 0, timeout: Optional[float] = None) -> float:
+        """Bloqueia até haver cota para a chamada; retorna o tempo esperado
+
+        Levanta TimeoutError se a espera necessária passar de timeout.
+        """
+        quota = self.quotas.get(key)
+        if quota is None:
+            return 0.0
+
+        waited = 0.0
+        while True:
+            wait = self._try_take(key, quota, requests, chars)
+            if wait <= 0:
+                break
+            if timeout is not None and waited + wait > timeout:
+                raise TimeoutError(f"cota de {key} indisponível dentro do deadline ({wait:.1f}s)")
+            sleep = min(wait, self.max_sleep)
+            time.sleep(sleep)
+            waited += sleep
+
+        with self._stats_lock:
+            stats = self._key_stats(key)
+            stats["acquired"] += 1
+            stats["chars"] += chars
+            if waited:
+                stats["waits"] += 1
+                stats["wait_seconds"] += waited
+        return waited
+
+    def penalize(self, key: str, retry_after: Optional[float] = None):
+        """Registra um 429: esvazia o bucket e bloqueia a chave até o Retry-After"""
+        quota = self.quotas.get(key)
+        if quota is None:
+            return
+        # A reserva local é descartada junto com o bucket
+        self._drain_lease(key)
+        blocked_until = time.time() + (DEFAULT_PENALTY_SECONDS if retry_after is None else retry_after)
+
+        def penalized(state):
+            _, _, updated_at, current_block = state
+            return (0.0, 0.0, updated_at, max(current_block, blocked_until))
+
+        self._update_state(key, quota, penalized)
+        with self._stats_lock:
+            self._key_stats(key)["throttled"] += 1
+
+    def stats(self) -> Dict[str, Dict]:
+        """Contadores por chave: chamadas liberadas, esperas e 429 recebidos"""
+        with self._stats_lock:
+            return {key: dict(stats) for key, stats in self._stats.items()}
+
+    def close(self):
+        """Devolve ao SQLite a cota reservada e não usada e fecha as conexões"""
+        if not self.db_path:
+            return
+        for key in list(self._leases):
+            quota = self.quotas.get(key)
+            requests, chars = self._drain_lease(key)
+            if quota is not None and (requests or chars):
+                self._update_state(key, quota, lambda state, q=quota, r=requests, c=chars: _credit(state, q, r, c))
+        with self._lock:
+            connections, self._connections = self._connections, []
+        for conn in connections:
+            conn.close()
+
+    def _key_stats(self, key: str) -> Dict:
+        if key not in self._stats:
+            self._stats[key] = {"acquired": 0, "chars": 0, "waits": 0, "wait_seconds": 0.0, "throttled": 0,
+                                "syncs": 0}
+        return self._stats[key]
+
+    def _try_take(self, key: str, quota: Quota, requests: float, chars: float) -> float:
+        if self.db_path and self._take_from_lease(key, quota, requests, chars):
+            return 0.0
+
+        # Lote esgotado ou vencido: a sobra volta ao bucket na mesma transação
+        # que reserva o próximo
+        leftover_requests, leftover_chars = self._drain_lease(key)
+        request_rate = quota.requests_per_minute / 60
+        char_rate = quota.chars_per_minute / 60
+        result = {"extra_requests": 0.0, "extra_chars": 0.0}
+
+        def take(state):
+            now = time.time()
+            state = _credit(state, quota, leftover_requests, leftover_chars)
+            new_state, result["wait"] = _take(state, quota, now, requests, chars)
+            if result["wait"] > 0 or not self.db_path:
+                return new_state
+            available_requests, available_chars, updated_at, blocked_until = new_state
+            if request_rate:
+                result["extra_requests"] = min(max(available_requests, 0.0), request_rate * self.lease_seconds)
+            if char_rate:
+                result["extra_chars"] = min(max(available_chars, 0.0), char_rate * self.lease_seconds)
+            return (available_requests - result["extra_requests"], available_chars - result["extra_chars"],
+                    updated_at, blocked_until)
+
+        self._update_state(key, quota, take)
+        if self.db_path:
+            with self._stats_lock:
+                self._key_stats(key)["syncs"] += 1
+        if result["extra_requests"] or result["extra_chars"]:
+            with self._lock:
+                lease = self._leases.setdefault(key, _Lease())
+                lease.requests += result["extra_requests"]
+                lease.chars += result["extra_chars"]
+                lease.expires = max(lease.expires, time.time() + self.lease_seconds)
+        return result["wait"]
+
+    def _take_from_lease(self, key: str, quota: Quota, requests: float, chars: float) -> bool:
+        """Consome da reserva local, se ela ainda vale e cobre a chamada"""
+        with self._lock:
+            lease = self._leases.get(key)
+            if lease is None or lease.expires <= time.time():
+                return False
+            if quota.requests_per_minute and lease.requests < requests:
+                return False
+            if quota.chars_per_minute and lease.chars < chars:
+                return False
+            if quota.requests_per_minute:
+                lease.requests -= requests
+            if quota.chars_per_minute:
+                lease.chars -= chars
+            return True
+
+    def _drain_lease(self, key: str) -> Tuple[float, float]:
+        """Remove a reserva local da chave; retorna a sobra (requisições, caracteres)"""
+        with self._lock:
+            lease = self._leases.pop(key, None)
+        if lease is None:
+            return 0.0, 0.0
+        return lease.requests, lease.chars
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _update_state(self, key: str, quota: Quota, update):
+        """Lê, transforma e grava o estado do bucket de forma atômica"""
+        if not self.db_path:
+            with self._lock:
+                state = self._buckets.get(key) or self._full_state(quota)
+                self._buckets[key] = update(state)
+            return
+
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT requests, chars, updated_at, blocked_until FROM buckets WHERE key = ?",
+                (key,)
+            ).fetchone()
+            state = update(tuple(row) if row else self._full_state(quota))
+            conn.execute(
+                "INSERT OR REPLACE INTO buckets (key, requests, chars, updated_at, blocked_until) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (key, *state)
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _full_state(quota: Quota) -> Tuple[float, float, float, float]:
+        return (
+            max(quota.requests_per_minute / 60 * quota.burst_seconds, 1.0),
+            max(quota.chars_per_minute / 60 * quota.burst_seconds, 1.0),
+            time.time(),
+            0.0
+        )
+
+
+def load_quotas(overrides: Optional[str] = None) -> Dict[str, Quota]:
+    """Cotas padrão com os ajustes em JSON de RATE_LIMITS"""
+    quotas = dict(DEFAULT_QUOTAS)
+    overrides = overrides if overrides is not None else os.environ.get("RATE_LIMITS")
+    if overrides:
+        for key, values in json.loads(overrides).items():
+            quotas[key] = Quota(**values)
+    return quotas
+
+
+_default_limiter: Optional[RateLimiter] = None
+_default_lock = threading.Lock()
+
+
+def get_default_rate_limiter() -> RateLimiter:
+    """Limitador compartilhado do processo, com estado em SQLite visível a outros processos"""
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter(
+                load_quotas(),
+                db_path=os.environ.get("RATE_LIMIT_DB", os.path.join(DEFAULT_CACHE_DIR, "rate_limits.sqlite3"))
+            )
+        return _default_limiter
@@ -0,0 +1,159 @@
+# Política de retentativa das chamadas aos provedores
+#
+# Classifica as falhas (timeouts, erros de conexão, 408/429/5xx são
+# transitórios; o resto não), espera com backoff exponencial e jitter,
+# respeita o Retry-After e nunca ultrapassa o orçamento de tempo (deadline)
+# do vídeo. Quando as tentativas acabam, a falha é propagada: não há
+# resultado simulado no lugar da resposta real.
+
+import random
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import requests
+
+from rate_limiter import parse_retry_after
+
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+RETRYABLE_EXCEPTIONS = (requests.ConnectionError, requests.Timeout)
+
+
+class DeadlineExceeded(TimeoutError):
+    """O orçamento de tempo do vídeo acabou"""
+
+
+class ProviderError(Exception):
+    """Resposta de erro do provedor"""
+
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None):
+        super().__init__(f"{status_code} - {message}")
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+    @property
+    def retryable(self) -> bool:
+        return self.status_code in RETRYABLE_STATUS
+
+
+class Deadline:
+    """Orçamento de tempo de um vídeo, repassado a cada chamada"""
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds if seconds else None
+
+    def remaining(self) -> Optional[float]:
+        """Segundos restantes (None = sem limite)"""
+        if self.expires_at is None:
+            return None
+        return max(self.expires_at - time.monotonic(), 0.0)
+
+    def expired(self) -> bool:
+        return self.expires_at is not None and time.monotonic() >= self.expires_at
+
+    def timeout(self, default: Tuple[float, float]) -> Tuple[float, float]:
+        """Timeout (conexão, leitura) da requisição limitado ao tempo restante"""
+        remaining = self.remaining()
+        if remaining is None:
+            return default
+        remaining = max(remaining, 0.001)
+        return min(default[0], remaining), min(default[1], remaining)
+
+    @staticmethod
+    def latest(deadlines) -> "Deadline":
+        """O prazo mais folgado entre vários (usado por requisições compartilhadas)"""
+        deadlines = list(deadlines)
+        if not deadlines or any(d is None or d.expires_at is None for d in deadlines):
+            return Deadline()
+        latest = Deadline()
+        latest.expires_at = max(d.expires_at for d in deadlines)
+        return latest
+
+
+class RetryPolicy:
+    """Backoff exponencial com jitter total, Retry-After e limite por deadline"""
+
+    def __init__(self,
+                 max_attempts: int = 4,
+                 base_delay: float = 0.5,
+                 max_delay: float = 20.0,
+                 rng: Optional[random.Random] = None):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "backoff_time": 0.0, "failures": 0, "deadline_exceeded": 0}
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """Espera antes da tentativa attempt + 1 (0 = primeira retentativa)"""
+        with self._lock:
+            delay = self._rng.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        if retry_after is not None:
+            # O servidor disse quando voltar; o jitter só espalha quem volta junto
+            delay = retry_after + delay * 0.1
+        return delay
+
+    def execute(self,
+                send: Callable[[Optional[Deadline]], requests.Response],
+                deadline: Optional[Deadline] = None,
+                stats: Optional[Dict] = None) -> requests.Response:
+        """Chama send(deadline) até obter 2xx, esgotar as tentativas ou o deadline
+
+        stats recebe "retries" e "backoff_time" desta chamada.
+        """
+        if stats is None:
+            stats = {}
+        stats.setdefault("retries", 0)
+        stats.setdefault("backoff_time", 0.0)
+        self._count("calls")
+
+        attempt = 0
+        while True:
+            if deadline is not None and deadline.expired():
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded("deadline do vídeo esgotado")
+
+            try:
+                response = send(deadline)
+                if 200 <= response.status_code < 300:
+                    return response
+                error = ProviderError(
+                    response.status_code,
+                    response.text[:500],
+                    parse_retry_after(response.headers.get("Retry-After"))
+                )
+                retryable, retry_after = error.retryable, error.retry_after
+            except RETRYABLE_EXCEPTIONS as e:
+                error, retryable, retry_after = e, True, None
+            except TimeoutError as e:
+                # Espera pela cota maior que o tempo restante
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded(str(e) or "deadline do vídeo esgotado") from e
+
+            attempt += 1
+            if not retryable or attempt >= self.max_attempts:
+                self._count("failures")
+                raise error
+
+            delay = self.backoff(attempt - 1, retry_after)
+            remaining = deadline.remaining() if deadline is not None else None
+            if remaining is not None and delay >= remaining:
+                self._count("deadline_exceeded")
+                raise DeadlineExceeded(f"deadline esgotado antes da retentativa ({error})") from error
+
+            time.sleep(delay)
+            stats["retries"] += 1
+            stats["backoff_time"] += delay
+            with self._lock:
+                self._stats["retries"] += 1
+                self._stats["backoff_time"] += delay
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return dict(self._stats)
+
+    def _count(self, name: str):
+        with self._lock:
+            self._stats[name] += 1
@@ -2,528 +2,202 @@
 # Esta é uma cópia do app.py otimizada para deploy no Streamlit Cloud
 
 import streamlit as st
-import requests
-import json
-import base64
-import time
-import io
-import os
-from datetime import datetime
-from typing import Dict, List, Optional, Tuple
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from dataclasses import dataclass
+import logging
+from typing import Dict, Optional, Tuple
 
-# Configuração da página
-st.set_page_config(
-    page_title="Sistema de Geração de Vídeos - Migração Real",
-    page_icon="🎬",
-    layout="wide"
-)
+from hedging import get_default_hedger
+from metrics import get_default_metrics
+from translation_cache import get_default_translation_cache
+from video_core import CostAnalyzer, ProviderConfig, VideoGenerationConfig, VideoProcessor
 
-@dataclass
-class VideoGenerationConfig:
-    """Configurações do sistema de geração de vídeos"""
-    videos_per_day: int = 200
-    languages: List[str] = None
-    avg_chars_per_video: int = 1000
-    current_provider: str = "elevenlabs"
-    target_provider: str = "google_cloud"
+class _StreamlitErrorHandler(logging.Handler):
+    """Exibe na página os erros registrados pelos serviços do núcleo"""
     
-    def __post_init__(self):
-        if self.languages is None:
-            self.languages = ["en", "es", "fr"]
+    def emit(self, record):
+        st.error(record.getMessage())
 
-class GoogleCloudService:
-    """Serviço real do Google Cloud TTS + Translate"""
-    
-    def __init__(self):
-        # Obter credenciais do Streamlit Secrets (configurado em Settings > Secrets)
-        try:
-            self.project_id = st.secrets["GOOGLE_CLOUD_PROJECT"] if "GOOGLE_CLOUD_PROJECT" in st.secrets else "demo-project"
-            self.api_key = st.secrets["GOOGLE_CLOUD_API_KEY"] if "GOOGLE_CLOUD_API_KEY" in st.secrets else None
-            self.service_account_info = st.secrets["GOOGLE_APPLICATION_CREDENTIALS"] if "GOOGLE_APPLICATION_CREDENTIALS" in st.secrets else None
-        except Exception:
-            # Fallback para modo demo se secrets não estão configurados
-            self.project_id = "demo-project"
-            self.api_key = None
-            self.service_account_info = None
-        
-        # URLs das APIs
-        self.tts_url = "https://texttospeech.googleapis.com/v1/text:synthesize"
-        self.translate_url = "https://translation.googleapis.com/language/translate/v2"
-        
-        # Cache para tokens de acesso
-        self._access_token = None
-        self._token_expires = 0
-    
-    def _get_access_token(self) -> str:
-        """Obtém token de acesso usando Service Account"""
-        if self.service_account_info:
-            try:
-                # Importar biblioteca JWT
-                try:
-                    import jwt
-                except ImportError:
-                    st.error("PyJWT não instalado. Usando fallback para API Key.")
-                    return self.api_key
-                
-                # Parse das credenciais JSON
-                if isinstance(self.service_account_info, str):
-                    creds = json.loads(self.service_account_info)
-                else:
-                    creds = self.service_account_info
-                
-                # Criar JWT para autenticação
-                now = int(time.time())
-                payload = {
-                    "iss": creds["client_email"],
-                    "scope": "https://www.googleapis.com/auth/cloud-platform",
-                    "aud": "https://oauth2.googleapis.com/token",
-                    "iat": now,
-                    "exp": now + 3600
-                }
-                
-                # Assinar JWT
-                token = jwt.encode(payload, creds["private_key"], algorithm="RS256")
-                
-                # Trocar JWT por access token
-                response = requests.post(
-                    "https://oauth2.googleapis.com/token",
-                    data={
-                        "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
-                        "assertion": token
-                    },
-                    timeout=30
-                )
-                
-                if response.status_code == 200:
-                    return response.json()["access_token"]
-                else:
-                    st.error(f"Erro na autenticação OAuth: {response.status_code}")
-                    
-            except Exception as e:
-                st.error(f"Erro na autenticação: {e}")
-        
-        # Fallback para API Key se disponível
-        return self.api_key
-    
-    def translate_text(self, text: str, target_language: str, source_language: str = "pt") -> Dict:
-        """Traduz texto usando Google Cloud Translation"""
-        
-        # Verificar se tem credenciais
-        if not self.api_key and not self.service_account_info:
-            # Modo simulação se não tem credenciais
-            return self._simulate_translation(text, target_language)
-        
-        try:
-            headers = {}
-            params = {}
-            
-            # Configurar autenticação
-            if self.service_account_info:
-                token = self._get_access_token()
-                if token:
-                    headers["Authorization"] = f"Bearer {token}"
-            elif self.api_key:
-                params["key"] = self.api_key
-            
-            # Fazer chamada para API
-            payload = {
-                "q": text,
-                "target": target_language,
-                "source": source_language,
-                "format": "text"
-            }
-            
-            response = requests.post(
-                self.translate_url,
-                headers=headers,
-                params=params,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                translated_text = result["data"]["translations"][0]["translatedText"]
-                
-                return {
-                    "success": True,
-                    "translated_text": translated_text,
-                    "source_language": source_language,
-                    "target_language": target_language,
-                    "confidence": 0.98,
-                    "characters": len(text),
-                    "cost_estimate": self._calculate_translate_cost(len(text))
-                }
-            else:
-                st.error(f"Erro na tradução: {response.status_code} - {response.text}")
-                return self._simulate_translation(text, target_language)
-                
-        except Exception as e:
-            st.error(f"Erro na chamada de tradução: {e}")
-            return self._simulate_translation(text, target_language)
-    
-    def synthesize_speech(self, text: str, language_code: str = "pt-BR") -> Dict:
-        """Sintetiza fala usando Google Cloud TTS"""
-        
-        # Verificar se tem credenciais
-        if not self.api_key and not self.service_account_info:
-            # Modo simulação se não tem credenciais
-            return self._simulate_tts(text, language_code)
-        
-        try:
-            headers = {"Content-Type": "application/json"}
-            params = {}
-            
-            # Configurar autenticação
-            if self.service_account_info:
-                token = self._get_access_token()
-                if token:
-                    headers["Authorization"] = f"Bearer {token}"
-            elif self.api_key:
-                params["key"] = self.api_key
-            
-            # Configurar voz baseada no idioma
-            voice_name = self._get_voice_name(language_code)
-            
-            payload = {
-                "input": {"text": text},
-                "voice": {
-                    "languageCode": language_code,
-                    "name": voice_name,
-                    "ssmlGender": "NEUTRAL"
-                },
-                "audioConfig": {
-                    "audioEncoding": "MP3",
-                    "speakingRate": 1.0,
-                    "pitch": 0.0
-                }
-            }
-            
-            response = requests.post(
-                self.tts_url,
-                headers=headers,
-                params=params,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                result = response.json()
-                audio_content = result["audioContent"]
-                
-                return {
-                    "success": True,
-                    "audio_content": audio_content,
-                    "duration_seconds": len(text) * 0.05,  # Estimativa
-                    "characters_processed": len(text),
-                    "language": language_code,
-                    "voice": voice_name,
-                    "cost_estimate": self._calculate_tts_cost(len(text))
-                }
-            else:
-                st.error(f"Erro no TTS: {response.status_code} - {response.text}")
-                return self._simulate_tts(text, language_code)
-                
-        except Exception as e:
-            st.error(f"Erro na chamada de TTS: {e}")
-            return self._simulate_tts(text, language_code)
-    
-    def _get_voice_name(self, language_code: str) -> str:
-        """Obtém nome da voz baseado no idioma"""
-        voice_map = {
-            "pt-BR": "pt-BR-Standard-A",
-            "en-US": "en-US-Standard-C",
-            "es-ES": "es-ES-Standard-A",
-            "fr-FR": "fr-FR-Standard-A",
-            "de-DE": "de-DE-Standard-A",
-            "it-IT": "it-IT-Standard-A"
-        }
-        return voice_map.get(language_code, f"{language_code}-Standard-A")
-    
-    def _calculate_translate_cost(self, characters: int) -> float:
-        """Calcula custo da tradução (Google Translate)"""
-        # Preço: $20 por milhão de caracteres
-        return (characters / 1_000_000) * 20 * 5.2  # Conversão para BRL
-    
-    def _calculate_tts_cost(self, characters: int) -> float:
-        """Calcula custo do TTS (Google Cloud TTS)"""
-        # Preço: $4 por milhão de caracteres
-        return (characters / 1_000_000) * 4 * 5.2  # Conversão para BRL
-    
-    def _simulate_translation(self, text: str, target_language: str) -> Dict:
-        """Simula tradução quando não há credenciais"""
-        translations = {
-            "en": f"[EN] {text}",
-            "es": f"[ES] {text}",
-            "fr": f"[FR] {text}",
-            "de": f"[DE] {text}",
-            "it": f"[IT] {text}"
-        }
-        
-        return {
-            "success": True,
-            "translated_text": translations.get(target_language, f"[{target_language.upper()}] {text}"),
-            "source_language": "pt",
-            "target_language": target_language,
-            "confidence": 0.95,
-            "characters": len(text),
-            "cost_estimate": self._calculate_translate_cost(len(text)),
-            "simulated": True
-        }
-    
-    def _simulate_tts(self, text: str, language_code: str) -> Dict:
-        """Simula TTS quando não há credenciais"""
-        # Criar áudio dummy em base64
-        dummy_audio = f"AUDIO_DATA_FOR_{language_code}_{len(text)}_CHARS"
-        audio_b64 = base64.b64encode(dummy_audio.encode()).decode()
-        
-        return {
-            "success": True,
-            "audio_content": audio_b64,
-            "duration_seconds": len(text) * 0.05,
-            "characters_processed": len(text),
-            "language": language_code,
-            "voice": self._get_voice_name(language_code),
-            "cost_estimate": self._calculate_tts_cost(len(text)),
-            "simulated": True
-        }
+if not any(isinstance(h, _StreamlitErrorHandler) for h in logging.getLogger("video_core").handlers):
+    logging.getLogger("video_core").addHandler(_StreamlitErrorHandler(level=logging.ERROR))
 
-class ElevenLabsService:
-    """Serviço do ElevenLabs para comparação"""
-    
-    def __init__(self):
-        try:
-            self.api_key = st.secrets["ELEVENLABS_API_KEY"] if "ELEVENLABS_API_KEY" in st.secrets else None
-        except Exception:
-            self.api_key = None
-        self.base_url = "https://api.elevenlabs.io/v1"
-    
-    def synthesize_speech(self, text: str, voice_id: str = "21m00Tcm4TlvDq8ikWAM") -> Dict:
-        """Sintetiza fala usando ElevenLabs"""
-        
-        if not self.api_key:
-            return self._simulate_elevenlabs_tts(text)
-        
-        try:
-            headers = {
-                "xi-api-key": self.api_key,
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "text": text,
-                "model_id": "eleven_multilingual_v2",
-                "voice_settings": {
-                    "stability": 0.5,
-                    "similarity_boost": 0.75
-                }
-            }
-            
-            response = requests.post(
-                f"{self.base_url}/text-to-speech/{voice_id}",
-                headers=headers,
-                json=payload,
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                audio_content = base64.b64encode(response.content).decode()
-                
-                return {
-                    "success": True,
-                    "audio_content": audio_content,
-                    "duration_seconds": len(text) * 0.06,
-                    "characters_processed": len(text),
-                    "voice_id": voice_id,
-                    "cost_estimate": self._calculate_elevenlabs_cost(len(text))
-                }
-            else:
-                return self._simulate_elevenlabs_tts(text)
-                
-        except Exception as e:
-            st.error(f"Erro no ElevenLabs: {e}")
-            return self._simulate_elevenlabs_tts(text)
-    
-    def _calculate_elevenlabs_cost(self, characters: int) -> float:
-        """Calcula custo do ElevenLabs"""
-        # Preço: $0.30 por 1000 caracteres (plano Creator)
-        return (characters / 1000) * 0.30 * 5.2  # Conversão para BRL
-    
-    def _simulate_elevenlabs_tts(self, text: str) -> Dict:
-        """Simula ElevenLabs quando não há credenciais"""
-        dummy_audio = f"ELEVENLABS_AUDIO_{len(text)}_CHARS"
-        audio_b64 = base64.b64encode(dummy_audio.encode()).decode()
-        
-        return {
-            "success": True,
-            "audio_content": audio_b64,
-            "duration_seconds": len(text) * 0.06,
-            "characters_processed": len(text),
-            "voice_id": "demo_voice",
-            "cost_estimate": self._calculate_elevenlabs_cost(len(text)),
-            "simulated": True
-        }
+# Recursos do processo: sobrevivem às reexecuções do script e são
+# compartilhados entre sessões (conexões, tokens OAuth e pools de threads)
+@st.cache_resource(show_spinner=False)
+def get_provider_config() -> ProviderConfig:
+    """Credenciais lidas uma única vez por processo"""
+    return ProviderConfig.from_env()
 
-class CostAnalyzer:
-    """Analisador de custos para diferentes provedores"""
-    
-    def __init__(self):
-        self.providers = {
-            "elevenlabs": {
-                "name": "ElevenLabs + OpenAI Translate",
-                "tts_cost_per_char": 0.30 / 1000 * 5.2,  # R$ por caractere
-                "translate_cost_per_char": 120 / (30 * 200 * 3 * 1000) * 5.2,  # Estimativa
-                "quality_score": 95,
-                "latency_ms": 2000
-            },
-            "google_cloud": {
-                "name": "Google Cloud TTS + Translate",
-                "tts_cost_per_char": 4 / 1_000_000 * 5.2,  # $4 por milhão de chars
-                "translate_cost_per_char": 20 / 1_000_000 * 5.2,  # $20 por milhão de chars
-                "quality_score": 80,
-                "latency_ms": 800
-            },
-            "openai": {
-                "name": "OpenAI TTS + Translate",
-                "tts_cost_per_char": 15 / 1_000_000 * 5.2,  # $15 por milhão de chars
-                "translate_cost_per_char": 120 / (30 * 200 * 3 * 1000) * 5.2,  # Estimativa
-                "quality_score": 85,
-                "latency_ms": 1500
-            }
+@st.cache_resource(show_spinner=False)
+def get_processor(hedge_enabled: bool = False) -> VideoProcessor:
+    """Um VideoProcessor (e seus serviços) por configuração de hedging"""
+    return VideoProcessor(hedger=get_default_hedger() if hedge_enabled else None,
+                          config=get_provider_config())
+
+@st.cache_resource(show_spinner=False)
+def get_cost_analyzer() -> CostAnalyzer:
+    return CostAnalyzer()
+
+# Cálculos e gráficos memoizados pelos parâmetros: mover um slider para um
+# valor já visto só reaproveita o resultado
+@st.cache_data(show_spinner=False, max_entries=256)
+def monthly_costs(videos_per_day: int,
+                  languages: Tuple[str, ...],
+                  avg_chars: int,
+                  translation_cache_hit_ratio: float,
+                  hedge_rate: float) -> Dict:
+    config = VideoGenerationConfig(
+        videos_per_day=videos_per_day,
+        languages=list(languages),
+        avg_chars_per_video=avg_chars,
+        translation_cache_hit_ratio=translation_cache_hit_ratio,
+        hedge_rate=hedge_rate
+    )
+    return get_cost_analyzer().calculate_monthly_costs(config)
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def cost_comparison(cost_results: Dict):
+    """Tabela e gráfico de barras da comparação entre provedores"""
+    import pandas as pd
+    import plotly.express as px
+    
+    df_comparison = pd.DataFrame([
+        {
+            "Provedor": result["name"],
+            "Custo Total": f"R$ {result['total_cost']:,.2f}",
+            "TTS": result["tts_cost"],
+            "Tradução": result["translate_cost"],
+            "Qualidade": result["quality_score"],
+            "Latência (ms)": result["latency_ms"]
         }
+        for result in cost_results.values()
+    ])
+    
+    # Gráfico de barras empilhadas
+    fig = px.bar(
+        df_comparison,
+        x="Provedor",
+        y=["TTS", "Tradução"],
+        title="Breakdown de Custos por Provedor",
+        color_discrete_map={"TTS": "#FF6B6B", "Tradução": "#4ECDC4"}
+    )
+    fig.update_layout(yaxis_title="Custo Mensal (R$)")
+    return df_comparison, fig
+
+# Eixos da grade de cenários (46 × 31 × 5 × 11 ≈ 78 mil combinações)
+SCENARIO_VIDEOS = tuple(range(50, 501, 10))
+SCENARIO_CHARS = tuple(range(500, 2001, 50))
+SCENARIO_LANGUAGES = (1, 2, 3, 4, 5)
+SCENARIO_SHARES = tuple(i / 10 for i in range(11))
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def scenario_grid(translation_cache_hit_ratio: float, hedge_rate: float, migration_cost: float) -> Dict:
+    """Grade completa de cenários (NumPy), calculada uma vez por parâmetro"""
+    import cost_scenarios
+    
+    return cost_scenarios.evaluate_grid(
+        SCENARIO_VIDEOS, SCENARIO_CHARS, SCENARIO_LANGUAGES, SCENARIO_SHARES,
+        translation_cache_hit_ratio=translation_cache_hit_ratio,
+        hedge_rate=hedge_rate,
+        migration_cost=migration_cost
+    )
+
+@st.cache_data(show_spinner=False, max_entries=256)
+def scenario_figures(translation_cache_hit_ratio: float,
+                     hedge_rate: float,
+                     migration_cost: float,
+                     language_count: int,
+                     migrated_share: float,
+                     horizon_months: int,
+                     videos_per_day: int):
+    """Mapa de calor da economia mensal e curvas de break-even da migração"""
+    import plotly.express as px
+    import cost_scenarios
+    
+    grid = cost_scenarios.select(
+        scenario_grid(translation_cache_hit_ratio, hedge_rate, migration_cost),
+        languages=language_count,
+        migrated_share=migrated_share
+    )
+    x, y, savings = cost_scenarios.heatmap(grid, "videos_per_day", "chars_per_video", "savings")
+    fig_heatmap = px.imshow(
+        savings,
+        x=x,
+        y=y,
+        origin="lower",
+        aspect="auto",
+        color_continuous_scale="Viridis",
+        labels={"x": "Vídeos/dia", "y": "Caracteres/vídeo", "color": "Economia (R$/mês)"},
+        title=f"Economia mensal — {language_count} idioma(s), {migrated_share:.0%} migrado"
+    )
     
-    def calculate_monthly_costs(self, config: VideoGenerationConfig) -> Dict:
-        """Calcula custos mensais baseado na configuração"""
-        monthly_videos = config.videos_per_day * 30
-        total_chars = monthly_videos * len(config.languages) * config.avg_chars_per_video
-        
-        results = {}
-        
-        for provider_id, provider_config in self.providers.items():
-            tts_cost = total_chars * provider_config["tts_cost_per_char"]
-            translate_cost = total_chars * provider_config["translate_cost_per_char"]
-            total_cost = tts_cost + translate_cost
-            
-            results[provider_id] = {
-                "name": provider_config["name"],
-                "tts_cost": tts_cost,
-                "translate_cost": translate_cost,
-                "total_cost": total_cost,
-                "cost_per_video": total_cost / monthly_videos,
-                "quality_score": provider_config["quality_score"],
-                "latency_ms": provider_config["latency_ms"]
-            }
-        
-        return results
+    break_even = cost_scenarios.break_even_videos_per_day(
+        SCENARIO_CHARS, SCENARIO_LANGUAGES, migration_cost, horizon_months,
+        translation_cache_hit_ratio=translation_cache_hit_ratio,
+        hedge_rate=hedge_rate
+    )
+    fig_break_even = px.line(
+        cost_scenarios.to_frame(break_even),
+        x="chars_per_video",
+        y="break_even_videos_per_day",
+        color="languages",
+        labels={
+            "chars_per_video": "Caracteres/vídeo",
+            "break_even_videos_per_day": "Vídeos/dia para o payback",
+            "languages": "Idiomas"
+        },
+        title=f"Break-even da migração em {horizon_months} mês(es)"
+    )
+    fig_break_even.add_hline(y=videos_per_day, line_dash="dash", annotation_text="Volume atual")
+    return fig_heatmap, fig_break_even
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def monthly_forecast(results_jsonl: Optional[bytes],
+                     provider: str,
+                     videos_per_day: int,
+                     language_count: int,
+                     avg_chars: int,
+                     concurrency: int):
+    """Monte Carlo do mês (ajustado aos resultados enviados ou às estimativas) e as faixas em gráfico"""
+    import plotly.graph_objects as go
+    import forecasting
+    
+    if results_jsonl:
+        results = forecasting.iter_language_results(results_jsonl.decode("utf-8").splitlines())
+        fit = forecasting.ResultFit.from_results(results, provider)
+    else:
+        fit = forecasting.ResultFit.prior(provider, avg_chars, analyzer=get_cost_analyzer())
+    forecast = forecasting.simulate_month(fit, videos_per_day, language_count, concurrency=concurrency, seed=0)
+    
+    figures = []
+    for key, title, axis_title in (
+        ("cumulative_cost", "Gasto acumulado no mês", "R$"),
+        ("daily_completion_hours", "Tempo para concluir o lote do dia", "Horas")
+    ):
+        low, median, high = forecast[key]
+        fig = go.Figure([
+            go.Scatter(x=forecast["day"], y=high, line={"width": 0}, showlegend=False, hoverinfo="skip"),
+            go.Scatter(x=forecast["day"], y=low, line={"width": 0}, fill="tonexty",
+                       fillcolor="rgba(78, 205, 196, 0.3)", name="p5–p95"),
+            go.Scatter(x=forecast["day"], y=median, line={"color": "#4ECDC4"}, name="p50")
+        ])
+        fig.update_layout(title=title, xaxis_title="Dia", yaxis_title=axis_title)
+        figures.append(fig)
+    return forecast, figures[0], figures[1]
 
-class VideoProcessor:
-    """Processador principal de vídeos multilíngues"""
+def main():
+    # Configuração da página (primeiro comando st da execução)
+    st.set_page_config(
+        page_title="Sistema de Geração de Vídeos - Migração Real",
+        page_icon="🎬",
+        layout="wide"
+    )
     
-    def __init__(self):
-        self.google_service = GoogleCloudService()
-        self.elevenlabs_service = ElevenLabsService()
-        self.cost_analyzer = CostAnalyzer()
+    # pandas e Plotly só são carregados quando o dashboard é renderizado
+    import pandas as pd
+    import plotly.express as px
     
-    def process_multilingual_video(self, 
-                                 original_text: str, 
-                                 target_languages: List[str],
-                                 provider: str = "google_cloud") -> Dict:
-        """Processa um vídeo para múltiplos idiomas"""
-        
-        results = {
-            "original_text": original_text,
-            "provider": provider,
-            "languages": [],
-            "total_cost": 0,
-            "total_time": 0,
-            "success_count": 0
-        }
-        
-        start_time = time.time()
-        
-        for lang in target_languages:
-            lang_result = self._process_single_language(original_text, lang, provider)
-            results["languages"].append(lang_result)
-            
-            if lang_result["success"]:
-                results["success_count"] += 1
-                results["total_cost"] += lang_result["total_cost"]
-        
-        results["total_time"] = time.time() - start_time
-        
-        return results
+    # Credenciais lidas uma vez por processo e injetadas nos serviços
+    provider_config = get_provider_config()
     
-    def _process_single_language(self, text: str, target_lang: str, provider: str) -> Dict:
-        """Processa um único idioma"""
-        
-        start_time = time.time()
-        
-        # Mapear códigos de idioma
-        lang_codes = {
-            "en": "en-US",
-            "es": "es-ES", 
-            "fr": "fr-FR",
-            "de": "de-DE",
-            "it": "it-IT",
-            "pt": "pt-BR"
-        }
-        
-        tts_lang_code = lang_codes.get(target_lang, f"{target_lang}-{target_lang.upper()}")
-        
-        try:
-            # 1. Traduzir texto
-            if target_lang != "pt":
-                translation_result = self.google_service.translate_text(text, target_lang)
-                if not translation_result["success"]:
-                    return {"success": False, "error": "Translation failed", "language": target_lang}
-                
-                translated_text = translation_result["translated_text"]
-                translate_cost = translation_result["cost_estimate"]
-            else:
-                translated_text = text
-                translate_cost = 0
-            
-            # 2. Gerar áudio
-            if provider == "google_cloud":
-                tts_result = self.google_service.synthesize_speech(translated_text, tts_lang_code)
-            elif provider == "elevenlabs":
-                tts_result = self.elevenlabs_service.synthesize_speech(translated_text)
-            else:
-                return {"success": False, "error": f"Provider {provider} not supported", "language": target_lang}
-            
-            if not tts_result["success"]:
-                return {"success": False, "error": "TTS failed", "language": target_lang}
-            
-            processing_time = time.time() - start_time
-            
-            return {
-                "success": True,
-                "language": target_lang,
-                "original_text": text,
-                "translated_text": translated_text,
-                "audio_duration": tts_result["duration_seconds"],
-                "characters": len(translated_text),
-                "translate_cost": translate_cost,
-                "tts_cost": tts_result["cost_estimate"],
-                "total_cost": translate_cost + tts_result["cost_estimate"],
-                "processing_time": processing_time,
-                "audio_preview": tts_result["audio_content"][:100] + "...",
-                "simulated": tts_result.get("simulated", False)
-            }
-            
-        except Exception as e:
-            return {
-                "success": False,
-                "error": str(e),
-                "language": target_lang,
-                "processing_time": time.time() - start_time
-            }
-
-def main():
     st.title("🎬 Sistema de Geração de Vídeos - Migração Real")
     st.markdown("**POC Funcional:** ElevenLabs → Google Cloud TTS + Translate")
     
@@ -532,18 +206,12 @@ def main():
         st.header("🔐 Status das APIs")
         
         # Google Cloud
-        try:
-            google_configured = bool(st.secrets.get("GOOGLE_CLOUD_API_KEY") or st.secrets.get("GOOGLE_APPLICATION_CREDENTIALS"))
-        except:
-            google_configured = False
+        google_configured = provider_config.google_configured
         
         st.write("**Google Cloud:**", "✅ Configurado" if google_configured else "❌ Modo Demo")
         
         # ElevenLabs
-        try:
-            elevenlabs_configured = bool(st.secrets.get("ELEVENLABS_API_KEY"))
-        except:
-            elevenlabs_configured = False
+        elevenlabs_configured = provider_config.elevenlabs_configured
         
         st.write("**ElevenLabs:**", "✅ Configurado" if elevenlabs_configured else "❌ Modo Demo")
         
@@ -563,11 +231,15 @@ def main():
             default=["en", "es"]
         )
     
-    # Criar configuração
+    # Criar configuração (com a taxa de acerto da memória de tradução e a taxa de hedge observadas)
+    cache_stats = get_default_translation_cache().stats()
+    hedge_stats = get_default_hedger().stats()
     config = VideoGenerationConfig(
         videos_per_day=videos_per_day,
         languages=languages,
-        avg_chars_per_video=avg_chars
+        avg_chars_per_video=avg_chars,
+        translation_cache_hit_ratio=cache_stats["char_hit_ratio"],
+        hedge_rate=hedge_stats["hedge_rate"]
     )
     
     # Tabs principais
@@ -577,8 +249,13 @@ def main():
     with tab1:
         st.header("Análise de Custos - Dados Reais")
         
-        cost_analyzer = CostAnalyzer()
-        cost_results = cost_analyzer.calculate_monthly_costs(config)
+        cost_results = monthly_costs(
+            config.videos_per_day,
+            tuple(config.languages),
+            config.avg_chars_per_video,
+            config.translation_cache_hit_ratio,
+            config.hedge_rate
+        )
         
         # Métricas principais
         col1, col2, col3 = st.columns(3)
@@ -613,31 +290,112 @@ def main():
         # Gráfico de comparação
         st.subheader("Comparação Detalhada")
         
-        df_comparison = pd.DataFrame([
-            {
-                "Provedor": result["name"],
-                "Custo Total": f"R$ {result['total_cost']:,.2f}",
-                "TTS": result["tts_cost"],
-                "Tradução": result["translate_cost"],
-                "Qualidade": result["quality_score"],
-                "Latência (ms)": result["latency_ms"]
-            }
-            for result in cost_results.values()
-        ])
-        
-        # Gráfico de barras empilhadas
-        fig = px.bar(
-            df_comparison,
-            x="Provedor",
-            y=["TTS", "Tradução"],
-            title="Breakdown de Custos por Provedor",
-            color_discrete_map={"TTS": "#FF6B6B", "Tradução": "#4ECDC4"}
-        )
-        fig.update_layout(yaxis_title="Custo Mensal (R$)")
+        df_comparison, fig = cost_comparison(cost_results)
         st.plotly_chart(fig, use_container_width=True)
         
         # Tabela completa
         st.dataframe(df_comparison, use_container_width=True)
+        
+        # Memória de tradução
+        if cache_stats["hit_ratio"] > 0:
+            st.caption(
+                f"🧠 Memória de tradução: {cache_stats['hit_ratio']:.1%} das sentenças, "
+                f"{cache_stats['char_hit_ratio']:.1%} dos caracteres ({cache_stats['chars_saved']:,}) reaproveitados "
+                f"(R$ {cache_stats['cost_saved']:.4f} economizados) — já refletido nos custos de tradução acima"
+            )
+        
+        # Hedging de TTS
+        if hedge_stats["hedged"]:
+            st.caption(
+                f"⚡ Hedging de TTS: {hedge_stats['hedge_rate']:.1%} das requisições duplicadas "
+                f"(+R$ {cost_results['google_cloud']['hedge_extra_cost']:,.2f}/mês no Google Cloud) "
+                f"— já incluído nos custos de TTS acima"
+            )
+        
+        # Cenários: grade vetorizada de volume × tamanho × idiomas × fração migrada
+        st.subheader("🧮 Cenários de Migração")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            migration_cost = st.number_input("Custo único da migração (R$)", 0.0, 1_000_000.0, 20_000.0, step=1_000.0)
+        with col2:
+            horizon_months = st.slider("Horizonte de payback (meses)", 1, 24, 6)
+        with col3:
+            migrated_share = st.select_slider(
+                "Fração migrada para o Google Cloud",
+                options=list(SCENARIO_SHARES),
+                value=1.0,
+                format_func=lambda share: f"{share:.0%}"
+            )
+        
+        language_count = min(max(len(config.languages), 1), max(SCENARIO_LANGUAGES))
+        fig_heatmap, fig_break_even = scenario_figures(
+            config.translation_cache_hit_ratio,
+            config.hedge_rate,
+            migration_cost,
+            language_count,
+            migrated_share,
+            horizon_months,
+            config.videos_per_day
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.plotly_chart(fig_heatmap, use_container_width=True)
+        with col2:
+            st.plotly_chart(fig_break_even, use_container_width=True)
+        
+        # Previsão: distribuições ajustadas aos resultados gravados, em vez de estimativas fixas
+        st.subheader("🎲 Previsão Mensal (Monte Carlo)")
+        
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            results_file = st.file_uploader("Resultados gravados (results.jsonl)", type=["jsonl", "json"])
+        with col2:
+            forecast_provider = st.selectbox(
+                "Provedor da previsão",
+                ["google_cloud", "elevenlabs"],
+                format_func=lambda x: "Google Cloud" if x == "google_cloud" else "ElevenLabs"
+            )
+        with col3:
+            forecast_concurrency = st.slider("Idiomas processados em paralelo", 1, 64, 8)
+        
+        try:
+            forecast, fig_spend, fig_completion = monthly_forecast(
+                results_file.getvalue() if results_file else None,
+                forecast_provider,
+                config.videos_per_day,
+                language_count,
+                config.avg_chars_per_video,
+                forecast_concurrency
+            )
+        except ValueError as e:
+            st.warning(f"Não foi possível ajustar as distribuições: {e}")
+        else:
+            low, median, high = forecast["monthly_cost"]
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                st.metric("Gasto mensal p50", f"R$ {median:,.2f}")
+            with col2:
+                st.metric("Faixa p5–p95", f"R$ {low:,.2f} – {high:,.2f}")
+            with col3:
+                st.metric("Dias acima de 24h", f"{forecast['deadline_miss_probability']:.1%}")
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                st.plotly_chart(fig_spend, use_container_width=True)
+            with col2:
+                st.plotly_chart(fig_completion, use_container_width=True)
+            
+            fit = forecast["fit"]
+            if fit["samples"]:
+                st.caption(
+                    f"Ajuste a {fit['samples']} resultados: mediana de {fit['median_chars']:,.0f} caracteres, "
+                    f"{fit['median_time_at_median_chars']:.2f}s por idioma, "
+                    f"{fit['failure_rate']:.1%} de falhas (reprocessadas na simulação)"
+                )
+            else:
+                st.caption("Sem resultados gravados: distribuições centradas nas estimativas do CostAnalyzer")
     
     # Tab 2: Teste Real
     with tab2:
@@ -656,9 +414,14 @@ def main():
             format_func=lambda x: "Google Cloud TTS" if x == "google_cloud" else "ElevenLabs"
         )
         
+        hedge_enabled = st.checkbox(
+            "⚡ Hedging de TTS (duplica chamadas acima do p95 de latência)",
+            value=False
+        )
+        
         if st.button("🚀 Processar Vídeo Multilíngue", type="primary"):
             if sample_text and languages:
-                processor = VideoProcessor()
+                processor = get_processor(hedge_enabled)
                 
                 with st.spinner(f"Processando com {provider_choice}..."):
                     results = processor.process_multilingual_video(
@@ -678,9 +441,38 @@ def main():
                 with col3:
                     st.metric("Tempo", f"{results['total_time']:.2f}s")
                 with col4:
-                    avg_time = results['total_time'] / len(languages) if languages else 0
+                    avg_time = results['languages_time'] / len(languages) if languages else 0
                     st.metric("Tempo/Idioma", f"{avg_time:.2f}s")
                 
+                if results['total_time'] > 0:
+                    st.caption(
+                        f"⚡ Idiomas em paralelo: soma sequencial de {results['languages_time']:.2f}s "
+                        f"concluída em {results['total_time']:.2f}s "
+                        f"({results['languages_time'] / results['total_time']:.1f}x)"
+                    )
+                
+                if results.get("failovers"):
+                    st.warning(
+                        f"🔀 Failover: {results['failovers']} idioma(s) sintetizado(s) no provedor alternativo"
+                    )
+                
+                degraded = {
+                    name: health["state"]
+                    for name, health in processor.provider_health().items()
+                    if health["state"] != "closed"
+                }
+                if degraded:
+                    st.caption("🚦 Circuitos: " + ", ".join(f"{name} = {state}" for name, state in degraded.items()))
+                
+                if results.get("hedged_segments"):
+                    st.caption(f"⚡ {results['hedged_segments']} sentença(s) com requisição de hedge")
+                
+                if results.get("retries"):
+                    st.caption(
+                        f"🔁 {results['retries']} retentativas nas APIs "
+                        f"({results['backoff_time']:.2f}s em backoff)"
+                    )
+                
                 # Detalhes por idioma
                 st.subheader("Resultados por Idioma")
                 
@@ -698,6 +490,16 @@ def main():
                                 
                                 if lang_result.get("simulated"):
                                     st.info("ℹ️ Resultado simulado (sem credenciais API)")
+                                
+                                if lang_result.get("failover"):
+                                    st.warning(f"🔀 Áudio gerado via {lang_result['provider_used']} (failover)")
+                                
+                                segment_providers = set(lang_result.get("segment_providers", []))
+                                if len(segment_providers) > 1:
+                                    st.warning(f"🔀 Trechos de {', '.join(sorted(segment_providers))} (hedge no alternativo): vozes misturadas")
+                                
+                                if not lang_result.get("simulated"):
+                                    st.audio(bytes(lang_result["audio"].data), format="audio/mpeg")
                             
                             with col2:
                                 st.metric("Caracteres", lang_result["characters"])
@@ -706,9 +508,19 @@ def main():
                                 st.metric("Custo Tradução", f"R$ {lang_result['translate_cost']:.4f}")
                                 st.metric("Custo Total", f"R$ {lang_result['total_cost']:.4f}")
                                 st.metric("Tempo", f"{lang_result['processing_time']:.2f}s")
+                                st.metric("Retentativas", lang_result.get("retries", 0))
+                                st.metric(
+                                    "Sentenças reaproveitadas",
+                                    f"{lang_result['segments'] - lang_result['segments_synthesized']}/{lang_result['segments']}"
+                                )
                     else:
                         with st.expander(f"🌐 {lang_result['language'].upper()} - ❌ Erro"):
                             st.error(f"Erro: {lang_result['error']}")
+                            if lang_result.get("retries"):
+                                st.caption(
+                                    f"{lang_result['retries']} retentativas, "
+                                    f"{lang_result['backoff_time']:.2f}s em backoff"
+                                )
     
     # Tab 3: Comparativo Avançado
     with tab3:
@@ -716,7 +528,7 @@ def main():
         
         # Simular processamento para comparação
         if st.button("📊 Executar Análise Comparativa"):
-            processor = VideoProcessor()
+            processor = get_processor()
             test_text = "Este é um teste de comparação entre diferentes provedores de TTS e tradução."
             test_languages = ["en", "es"]
             
@@ -775,7 +587,11 @@ def main():
             elevenlabs_result = results_comparison.get("elevenlabs", {})
             
             if google_result and elevenlabs_result:
-                savings_per_video = elevenlabs_result.get("total_cost", 0) - google_result.get("total_cost", 0)
+                # Custo nominal (inclui o que o cache economizou) para não distorcer a comparação
+                savings_per_video = (
+                    elevenlabs_result.get("total_cost", 0) + elevenlabs_result.get("total_cost_saved", 0)
+                    - google_result.get("total_cost", 0) - google_result.get("total_cost_saved", 0)
+                )
                 monthly_savings = savings_per_video * config.videos_per_day * 30
                 annual_savings = monthly_savings * 12
                 
@@ -953,6 +769,29 @@ class GoogleTTSService:
         - Latência média das chamadas
         """)
         
+        st.write("**📈 Latência por estágio (chamadas feitas por este servidor):**")
+        latency_rows = get_default_metrics().summary()
+        if latency_rows:
+            df_latency = pd.DataFrame(latency_rows)
+            for column in ("mean", "p50", "p95", "p99"):
+                df_latency[column] = df_latency[column] * 1000
+            df_latency = df_latency.rename(columns={
+                "stage": "Estágio", "provider": "Provedor", "language": "Idioma", "count": "Amostras",
+                "mean": "Média (ms)", "p50": "p50 (ms)", "p95": "p95 (ms)", "p99": "p99 (ms)"
+            })
+            st.dataframe(df_latency, use_container_width=True, hide_index=True,
+                         column_config={c: st.column_config.NumberColumn(format="%.1f")
+                                        for c in ("Média (ms)", "p50 (ms)", "p95 (ms)", "p99 (ms)")})
+            
+            df_latency["Série"] = df_latency["Estágio"] + " · " + df_latency["Provedor"] + " · " + df_latency["Idioma"]
+            fig_latency = px.bar(
+                df_latency, x="Série", y=["p50 (ms)", "p95 (ms)", "p99 (ms)"], barmode="group",
+                hover_data=["Amostras"], title="Percentis de latência por estágio"
+            )
+            st.plotly_chart(fig_latency, use_container_width=True)
+        else:
+            st.caption("Processe um vídeo na aba 🔄 Teste Real para ver os percentis por estágio.")
+        
         st.subheader("6. 🔄 Próximos Passos")
         
         next_steps = [
@@ -0,0 +1,76 @@
+# Segmentação de roteiros em sentenças
+#
+# Cada sentença é traduzida e sintetizada de forma independente, o que
+# permite reaproveitar os caches quando só parte do roteiro muda.
+
+import re
+from typing import List
+
+# Fim de sentença: pontuação final (opcionalmente seguida de aspas/parênteses)
+# e espaço em branco, ou quebra de parágrafo.
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?…])[\"'”’)\]]*\s+|\n\s*\n")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Divide o texto em sentenças, sem perder pontuação"""
+    sentences = []
+    start = 0
+    for match in _SENTENCE_BOUNDARY.finditer(text):
+        # Mantém aspas/parênteses de fechamento com a sentença anterior
+        end = match.start() + len(match.group(0).rstrip())
+        if match.group(0).startswith("\n"):
+            end = match.start()
+        sentence = text[start:end].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def join_sentences(sentences: List[str]) -> str:
+    """Reconstrói o texto a partir das sentenças traduzidas"""
+    return " ".join(sentence for sentence in sentences if sentence)
+
+
+def chunk_text(text: str, max_bytes: int) -> List[str]:
+    """Agrupa sentenças em trechos de até max_bytes (UTF-8)
+
+    Sentenças maiores que o limite são quebradas entre palavras e, em último
+    caso, entre caracteres.
+    """
+    chunks = []
+    current = ""
+
+    for piece in _pieces_within(split_sentences(text) or [text], max_bytes):
+        candidate = f"{current} {piece}" if current else piece
+        if len(candidate.encode("utf-8")) <= max_bytes:
+            current = candidate
+        else:
+            chunks.append(current)
+            current = piece
+
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _pieces_within(sentences: List[str], max_bytes: int) -> List[str]:
+    pieces = []
+    for sentence in sentences:
+        if len(sentence.encode("utf-8")) <= max_bytes:
+            pieces.append(sentence)
+            continue
+        for word in sentence.split():
+            while len(word.encode("utf-8")) > max_bytes:
+                cut = max_bytes
+                while len(word[:cut].encode("utf-8")) > max_bytes:
+                    cut -= 1
+                pieces.append(word[:cut])
+                word = word[cut:]
+            if word:
+                pieces.append(word)
+    return pieces
@@ -0,0 +1,271 @@
+# Gerenciamento de tokens OAuth do Google Cloud (Service Account)
+#
+# O token é cacheado em memória até pouco antes de expirar, renovado em
+# background antes do vencimento e compartilhado entre processos do mesmo
+# host através de um arquivo protegido por lock.
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from http_transport import HttpTransport, get_default_transport
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos
+    fcntl = None
+
+TOKEN_URL = "https://oauth2.googleapis.com/token"
+TOKEN_SCOPE = "https://www.googleapis.com/auth/cloud-platform"
+DEFAULT_TOKEN_CACHE_DIR = os.path.join(tempfile.gettempdir(), "video_generation_tokens")
+
+
+class TokenError(Exception):
+    """Falha ao trocar o JWT por um access token"""
+
+
+def parse_service_account(service_account_info) -> Dict:
+    """Normaliza as credenciais (string JSON, caminho do arquivo de chave ou mapeamento) para dict
+
+    Pela convenção do Google, GOOGLE_APPLICATION_CREDENTIALS costuma ser o
+    caminho do arquivo JSON, não o conteúdo.
+    """
+    if isinstance(service_account_info, (str, os.PathLike)):
+        value = os.fspath(service_account_info)
+        if not value.lstrip().startswith("{") and os.path.isfile(os.path.expanduser(value)):
+            with open(os.path.expanduser(value), encoding="utf-8") as f:
+                return json.load(f)
+        try:
+            return json.loads(value)
+        except json.JSONDecodeError as e:
+            raise ValueError("Credenciais da Service Account: esperado JSON ou caminho de um arquivo existente") from e
+    return dict(service_account_info)
+
+
+class TokenManager:
+    """Cache thread-safe de access tokens com renovação antecipada"""
+
+    def __init__(self,
+                 service_account_info,
+                 refresh_margin: float = 60,
+                 refresh_ahead: float = 300,
+                 cache_dir: Optional[str] = DEFAULT_TOKEN_CACHE_DIR,
+                 token_url: str = TOKEN_URL,
+                 transport: Optional[HttpTransport] = None):
+        self.creds = parse_service_account(service_account_info)
+        # Token deixa de ser servido `refresh_margin` segundos antes de expirar
+        # e é renovado em background a partir de `refresh_ahead` segundos.
+        self.refresh_margin = refresh_margin
+        self.refresh_ahead = max(refresh_ahead, refresh_margin)
+        self.token_url = token_url
+        self.transport = transport or get_default_transport()
+
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._access_token: Optional[str] = None
+        self._token_expires = 0.0
+        self._refresh_thread: Optional[threading.Thread] = None
+
+        self._cache_path = None
+        if cache_dir:
+            # Por endpoint: um token do servidor simulado não serve (nem sobrescreve) o real
+            key = hashlib.sha256(f"{self.creds['client_email']}|{TOKEN_SCOPE}|{token_url}".encode()).hexdigest()[:32]
+            self._cache_path = os.path.join(cache_dir, f"{key}.json")
+
+        self._stats = {
+            "hits": 0,
+            "misses": 0,
+            "shared_hits": 0,
+            "refreshes": 0,
+            "background_refreshes": 0,
+            "errors": 0
+        }
+
+    def get_token(self) -> str:
+        """Retorna um token válido, buscando um novo apenas quando necessário"""
+        with self._lock:
+            now = time.time()
+            if self._access_token and now < self._token_expires - self.refresh_margin:
+                self._count("hits")
+                if now >= self._token_expires - self.refresh_ahead:
+                    self._schedule_refresh()
+                return self._access_token
+
+            # Miss: busca síncrona. Outras threads aguardam no lock (single-flight).
+            self._count("misses")
+            token, expires = self._obtain(self.refresh_margin)
+            self._access_token, self._token_expires = token, expires
+            return token
+
+    def stats(self) -> Dict:
+        """Contadores de uso do cache"""
+        with self._stats_lock:
+            stats = dict(self._stats)
+        stats["expires_in"] = max(0.0, self._token_expires - time.time())
+        return stats
+
+    def invalidate(self):
+        """Descarta o token (ex.: após um 401), em memória e no cache do host se for o mesmo"""
+        with self._lock:
+            token = self._access_token
+            self._access_token = None
+            self._token_expires = 0.0
+        if not self._cache_path:
+            return
+        with self._refresh_lock, self._file_lock():
+            cached = self._read_shared(0)
+            # Outro processo pode já ter gravado um token novo: esse fica
+            if cached is None or token is None or cached[0] == token:
+                try:
+                    os.unlink(self._cache_path)
+                except OSError:
+                    pass
+
+    def _count(self, name: str):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def _schedule_refresh(self):
+        """Dispara renovação em background se ainda não houver uma em curso"""
+        if self._refresh_thread is not None and self._refresh_thread.is_alive():
+            return
+        self._refresh_thread = threading.Thread(
+            target=self._background_refresh,
+            name="token-refresh",
+            daemon=True
+        )
+        self._refresh_thread.start()
+
+    def _background_refresh(self):
+        try:
+            token, expires = self._obtain(self.refresh_ahead)
+        except Exception:
+            # O token atual continua válido; a próxima chamada tenta novamente
+            return
+        with self._lock:
+            if expires > self._token_expires:
+                self._access_token, self._token_expires = token, expires
+                self._count("background_refreshes")
+
+    def _obtain(self, min_remaining: float) -> Tuple[str, float]:
+        """Lê o token compartilhado do host ou busca um novo na API OAuth"""
+        with self._refresh_lock, self._file_lock():
+            cached = self._read_shared(min_remaining)
+            if cached:
+                self._count("shared_hits")
+                return cached
+
+            try:
+                token, expires = self._fetch()
+            except Exception:
+                self._count("errors")
+                raise
+            self._count("refreshes")
+            self._write_shared(token, expires)
+            return token, expires
+
+    def _fetch(self) -> Tuple[str, float]:
+        """Assina o JWT e troca por um access token"""
+        import jwt
+
+        now = int(time.time())
+        payload = {
+            "iss": self.creds["client_email"],
+            "scope": TOKEN_SCOPE,
+            "aud": self.token_url,
+            "iat": now,
+            "exp": now + 3600
+        }
+        assertion = jwt.encode(payload, self.creds["private_key"], algorithm="RS256")
+
+        response = self.transport.post(
+            self.token_url,
+            data={
+                "grant_type": "urn:ietf:params:oauth:grant-type:jwt-bearer",
+                "assertion": assertion
+            }
+        )
+
+        if response.status_code != 200:
+            raise TokenError(f"{response.status_code} - {response.text}")
+
+        result = response.json()
+        return result["access_token"], now + float(result.get("expires_in", 3600))
+
+    def _file_lock(self):
+        return _FileLock(self._cache_path + ".lock" if self._cache_path else None)
+
+    def _read_shared(self, min_remaining: float) -> Optional[Tuple[str, float]]:
+        if not self._cache_path:
+            return None
+        try:
+            with open(self._cache_path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("expires_at", 0) - min_remaining > time.time():
+            return data["access_token"], data["expires_at"]
+        return None
+
+    def _write_shared(self, token: str, expires: float):
+        if not self._cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self._cache_path), mode=0o700, exist_ok=True)
+            tmp_path = f"{self._cache_path}.{os.getpid()}.tmp"
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"access_token": token, "expires_at": expires}, f)
+            os.replace(tmp_path, self._cache_path)
+        except OSError:
+            # Cache compartilhado é opcional; o token em memória continua valendo
+            pass
+
+
+class _FileLock:
+    """Lock exclusivo entre processos (no-op sem fcntl ou sem diretório)"""
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self._fd = None
+
+    def __enter__(self):
+        if self.path and fcntl is not None:
+            try:
+                os.makedirs(os.path.dirname(self.path), mode=0o700, exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError:
+                self._fd = None
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+_managers: Dict[Tuple[str, str], TokenManager] = {}
+_managers_lock = threading.Lock()
+
+
+def get_token_manager(service_account_info, token_url: str = TOKEN_URL, **kwargs) -> TokenManager:
+    """Retorna o TokenManager compartilhado do processo para a Service Account e o endpoint
+
+    Há um por (token_url, client_email); os demais argumentos (ex.: transport)
+    valem para quem cria o gerenciador.
+    """
+    creds = parse_service_account(service_account_info)
+    key = (token_url, creds["client_email"])
+    with _managers_lock:
+        manager = _managers.get(key)
+        if manager is None:
+            manager = TokenManager(creds, token_url=token_url, **kwargs)
+            _managers[key] = manager
+        return manager
@@ -0,0 +1,135 @@
+# Micro-batching de traduções
+#
+# Chamadas concorrentes (de idiomas ou vídeos diferentes) para o mesmo par
+# origem → destino que chegam dentro de uma janela curta são agrupadas e
+# enviadas juntas para translate_batch.
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from retry_policy import Deadline
+
+
+class TranslationBatcher:
+    """Agrupa pedidos de tradução concorrentes em lotes"""
+
+    def __init__(self,
+                 translate_batch: Callable[[List[str], str, str], List[Dict]],
+                 window_ms: float = 20,
+                 max_segments: int = 128,
+                 max_chars: int = 30_000,
+                 max_concurrent_batches: int = 4):
+        self.translate_batch = translate_batch
+        self.window = window_ms / 1000
+        self.max_segments = max_segments
+        self.max_chars = max_chars
+
+        self._cond = threading.Condition()
+        # (origem, destino) -> {"created": t, "chars": n, "items": [(texto, future, deadline)]}
+        self._pending: Dict[Tuple[str, str], Dict] = {}
+        self._closed = False
+        self._dispatcher = None
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrent_batches,
+                                            thread_name_prefix="translate-batch")
+
+        self._stats = {"submitted": 0, "batches": 0, "segments_sent": 0}
+
+    def submit(self,
+               text: str,
+               target_language: str,
+               source_language: str = "pt",
+               deadline: Optional[Deadline] = None) -> Future:
+        """Enfileira um texto e retorna um Future com o resultado da tradução
+        
+        O lote é enviado com o deadline mais folgado entre os pedidos; cada
+        chamador limita a própria espera com future.result(timeout=...).
+        """
+        future = Future()
+        key = (source_language, target_language)
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("TranslationBatcher encerrado")
+            if self._dispatcher is None:
+                self._dispatcher = threading.Thread(target=self._dispatch_loop,
+                                                    name="translate-batcher",
+                                                    daemon=True)
+                self._dispatcher.start()
+
+            group = self._pending.get(key)
+            if group is not None and (len(group["items"]) >= self.max_segments or
+                                      group["chars"] + len(text) > self.max_chars):
+                # Lote cheio: envia imediatamente e começa outro
+                self._flush_locked(key)
+                group = None
+            if group is None:
+                group = {"created": time.monotonic(), "chars": 0, "items": []}
+                self._pending[key] = group
+
+            group["items"].append((text, future, deadline))
+            group["chars"] += len(text)
+            self._stats["submitted"] += 1
+            self._cond.notify()
+
+        return future
+
+    def translate(self,
+                  text: str,
+                  target_language: str,
+                  source_language: str = "pt",
+                  deadline: Optional[Deadline] = None) -> Dict:
+        """Versão bloqueante de submit"""
+        return self.submit(text, target_language, source_language, deadline).result()
+
+    def stats(self) -> Dict:
+        with self._cond:
+            stats = dict(self._stats)
+        stats["avg_batch_size"] = stats["segments_sent"] / stats["batches"] if stats["batches"] else 0.0
+        stats["requests_saved"] = stats["segments_sent"] - stats["batches"]
+        return stats
+
+    def close(self):
+        """Envia o que estiver pendente e encerra as threads"""
+        with self._cond:
+            self._closed = True
+            for key in list(self._pending):
+                self._flush_locked(key)
+            self._cond.notify_all()
+        self._executor.shutdown(wait=True)
+
+    def _dispatch_loop(self):
+        with self._cond:
+            while not self._closed:
+                now = time.monotonic()
+                next_deadline = None
+                for key in list(self._pending):
+                    deadline = self._pending[key]["created"] + self.window
+                    if deadline <= now:
+                        self._flush_locked(key)
+                    elif next_deadline is None or deadline < next_deadline:
+                        next_deadline = deadline
+                self._cond.wait(None if next_deadline is None else next_deadline - now)
+
+    def _flush_locked(self, key: Tuple[str, str]):
+        group = self._pending.pop(key)
+        self._stats["batches"] += 1
+        self._stats["segments_sent"] += len(group["items"])
+        self._executor.submit(self._run_batch, key, group["items"])
+
+    def _run_batch(self, key: Tuple[str, str], items: List[Tuple[str, Future, Optional[Deadline]]]):
+        source_language, target_language = key
+        try:
+            results = self.translate_batch(
+                [text for text, _, _ in items],
+                target_language,
+                source_language,
+                Deadline.latest(deadline for _, _, deadline in items)
+            )
+        except Exception as e:
+            for _, future, _ in items:
+                future.set_exception(e)
+            return
+        for (_, future, _), result in zip(items, results):
+            future.set_result(result)
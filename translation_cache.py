@@ -0,0 +1,172 @@
+# Memória de tradução persistente
+#
+# Cache endereçado por conteúdo (texto, idioma de origem, idioma de destino)
+# com um nível LRU em memória e um nível SQLite em disco, compartilhado entre
+# processos do mesmo host.
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    "VIDEO_CACHE_DIR",
+    os.path.join(tempfile.gettempdir(), "video_generation_cache")
+)
+
+# Preço do Google Translate: $20 por milhão de caracteres (em BRL)
+TRANSLATE_COST_PER_CHAR = 20 / 1_000_000 * 5.2
+
+
+class TranslationCache:
+    """Cache de traduções em dois níveis (LRU em memória + SQLite)"""
+
+    def __init__(self,
+                 db_path: Optional[str] = None,
+                 max_memory_entries: int = 10_000,
+                 max_disk_entries: int = 1_000_000,
+                 ttl_seconds: float = 30 * 24 * 3600,
+                 cost_per_char: float = TRANSLATE_COST_PER_CHAR):
+        self.db_path = db_path or os.path.join(DEFAULT_CACHE_DIR, "translations.sqlite3")
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttl_seconds = ttl_seconds
+        self.cost_per_char = cost_per_char
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, tuple]" = OrderedDict()
+        self._puts_since_prune = 0
+
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False,
+                                     isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS translations (
+                key TEXT PRIMARY KEY,
+                translated_text TEXT NOT NULL,
+                characters INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_translations_accessed ON translations(accessed_at)")
+
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "chars_saved": 0, "chars_missed": 0}
+
+    @staticmethod
+    def make_key(text: str, source_language: str, target_language: str) -> str:
+        return hashlib.sha256(f"{source_language}\0{target_language}\0{text}".encode()).hexdigest()
+
+    def get(self, text: str, source_language: str, target_language: str) -> Optional[str]:
+        """Retorna a tradução cacheada ou None"""
+        key = self.make_key(text, source_language, target_language)
+        now = time.time()
+
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and now - entry[1] < self.ttl_seconds:
+                self._memory.move_to_end(key)
+                self._record_hit("memory_hits", text)
+                return entry[0]
+
+            row = self._conn.execute(
+                "SELECT translated_text, created_at, accessed_at FROM translations WHERE key = ?",
+                (key,)
+            ).fetchone()
+
+            if row is None or now - row[1] >= self.ttl_seconds:
+                if row is not None:
+                    self._conn.execute("DELETE FROM translations WHERE key = ?", (key,))
+                self._memory.pop(key, None)
+                self._stats["misses"] += 1
+                self._stats["chars_missed"] += len(text)
+                return None
+
+            # Evita uma escrita por leitura: accessed_at só é atualizado de hora em hora
+            if now - row[2] > 3600:
+                self._conn.execute("UPDATE translations SET accessed_at = ? WHERE key = ?", (now, key))
+            self._remember(key, row[0], row[1])
+            self._record_hit("disk_hits", text)
+            return row[0]
+
+    def put(self, text: str, source_language: str, target_language: str, translated_text: str):
+        """Armazena uma tradução nos dois níveis"""
+        key = self.make_key(text, source_language, target_language)
+        now = time.time()
+
+        with self._lock:
+            self._remember(key, translated_text, now)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO translations VALUES (?, ?, ?, ?, ?)",
+                (key, translated_text, len(text), now, now)
+            )
+            self._puts_since_prune += 1
+            if self._puts_since_prune >= 1000:
+                self._prune_locked()
+
+    def stats(self) -> Dict:
+        """Taxa de acerto e caracteres (e custo) economizados
+
+        hit_ratio conta consultas (sentenças); char_hit_ratio é a fração de
+        caracteres servida pelo cache, a que reduz o custo de tradução.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        hits = stats["memory_hits"] + stats["disk_hits"]
+        lookups = hits + stats["misses"]
+        stats["hit_ratio"] = hits / lookups if lookups else 0.0
+        looked_up_chars = stats["chars_saved"] + stats["chars_missed"]
+        stats["char_hit_ratio"] = stats["chars_saved"] / looked_up_chars if looked_up_chars else 0.0
+        stats["cost_saved"] = stats["chars_saved"] * self.cost_per_char
+        return stats
+
+    def prune(self):
+        """Remove entradas expiradas e as menos usadas acima do limite"""
+        with self._lock:
+            self._prune_locked()
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._conn.execute("DELETE FROM translations")
+
+    def _remember(self, key: str, translated_text: str, created_at: float):
+        self._memory[key] = (translated_text, created_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _record_hit(self, kind: str, text: str):
+        self._stats[kind] += 1
+        self._stats["chars_saved"] += len(text)
+
+    def _prune_locked(self):
+        self._puts_since_prune = 0
+        self._conn.execute("DELETE FROM translations WHERE created_at < ?",
+                           (time.time() - self.ttl_seconds,))
+        count = self._conn.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        if count > self.max_disk_entries:
+            self._conn.execute(
+                "DELETE FROM translations WHERE key IN "
+                "(SELECT key FROM translations ORDER BY accessed_at LIMIT ?)",
+                (count - self.max_disk_entries,)
+            )
+
+
+_default_cache: Optional[TranslationCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_translation_cache() -> TranslationCache:
+    """Cache de traduções compartilhado do processo"""
+    global _default_cache
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = TranslationCache()
+        return _default_cache
@@ -0,0 +1,1565 @@
+# Núcleo do sistema de geração de vídeos multilíngues
+#
+# Serviços de provedores (Google Cloud, ElevenLabs), análise de custos e o
+# processador de vídeos, sem dependência de Streamlit, pandas ou Plotly:
+# importável pelo dashboard, pela CLI de lote e por workers.
+
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlsplit
+
+from audio_payload import AudioPayload
+from audio_store import AudioStore, get_default_audio_store
+from audio_stream import DEFAULT_CHUNK_SIZE, iter_chunks, iter_json_base64_field, write_chunks
+from circuit_breaker import OPEN, CircuitBreaker, CircuitBreakerRegistry, CircuitOpenError, get_default_breakers
+from hedging import CancelToken, Hedger, HedgeCancelled
+from http_transport import HttpTransport, get_default_transport
+from metrics import AUDIO_BYTES, REQUEST_CHARS, MetricsRegistry, StageTimer, get_default_metrics
+from mp3_utils import concat_mp3, skip_info_frame, strip_tags
+from pipeline import TranslateTTSPipeline
+from rate_limiter import RateLimiter, get_default_rate_limiter, parse_retry_after
+from retry_policy import Deadline, RetryPolicy
+from text_segmentation import chunk_text, join_sentences, split_sentences
+from token_manager import TOKEN_URL, TokenError, get_token_manager
+from translation_batcher import TranslationBatcher
+from translation_cache import TranslationCache, get_default_translation_cache
+
+# Erros dos provedores são registrados aqui; o dashboard os exibe com st.error
+logger = logging.getLogger("video_core")
+
+# Limites do Translate v2 por requisição
+MAX_TRANSLATE_SEGMENTS = 128
+MAX_TRANSLATE_CHARS = 30_000
+
+# Limite do Google TTS para input.text (em bytes UTF-8)
+MAX_TTS_INPUT_BYTES = 5000
+
+# Provedor de TTS alternativo quando o principal está fora do ar
+FAILOVER_PROVIDERS = {"elevenlabs": "google_cloud", "google_cloud": "elevenlabs"}
+
+def get_secret(name: str) -> Optional[str]:
+    """Lê uma credencial do ambiente ou, se o Streamlit estiver carregado, de st.secrets"""
+    value = os.environ.get(name)
+    if value:
+        return value
+    
+    streamlit = sys.modules.get("streamlit")
+    if streamlit is not None:
+        try:
+            if name in streamlit.secrets:
+                return streamlit.secrets[name]
+        except Exception:
+            # Sem secrets configurados: modo demo
+            pass
+    return None
+
+def endpoint_url(env_name: str, default: str) -> str:
+    """URL de um endpoint: a variável específica, PROVIDER_BASE_URL + caminho padrão ou a real
+    
+    Permite apontar os serviços para o mock_provider_server.py (testes de carga offline).
+    """
+    url = os.environ.get(env_name)
+    if url:
+        return url
+    base_url = os.environ.get("PROVIDER_BASE_URL")
+    if base_url:
+        return base_url.rstrip("/") + urlsplit(default).path
+    return default
+
+def _post_within_quota(transport: HttpTransport,
+                       rate_limiter: RateLimiter,
+                       key: str,
+                       url: str,
+                       characters: int = 0,
+                       deadline: Optional[Deadline] = None,
+                       breaker: Optional[CircuitBreaker] = None,
+                       metrics: Optional[MetricsRegistry] = None,
+                       language: str = "",
+                       cancel: Optional[CancelToken] = None,
+                       reauthorize: Optional[Callable[[], Dict]] = None,
+                       **kwargs):
+    """POST que aguarda a cota do endpoint; um 429 esvazia o bucket compartilhado
+    
+    Com deadline, a espera pela cota e o timeout da requisição ficam limitados
+    ao tempo restante do vídeo. Com o circuito do endpoint aberto, falha na hora.
+    Com metrics, registra a espera pela cota e o tempo até a resposta de cada
+    tentativa (estágio = endpoint: translate ou tts). Com stream=True o corpo
+    ainda não foi lido: o estágio vira <endpoint>_ttfb e quem lê o corpo
+    registra o tempo completo (ver _observe_streamed). Com cancel (hedging),
+    uma chamada já cancelada não chega a ser enviada. Com reauthorize, um 401
+    (token revogado ou vencido antes da hora) descarta o token e repete a
+    chamada uma vez com os cabeçalhos que ele devolver.
+    """
+    if breaker is not None and breaker.state == OPEN:
+        raise CircuitOpenError(f"circuito {key} aberto")
+    provider, endpoint = key.split(":", 1)
+    stage = f"{endpoint}_ttfb" if kwargs.get("stream") else endpoint
+    with StageTimer(metrics, "quota_wait", provider, language):
+        rate_limiter.acquire(key, chars=characters, timeout=deadline.remaining() if deadline else None)
+    if cancel is not None:
+        cancel.dispatch()
+    if metrics is not None and characters:
+        metrics.observe(REQUEST_CHARS, characters, stage=endpoint, provider=provider,
+                        language=language.split("-")[0])
+    if deadline is not None:
+        kwargs["timeout"] = deadline.timeout(transport.timeout)
+    if breaker is None:
+        with StageTimer(metrics, stage, provider, language):
+            response = transport.post(url, **kwargs)
+    else:
+        breaker.check()
+        try:
+            with StageTimer(metrics, stage, provider, language):
+                response = transport.post(url, **kwargs)
+        except Exception:
+            breaker.record_failure()
+            raise
+        # 4xx (inclusive 429) não indicam provedor degradado
+        if response.status_code >= 500 or response.status_code == 408:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
+    if response.status_code == 429:
+        rate_limiter.penalize(key, parse_retry_after(response.headers.get("Retry-After")))
+    if response.status_code == 401 and reauthorize is not None:
+        response.close()
+        kwargs["headers"] = dict(kwargs.get("headers") or {}, **reauthorize())
+        if deadline is not None:
+            kwargs.pop("timeout", None)
+        return _post_within_quota(transport, rate_limiter, key, url, characters, deadline, breaker,
+                                  metrics, language, cancel, **kwargs)
+    return response
+
+def _stream_to_sink(chunks: Iterator[bytes], sink, **fields) -> Dict:
+    """Consome um stream de áudio gravando no destino (caminho, arquivo ou socket)"""
+    try:
+        stats = write_chunks(chunks, sink)
+    except Exception as e:
+        logger.error(f"Erro no streaming de TTS: {e}")
+        return {"success": False, "error": str(e), **fields}
+    
+    result = {"success": True, **fields, **stats}
+    if isinstance(sink, (str, os.PathLike)):
+        result["audio_path"] = os.fspath(sink)
+    return result
+
+def _retry_totals(results: Iterable[Dict]) -> Dict:
+    """Soma retentativas e tempo de backoff de vários resultados de chamadas"""
+    totals = {"retries": 0, "backoff_time": 0.0}
+    for result in results:
+        totals["retries"] += result.get("retries", 0)
+        totals["backoff_time"] += result.get("backoff_time", 0.0)
+    return totals
+
+def _observe_streamed(metrics: Optional[MetricsRegistry],
+                      key: str,
+                      response,
+                      read_start: float,
+                      language: str = ""):
+    """Registra o estágio do endpoint de uma resposta em streaming já lida
+
+    O tempo é o da resposta (response.elapsed, até os cabeçalhos) somado ao da
+    leitura do corpo iniciada em read_start: a síntese completa, não só o
+    primeiro byte (que fica em <endpoint>_ttfb).
+    """
+    if metrics is None:
+        return
+    provider, endpoint = key.split(":", 1)
+    metrics.observe_stage(endpoint, response.elapsed.total_seconds() + time.monotonic() - read_start,
+                          provider, language)
+
+def _with_script_ctx(func):
+    """Propaga o contexto do Streamlit (se em uso) para que os erros apareçam na UI"""
+    if "streamlit" not in sys.modules:
+        return func
+    
+    from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+    
+    script_ctx = get_script_run_ctx()
+    if script_ctx is None:
+        return func
+    
+    # Nome do atributo da thread que guarda o contexto (definido no mesmo módulo)
+    ctx_attr = sys.modules[add_script_run_ctx.__module__].SCRIPT_RUN_CONTEXT_ATTR_NAME
+    
+    def wrapper(*args, **kwargs):
+        # As threads dos executores são compartilhadas entre sessões: o contexto
+        # anterior volta ao fim da chamada, para não vazar para a próxima sessão
+        thread = threading.current_thread()
+        previous_ctx = get_script_run_ctx(suppress_warning=True)
+        add_script_run_ctx(thread, script_ctx)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            setattr(thread, ctx_attr, previous_ctx)
+    
+    return wrapper
+
+@dataclass
+class ProviderConfig:
+    """Credenciais e endpoints dos provedores, injetados nos serviços
+    
+    Os serviços não leem o ambiente nem st.secrets por conta própria quando
+    recebem um ProviderConfig; sem ele, usam ProviderConfig.from_env().
+    """
+    google_project_id: str = "demo-project"
+    google_api_key: Optional[str] = None
+    # JSON (ou dict) da Service Account; tem precedência sobre a API Key
+    google_service_account_info: Optional[Union[str, Dict]] = None
+    elevenlabs_api_key: Optional[str] = None
+    google_tts_url: str = "https://texttospeech.googleapis.com/v1/text:synthesize"
+    google_translate_url: str = "https://translation.googleapis.com/language/translate/v2"
+    google_token_url: str = TOKEN_URL
+    elevenlabs_base_url: str = "https://api.elevenlabs.io/v1"
+    
+    @classmethod
+    def from_env(cls) -> "ProviderConfig":
+        """Credenciais do ambiente (ou de st.secrets, se o Streamlit estiver carregado)
+        
+        URLs: GOOGLE_TTS_URL, GOOGLE_TRANSLATE_URL, GOOGLE_TOKEN_URL,
+        ELEVENLABS_BASE_URL ou PROVIDER_BASE_URL.
+        """
+        defaults = cls()
+        return cls(
+            google_project_id=get_secret("GOOGLE_CLOUD_PROJECT") or defaults.google_project_id,
+            google_api_key=get_secret("GOOGLE_CLOUD_API_KEY"),
+            google_service_account_info=get_secret("GOOGLE_APPLICATION_CREDENTIALS"),
+            elevenlabs_api_key=get_secret("ELEVENLABS_API_KEY"),
+            google_tts_url=endpoint_url("GOOGLE_TTS_URL", defaults.google_tts_url),
+            google_translate_url=endpoint_url("GOOGLE_TRANSLATE_URL", defaults.google_translate_url),
+            google_token_url=endpoint_url("GOOGLE_TOKEN_URL", defaults.google_token_url),
+            elevenlabs_base_url=endpoint_url("ELEVENLABS_BASE_URL", defaults.elevenlabs_base_url)
+        )
+    
+    @property
+    def google_configured(self) -> bool:
+        return bool(self.google_api_key or self.google_service_account_info)
+    
+    @property
+    def elevenlabs_configured(self) -> bool:
+        return bool(self.elevenlabs_api_key)
+
+@dataclass
+class VideoGenerationConfig:
+    """Configurações do sistema de geração de vídeos"""
+    videos_per_day: int = 200
+    languages: List[str] = None
+    avg_chars_per_video: int = 1000
+    current_provider: str = "elevenlabs"
+    target_provider: str = "google_cloud"
+    # Fração de caracteres servida pela memória de tradução (0 = sem cache)
+    translation_cache_hit_ratio: float = 0.0
+    # Fração das requisições de TTS duplicadas por hedging (0 = sem hedge)
+    hedge_rate: float = 0.0
+    
+    def __post_init__(self):
+        if self.languages is None:
+            self.languages = ["en", "es", "fr"]
+
+class GoogleCloudService:
+    """Serviço real do Google Cloud TTS + Translate"""
+    
+    def __init__(self,
+                 transport: Optional[HttpTransport] = None,
+                 audio_store: Optional[AudioStore] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 config: Optional[ProviderConfig] = None):
+        # Credenciais injetadas (ou do ambiente / Streamlit Secrets)
+        config = config or ProviderConfig.from_env()
+        self.project_id = config.google_project_id
+        self.api_key = config.google_api_key
+        self.service_account_info = config.google_service_account_info
+        
+        # Transporte HTTP com pool de conexões (compartilhado por padrão)
+        self.transport = transport or get_default_transport()
+        self.audio_store = audio_store or get_default_audio_store()
+        # Cotas por minuto de cada endpoint, compartilhadas entre processos
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        # Falhas transitórias são retentadas; as definitivas viram success=False
+        self.retry_policy = retry_policy or RetryPolicy()
+        # Endpoints degradados falham rápido em vez de esperar o timeout
+        self.breakers = breakers or get_default_breakers()
+        # Histogramas de latência por estágio, provedor e idioma
+        self.metrics = metrics or get_default_metrics()
+        
+        # Pool para sintetizar em paralelo os trechos de textos longos
+        self._chunk_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="tts-chunk")
+        
+        # URLs das APIs (sobrescrevíveis para apontar para o mock_provider_server.py)
+        self.tts_url = config.google_tts_url
+        self.translate_url = config.google_translate_url
+        self.token_url = config.google_token_url
+        
+        # Cache de tokens de acesso compartilhado entre threads e processos
+        self._token_manager = None
+    
+    @property
+    def configured(self) -> bool:
+        """Se há credenciais (sem elas as respostas são simuladas)"""
+        return bool(self.api_key or self.service_account_info)
+    
+    def _get_access_token(self) -> str:
+        """Obtém token de acesso usando Service Account (cacheado pelo TokenManager)"""
+        if self.service_account_info:
+            try:
+                if self._token_manager is None:
+                    self._token_manager = get_token_manager(self.service_account_info, transport=self.transport,
+                                                            token_url=self.token_url)
+                return self._token_manager.get_token()
+            except ImportError:
+                logger.error("PyJWT não instalado. Usando fallback para API Key.")
+                return self.api_key
+            except TokenError as e:
+                logger.error(f"Erro na autenticação OAuth: {e}")
+            except Exception as e:
+                logger.error(f"Erro na autenticação: {e}")
+        
+        # Fallback para API Key se disponível
+        return self.api_key
+    
+    def token_stats(self) -> Dict:
+        """Contadores do cache de tokens (hits, misses, refreshes)"""
+        if self._token_manager is None:
+            return {}
+        return self._token_manager.stats()
+    
+    def _auth(self, language: str = "") -> Tuple[Dict, Dict]:
+        """Cabeçalhos e parâmetros de autenticação (token OAuth ou API Key)"""
+        headers = {}
+        params = {}
+        if self.service_account_info:
+            with StageTimer(self.metrics, "oauth", "google_cloud", language):
+                token = self._get_access_token()
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+        elif self.api_key:
+            params["key"] = self.api_key
+        return headers, params
+    
+    def _reauthorizer(self, language: str = "") -> Optional[Callable[[], Dict]]:
+        """Para _post_within_quota: após um 401, descarta o token e devolve novos cabeçalhos"""
+        if not self.service_account_info:
+            return None
+        
+        def reauthorize() -> Dict:
+            if self._token_manager is not None:
+                self._token_manager.invalidate()
+            return self._auth(language)[0]
+        
+        return reauthorize
+    
+    def translate_text(self,
+                       text: str,
+                       target_language: str,
+                       source_language: str = "pt",
+                       deadline: Optional[Deadline] = None) -> Dict:
+        """Traduz texto usando Google Cloud Translation"""
+        return self.translate_batch([text], target_language, source_language, deadline)[0]
+    
+    def translate_batch(self,
+                        texts: List[str],
+                        target_language: str,
+                        source_language: str = "pt",
+                        deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Traduz vários segmentos para um idioma, agrupando-os em poucas requisições"""
+        
+        # Verificar se tem credenciais
+        if not self.api_key and not self.service_account_info:
+            # Modo simulação se não tem credenciais
+            return [self._simulate_translation(text, target_language) for text in texts]
+        
+        # Segmentos repetidos são enviados uma única vez
+        unique_texts = list(dict.fromkeys(texts))
+        translations = {}
+        
+        for request_texts in self._pack_translate_requests(unique_texts):
+            translations.update(self._translate_request(request_texts, target_language, source_language, deadline))
+        
+        results = []
+        sent = set()
+        for text in texts:
+            result = translations[text]
+            if text in sent:
+                # Segmento repetido: mesma tradução, enviada (e cobrada) uma vez só
+                result = dict(result, retries=0, backoff_time=0.0, cost_estimate=0)
+            sent.add(text)
+            results.append(result)
+        return results
+    
+    def _pack_translate_requests(self, texts: List[str]) -> List[List[str]]:
+        """Agrupa segmentos respeitando os limites de q e de caracteres por requisição"""
+        requests_texts = []
+        current = []
+        current_chars = 0
+        
+        for text in texts:
+            if current and (len(current) >= MAX_TRANSLATE_SEGMENTS or
+                            current_chars + len(text) > MAX_TRANSLATE_CHARS):
+                requests_texts.append(current)
+                current = []
+                current_chars = 0
+            current.append(text)
+            current_chars += len(text)
+        
+        if current:
+            requests_texts.append(current)
+        return requests_texts
+    
+    def _translate_request(self,
+                           texts: List[str],
+                           target_language: str,
+                           source_language: str,
+                           deadline: Optional[Deadline] = None) -> Dict[str, Dict]:
+        """Envia uma requisição com vários q e mapeia o resultado de volta por texto"""
+        call_stats = {}
+        try:
+            # Configurar autenticação
+            headers, params = self._auth(target_language)
+            
+            # Fazer chamada para API (q aceita uma lista de segmentos)
+            payload = {
+                "q": texts,
+                "target": target_language,
+                "source": source_language,
+                "format": "text"
+            }
+            
+            response = self.retry_policy.execute(
+                lambda call_deadline: _post_within_quota(
+                    self.transport,
+                    self.rate_limiter,
+                    "google_cloud:translate",
+                    self.translate_url,
+                    characters=sum(len(text) for text in texts),
+                    deadline=call_deadline,
+                    breaker=self.breakers.get("google_cloud:translate"),
+                    metrics=self.metrics,
+                    language=target_language,
+                    reauthorize=self._reauthorizer(target_language),
+                    headers=headers,
+                    params=params,
+                    json=payload
+                ),
+                deadline,
+                call_stats
+            )
+            
+            result = response.json()
+            translations = result["data"]["translations"]
+            if len(translations) != len(texts):
+                # Resposta incompleta: os segmentos sem tradução falham (nada de zip truncado)
+                logger.error(f"Erro na tradução: {len(translations)} traduções para {len(texts)} segmentos")
+            
+            results = {
+                text: {
+                    "success": False,
+                    "error": f"resposta sem tradução para o segmento ({len(translations)} de {len(texts)})",
+                    "target_language": target_language
+                }
+                for text in texts[len(translations):]
+            }
+            results.update({
+                text: {
+                    "success": True,
+                    "translated_text": translation["translatedText"],
+                    "source_language": source_language,
+                    "target_language": target_language,
+                    "confidence": 0.98,
+                    "characters": len(text),
+                    "cost_estimate": self._calculate_translate_cost(len(text))
+                }
+                for text, translation in zip(texts, translations)
+            })
+        except Exception as e:
+            logger.error(f"Erro na tradução: {e}")
+            results = {
+                text: {"success": False, "error": str(e), "target_language": target_language}
+                for text in texts
+            }
+        
+        # Retentativas contadas uma vez por requisição (no primeiro segmento)
+        for i, text in enumerate(texts):
+            results[text]["retries"] = call_stats.get("retries", 0) if i == 0 else 0
+            results[text]["backoff_time"] = call_stats.get("backoff_time", 0.0) if i == 0 else 0.0
+        return results
+    
+    def synthesize_speech(self,
+                          text: str,
+                          language_code: str = "pt-BR",
+                          deadline: Optional[Deadline] = None,
+                          cancel: Optional[CancelToken] = None) -> Dict:
+        """Sintetiza fala usando Google Cloud TTS (cancel aborta a chamada, ver hedging)"""
+        
+        # Verificar se tem credenciais
+        if not self.api_key and not self.service_account_info:
+            # Modo simulação se não tem credenciais
+            return self._simulate_tts(text, language_code)
+        
+        # Textos acima do limite da API são divididos e sintetizados em paralelo
+        if len(text.encode("utf-8")) > MAX_TTS_INPUT_BYTES:
+            return self._synthesize_long_text(text, language_code, deadline, cancel)
+        
+        voice_name = self._get_voice_name(language_code)
+        payload = self._tts_payload(text, language_code)
+        
+        # Requisições idênticas são servidas do armazenamento de áudio
+        cache_key = AudioStore.make_key("google_cloud", "text:synthesize", payload)
+        cached_audio = self.audio_store.get(cache_key)
+        if cached_audio is not None:
+            return {
+                "success": True,
+                "audio": AudioPayload(cached_audio, self.audio_store.path_for(cache_key)),
+                "audio_path": self.audio_store.path_for(cache_key),
+                "duration_seconds": len(text) * 0.05,  # Estimativa
+                "characters_processed": len(text),
+                "language": language_code,
+                "voice": voice_name,
+                "cost_estimate": 0,
+                "cost_saved": self._calculate_tts_cost(len(text)),
+                "cache_hit": True
+            }
+        
+        call_stats = {}
+        try:
+            headers, params = self._auth(language_code)
+            headers["Content-Type"] = "application/json"
+            
+            response = self.retry_policy.execute(
+                lambda call_deadline: _post_within_quota(
+                    self.transport,
+                    self.rate_limiter,
+                    "google_cloud:tts",
+                    self.tts_url,
+                    characters=len(text),
+                    deadline=call_deadline,
+                    breaker=self.breakers.get("google_cloud:tts"),
+                    metrics=self.metrics,
+                    language=language_code,
+                    cancel=cancel,
+                    reauthorize=self._reauthorizer(language_code),
+                    headers=headers,
+                    params=params,
+                    json=payload,
+                    stream=True
+                ),
+                deadline,
+                call_stats
+            )
+            
+            # O base64 do JSON é decodificado uma única vez, à medida que chega;
+            # cancelada, a leitura para e a conexão é fechada
+            audio = bytearray()
+            read_start = time.monotonic()
+            try:
+                for part in iter_json_base64_field(response.iter_content(DEFAULT_CHUNK_SIZE), "audioContent"):
+                    if cancel is not None:
+                        cancel.check()
+                    audio += part
+                _observe_streamed(self.metrics, "google_cloud:tts", response, read_start, language_code)
+            finally:
+                response.close()
+            audio_path = self.audio_store.put(cache_key, audio)
+            
+            return {
+                "success": True,
+                "audio": AudioPayload(audio, audio_path),
+                "audio_path": audio_path,
+                "duration_seconds": len(text) * 0.05,  # Estimativa
+                "characters_processed": len(text),
+                "language": language_code,
+                "voice": voice_name,
+                "cost_estimate": self._calculate_tts_cost(len(text)),
+                **call_stats
+            }
+        except HedgeCancelled as e:
+            return {"success": False, "error": str(e), "cancelled": True, "language": language_code, **call_stats}
+        except Exception as e:
+            logger.error(f"Erro no TTS: {e}")
+            return {"success": False, "error": str(e), "language": language_code, **call_stats}
+    
+    def synthesize_speech_stream(self,
+                                 text: str,
+                                 language_code: str = "pt-BR",
+                                 deadline: Optional[Deadline] = None,
+                                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                 info: Optional[Dict] = None) -> Iterator[bytes]:
+        """Sintetiza em streaming: gera pedaços de MP3 à medida que a resposta chega
+        
+        O base64 do JSON é decodificado incrementalmente; o áudio também é
+        gravado no cache enquanto passa. Falhas levantam exceção. info, se
+        informado, recebe cache_hit/simulated.
+        """
+        info = info if info is not None else {}
+        
+        if not self.configured:
+            info["simulated"] = True
+            yield bytes(self._simulate_tts(text, language_code)["audio"].data)
+            return
+        
+        if len(text.encode("utf-8")) > MAX_TTS_INPUT_BYTES:
+            yield from self._synthesize_long_text_stream(text, language_code, deadline, info)
+            return
+        
+        payload = self._tts_payload(text, language_code)
+        cache_key = AudioStore.make_key("google_cloud", "text:synthesize", payload)
+        cached_audio = self.audio_store.get(cache_key)
+        if cached_audio is not None:
+            info["cache_hit"] = True
+            yield from iter_chunks(cached_audio, chunk_size)
+            return
+        
+        headers, params = self._auth(language_code)
+        headers["Content-Type"] = "application/json"
+        response = self.retry_policy.execute(
+            lambda call_deadline: _post_within_quota(
+                self.transport,
+                self.rate_limiter,
+                "google_cloud:tts",
+                self.tts_url,
+                characters=len(text),
+                deadline=call_deadline,
+                breaker=self.breakers.get("google_cloud:tts"),
+                metrics=self.metrics,
+                language=language_code,
+                reauthorize=self._reauthorizer(language_code),
+                headers=headers,
+                params=params,
+                json=payload,
+                stream=True
+            ),
+            deadline,
+            info
+        )
+        try:
+            with self.audio_store.writer(cache_key) as cache_file:
+                for audio in iter_json_base64_field(response.iter_content(chunk_size), "audioContent"):
+                    cache_file.write(audio)
+                    yield audio
+        finally:
+            response.close()
+    
+    def synthesize_to_file(self,
+                           text: str,
+                           sink,
+                           language_code: str = "pt-BR",
+                           deadline: Optional[Deadline] = None) -> Dict:
+        """Sintetiza direto para um caminho, arquivo ou socket, sem manter o áudio em memória"""
+        info = {}
+        result = _stream_to_sink(
+            self.synthesize_speech_stream(text, language_code, deadline, info=info),
+            sink,
+            characters_processed=len(text),
+            language=language_code,
+            voice=self._get_voice_name(language_code),
+            duration_seconds=len(text) * 0.05  # Estimativa
+        )
+        result.update(info)
+        nominal_cost = self._calculate_tts_cost(len(text))
+        result["cost_estimate"] = 0 if info.get("cache_hit") else nominal_cost
+        if info.get("cache_hit"):
+            result["cost_saved"] = nominal_cost
+        return result
+    
+    def _synthesize_long_text_stream(self,
+                                     text: str,
+                                     language_code: str,
+                                     deadline: Optional[Deadline],
+                                     info: Dict) -> Iterator[bytes]:
+        """Trechos sintetizados em paralelo e entregues em ordem, já prontos para concatenar"""
+        chunks = chunk_text(text, MAX_TTS_INPUT_BYTES)
+        synthesize = _with_script_ctx(self.synthesize_speech)
+        chunk_results = self._chunk_executor.map(
+            lambda chunk: synthesize(chunk, language_code, deadline),
+            chunks
+        )
+        
+        cache_hits = []
+        for result in chunk_results:
+            if not result["success"]:
+                raise RuntimeError(f"TTS chunk failed: {result['error']}")
+            cache_hits.append(result.get("cache_hit", False))
+            info["retries"] = info.get("retries", 0) + result.get("retries", 0)
+            info["backoff_time"] = info.get("backoff_time", 0.0) + result.get("backoff_time", 0.0)
+            yield bytes(skip_info_frame(strip_tags(result["audio"].data)))
+        info["cache_hit"] = all(cache_hits)
+    
+    def _tts_payload(self, text: str, language_code: str) -> Dict:
+        """Corpo da requisição de TTS (também define a chave do cache de áudio)"""
+        return {
+            "input": {"text": text},
+            "voice": {
+                "languageCode": language_code,
+                "name": self._get_voice_name(language_code),
+                "ssmlGender": "NEUTRAL"
+            },
+            "audioConfig": {
+                "audioEncoding": "MP3",
+                "speakingRate": 1.0,
+                "pitch": 0.0
+            }
+        }
+    
+    def _synthesize_long_text(self,
+                              text: str,
+                              language_code: str,
+                              deadline: Optional[Deadline] = None,
+                              cancel: Optional[CancelToken] = None) -> Dict:
+        """Divide o texto em trechos por sentença, sintetiza em paralelo e junta os MP3"""
+        chunks = chunk_text(text, MAX_TTS_INPUT_BYTES)
+        
+        synthesize = _with_script_ctx(self.synthesize_speech)
+        chunk_results = list(self._chunk_executor.map(
+            lambda chunk: synthesize(chunk, language_code, deadline, cancel),
+            chunks
+        ))
+        
+        failed = [result for result in chunk_results if not result["success"]]
+        if failed:
+            return {
+                "success": False,
+                "error": f"TTS chunk failed: {failed[0]['error']}",
+                "cancelled": any(result.get("cancelled", False) for result in failed),
+                "language": language_code,
+                **_retry_totals(chunk_results)
+            }
+        
+        audio = concat_mp3(result["audio"].data for result in chunk_results)
+        
+        return {
+            "success": True,
+            "audio": AudioPayload(audio),
+            "duration_seconds": sum(result["duration_seconds"] for result in chunk_results),
+            "characters_processed": len(text),
+            "language": language_code,
+            "voice": self._get_voice_name(language_code),
+            "cost_estimate": sum(result["cost_estimate"] for result in chunk_results),
+            "cost_saved": sum(result.get("cost_saved", 0) for result in chunk_results),
+            "cache_hit": all(result.get("cache_hit", False) for result in chunk_results),
+            "chunks": len(chunks),
+            "simulated": any(result.get("simulated", False) for result in chunk_results),
+            **_retry_totals(chunk_results)
+        }
+    
+    def _get_voice_name(self, language_code: str) -> str:
+        """Obtém nome da voz baseado no idioma"""
+        voice_map = {
+            "pt-BR": "pt-BR-Standard-A",
+            "en-US": "en-US-Standard-C",
+            "es-ES": "es-ES-Standard-A",
+            "fr-FR": "fr-FR-Standard-A",
+            "de-DE": "de-DE-Standard-A",
+            "it-IT": "it-IT-Standard-A"
+        }
+        return voice_map.get(language_code, f"{language_code}-Standard-A")
+    
+    def _calculate_translate_cost(self, characters: int) -> float:
+        """Calcula custo da tradução (Google Translate)"""
+        # Preço: $20 por milhão de caracteres
+        return (characters / 1_000_000) * 20 * 5.2  # Conversão para BRL
+    
+    def _calculate_tts_cost(self, characters: int) -> float:
+        """Calcula custo do TTS (Google Cloud TTS)"""
+        # Preço: $4 por milhão de caracteres
+        return (characters / 1_000_000) * 4 * 5.2  # Conversão para BRL
+    
+    def _simulate_translation(self, text: str, target_language: str) -> Dict:
+        """Simula tradução quando não há credenciais"""
+        translations = {
+            "en": f"[EN] {text}",
+            "es": f"[ES] {text}",
+            "fr": f"[FR] {text}",
+            "de": f"[DE] {text}",
+            "it": f"[IT] {text}"
+        }
+        
+        return {
+            "success": True,
+            "translated_text": translations.get(target_language, f"[{target_language.upper()}] {text}"),
+            "source_language": "pt",
+            "target_language": target_language,
+            "confidence": 0.95,
+            "characters": len(text),
+            "cost_estimate": self._calculate_translate_cost(len(text)),
+            "simulated": True
+        }
+    
+    def _simulate_tts(self, text: str, language_code: str) -> Dict:
+        """Simula TTS quando não há credenciais"""
+        # Criar áudio dummy
+        dummy_audio = f"AUDIO_DATA_FOR_{language_code}_{len(text)}_CHARS"
+        
+        return {
+            "success": True,
+            "audio": AudioPayload(dummy_audio.encode()),
+            "duration_seconds": len(text) * 0.05,
+            "characters_processed": len(text),
+            "language": language_code,
+            "voice": self._get_voice_name(language_code),
+            "cost_estimate": self._calculate_tts_cost(len(text)),
+            "simulated": True
+        }
+
+class ElevenLabsService:
+    """Serviço do ElevenLabs para comparação"""
+    
+    def __init__(self,
+                 transport: Optional[HttpTransport] = None,
+                 audio_store: Optional[AudioStore] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None,
+                 metrics: Optional[MetricsRegistry] = None,
+                 config: Optional[ProviderConfig] = None):
+        config = config or ProviderConfig.from_env()
+        self.api_key = config.elevenlabs_api_key
+        self.transport = transport or get_default_transport()
+        self.audio_store = audio_store or get_default_audio_store()
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or get_default_breakers()
+        self.metrics = metrics or get_default_metrics()
+        self.base_url = config.elevenlabs_base_url
+    
+    @property
+    def configured(self) -> bool:
+        """Se há credenciais (sem elas as respostas são simuladas)"""
+        return bool(self.api_key)
+    
+    def synthesize_speech(self,
+                          text: str,
+                          voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+                          deadline: Optional[Deadline] = None,
+                          language: str = "",
+                          cancel: Optional[CancelToken] = None) -> Dict:
+        """Sintetiza fala usando ElevenLabs (language só rotula as métricas; cancel, ver hedging)"""
+        
+        if not self.api_key:
+            return self._simulate_elevenlabs_tts(text)
+        
+        payload = self._tts_payload(text)
+        
+        # Requisições idênticas são servidas do armazenamento de áudio
+        cache_key = AudioStore.make_key("elevenlabs", f"text-to-speech/{voice_id}", payload)
+        cached_audio = self.audio_store.get(cache_key)
+        if cached_audio is not None:
+            return {
+                "success": True,
+                "audio": AudioPayload(cached_audio, self.audio_store.path_for(cache_key)),
+                "audio_path": self.audio_store.path_for(cache_key),
+                "duration_seconds": len(text) * 0.06,
+                "characters_processed": len(text),
+                "voice_id": voice_id,
+                "cost_estimate": 0,
+                "cost_saved": self._calculate_elevenlabs_cost(len(text)),
+                "cache_hit": True
+            }
+        
+        call_stats = {}
+        try:
+            headers = {
+                "xi-api-key": self.api_key,
+                "Content-Type": "application/json"
+            }
+            
+            response = self.retry_policy.execute(
+                lambda call_deadline: _post_within_quota(
+                    self.transport,
+                    self.rate_limiter,
+                    "elevenlabs:tts",
+                    f"{self.base_url}/text-to-speech/{voice_id}",
+                    characters=len(text),
+                    deadline=call_deadline,
+                    breaker=self.breakers.get("elevenlabs:tts"),
+                    metrics=self.metrics,
+                    language=language,
+                    cancel=cancel,
+                    headers=headers,
+                    json=payload,
+                    stream=True
+                ),
+                deadline,
+                call_stats
+            )
+            
+            # Lido em pedaços para que uma chamada cancelada feche a conexão
+            audio = bytearray()
+            read_start = time.monotonic()
+            try:
+                for part in response.iter_content(DEFAULT_CHUNK_SIZE):
+                    if cancel is not None:
+                        cancel.check()
+                    audio += part
+                _observe_streamed(self.metrics, "elevenlabs:tts", response, read_start, language)
+            finally:
+                response.close()
+            audio_path = self.audio_store.put(cache_key, audio)
+            
+            return {
+                "success": True,
+                "audio": AudioPayload(audio, audio_path),
+                "audio_path": audio_path,
+                "duration_seconds": len(text) * 0.06,
+                "characters_processed": len(text),
+                "voice_id": voice_id,
+                "cost_estimate": self._calculate_elevenlabs_cost(len(text)),
+                **call_stats
+            }
+        except HedgeCancelled as e:
+            return {"success": False, "error": str(e), "cancelled": True, "voice_id": voice_id, **call_stats}
+        except Exception as e:
+            logger.error(f"Erro no ElevenLabs: {e}")
+            return {"success": False, "error": str(e), "voice_id": voice_id, **call_stats}
+    
+    def synthesize_speech_stream(self,
+                                 text: str,
+                                 voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+                                 deadline: Optional[Deadline] = None,
+                                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                                 info: Optional[Dict] = None) -> Iterator[bytes]:
+        """Sintetiza pelo endpoint /stream do ElevenLabs, gerando o MP3 em pedaços
+        
+        O áudio também é gravado no cache enquanto passa. Falhas levantam
+        exceção. info, se informado, recebe cache_hit/simulated.
+        """
+        info = info if info is not None else {}
+        
+        if not self.api_key:
+            info["simulated"] = True
+            yield bytes(self._simulate_elevenlabs_tts(text)["audio"].data)
+            return
+        
+        payload = self._tts_payload(text)
+        # Mesmo áudio do endpoint sem streaming: compartilha a chave do cache
+        cache_key = AudioStore.make_key("elevenlabs", f"text-to-speech/{voice_id}", payload)
+        cached_audio = self.audio_store.get(cache_key)
+        if cached_audio is not None:
+            info["cache_hit"] = True
+            yield from iter_chunks(cached_audio, chunk_size)
+            return
+        
+        response = self.retry_policy.execute(
+            lambda call_deadline: _post_within_quota(
+                self.transport,
+                self.rate_limiter,
+                "elevenlabs:tts",
+                f"{self.base_url}/text-to-speech/{voice_id}/stream",
+                characters=len(text),
+                deadline=call_deadline,
+                breaker=self.breakers.get("elevenlabs:tts"),
+                metrics=self.metrics,
+                headers={"xi-api-key": self.api_key, "Content-Type": "application/json"},
+                json=payload,
+                stream=True
+            ),
+            deadline,
+            info
+        )
+        try:
+            with self.audio_store.writer(cache_key) as cache_file:
+                for audio in response.iter_content(chunk_size):
+                    if audio:
+                        cache_file.write(audio)
+                        yield audio
+        finally:
+            response.close()
+    
+    def synthesize_to_file(self,
+                           text: str,
+                           sink,
+                           voice_id: str = "21m00Tcm4TlvDq8ikWAM",
+                           deadline: Optional[Deadline] = None) -> Dict:
+        """Sintetiza direto para um caminho, arquivo ou socket, sem manter o áudio em memória"""
+        info = {}
+        result = _stream_to_sink(
+            self.synthesize_speech_stream(text, voice_id, deadline, info=info),
+            sink,
+            characters_processed=len(text),
+            voice_id=voice_id,
+            duration_seconds=len(text) * 0.06
+        )
+        result.update(info)
+        nominal_cost = self._calculate_elevenlabs_cost(len(text))
+        result["cost_estimate"] = 0 if info.get("cache_hit") else nominal_cost
+        if info.get("cache_hit"):
+            result["cost_saved"] = nominal_cost
+        return result
+    
+    def _tts_payload(self, text: str) -> Dict:
+        """Corpo da requisição de TTS (também define a chave do cache de áudio)"""
+        return {
+            "text": text,
+            "model_id": "eleven_multilingual_v2",
+            "voice_settings": {
+                "stability": 0.5,
+                "similarity_boost": 0.75
+            }
+        }
+    
+    def _calculate_elevenlabs_cost(self, characters: int) -> float:
+        """Calcula custo do ElevenLabs"""
+        # Preço: $0.30 por 1000 caracteres (plano Creator)
+        return (characters / 1000) * 0.30 * 5.2  # Conversão para BRL
+    
+    def _simulate_elevenlabs_tts(self, text: str) -> Dict:
+        """Simula ElevenLabs quando não há credenciais"""
+        dummy_audio = f"ELEVENLABS_AUDIO_{len(text)}_CHARS"
+        
+        return {
+            "success": True,
+            "audio": AudioPayload(dummy_audio.encode()),
+            "duration_seconds": len(text) * 0.06,
+            "characters_processed": len(text),
+            "voice_id": "demo_voice",
+            "cost_estimate": self._calculate_elevenlabs_cost(len(text)),
+            "simulated": True
+        }
+
+class CostAnalyzer:
+    """Analisador de custos para diferentes provedores"""
+    
+    def __init__(self):
+        self.providers = {
+            "elevenlabs": {
+                "name": "ElevenLabs + OpenAI Translate",
+                "tts_cost_per_char": 0.30 / 1000 * 5.2,  # R$ por caractere
+                "translate_cost_per_char": 120 / (30 * 200 * 3 * 1000) * 5.2,  # Estimativa
+                "quality_score": 95,
+                "latency_ms": 2000
+            },
+            "google_cloud": {
+                "name": "Google Cloud TTS + Translate",
+                "tts_cost_per_char": 4 / 1_000_000 * 5.2,  # $4 por milhão de chars
+                "translate_cost_per_char": 20 / 1_000_000 * 5.2,  # $20 por milhão de chars
+                "quality_score": 80,
+                "latency_ms": 800
+            },
+            "openai": {
+                "name": "OpenAI TTS + Translate",
+                "tts_cost_per_char": 15 / 1_000_000 * 5.2,  # $15 por milhão de chars
+                "translate_cost_per_char": 120 / (30 * 200 * 3 * 1000) * 5.2,  # Estimativa
+                "quality_score": 85,
+                "latency_ms": 1500
+            }
+        }
+    
+    def calculate_monthly_costs(self, config: VideoGenerationConfig) -> Dict:
+        """Calcula custos mensais baseado na configuração"""
+        monthly_videos = config.videos_per_day * 30
+        total_chars = monthly_videos * len(config.languages) * config.avg_chars_per_video
+        
+        results = {}
+        
+        # Caracteres servidos pela memória de tradução não são cobrados
+        translated_chars = total_chars * (1 - config.translation_cache_hit_ratio)
+        
+        for provider_id, provider_config in self.providers.items():
+            # Cópias de hedge também são cobradas pelo provedor
+            hedge_extra_cost = total_chars * config.hedge_rate * provider_config["tts_cost_per_char"]
+            tts_cost = total_chars * provider_config["tts_cost_per_char"] + hedge_extra_cost
+            translate_cost = translated_chars * provider_config["translate_cost_per_char"]
+            translate_cost_saved = (total_chars - translated_chars) * provider_config["translate_cost_per_char"]
+            total_cost = tts_cost + translate_cost
+            
+            results[provider_id] = {
+                "name": provider_config["name"],
+                "tts_cost": tts_cost,
+                "translate_cost": translate_cost,
+                "translate_cost_saved": translate_cost_saved,
+                "hedge_extra_cost": hedge_extra_cost,
+                "total_cost": total_cost,
+                "cost_per_video": total_cost / monthly_videos,
+                "quality_score": provider_config["quality_score"],
+                "latency_ms": provider_config["latency_ms"]
+            }
+        
+        return results
+
+class VideoProcessor:
+    """Processador principal de vídeos multilíngues"""
+    
+    def __init__(self,
+                 transport: Optional[HttpTransport] = None,
+                 max_workers: int = 5,
+                 translation_batch_window_ms: Optional[float] = None,
+                 translation_cache: Optional[TranslationCache] = None,
+                 audio_store: Optional[AudioStore] = None,
+                 sentence_level: bool = True,
+                 segment_workers: int = 8,
+                 tts_pack_bytes: int = 0,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 retry_policy: Optional[RetryPolicy] = None,
+                 deadline_seconds: Optional[float] = None,
+                 breakers: Optional[CircuitBreakerRegistry] = None,
+                 failover: bool = True,
+                 hedger: Optional[Hedger] = None,
+                 hedge_to_alternate: bool = False,
+                 metrics: Optional[MetricsRegistry] = None,
+                 config: Optional[ProviderConfig] = None):
+        self.transport = transport or get_default_transport()
+        self.audio_store = audio_store or get_default_audio_store()
+        self.rate_limiter = rate_limiter or get_default_rate_limiter()
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.breakers = breakers or get_default_breakers()
+        # Latência por estágio (OAuth, cota, tradução, TTS, backoff, fila, total)
+        self.metrics = metrics or get_default_metrics()
+        # Credenciais lidas uma vez e compartilhadas pelos dois serviços
+        self.config = config or ProviderConfig.from_env()
+        self.google_service = GoogleCloudService(self.transport, self.audio_store, self.rate_limiter,
+                                                 self.retry_policy, self.breakers, self.metrics, self.config)
+        self.elevenlabs_service = ElevenLabsService(self.transport, self.audio_store, self.rate_limiter,
+                                                    self.retry_policy, self.breakers, self.metrics, self.config)
+        # TTS troca de provedor quando o principal está com o circuito aberto ou falha
+        self.failover = failover
+        
+        # Hedging opcional: cópia da chamada de TTS que passa do percentil de latência
+        self.hedger = hedger
+        self.hedge_to_alternate = hedge_to_alternate
+        self.cost_analyzer = CostAnalyzer()
+        # Limite de idiomas processados em paralelo por vídeo
+        self.max_workers = max_workers
+        # Orçamento de tempo padrão por vídeo (None = sem limite)
+        self.deadline_seconds = deadline_seconds
+        
+        self.last_pipeline: Optional[TranslateTTSPipeline] = None
+        
+        # Roteiros são processados por sentença; uma edição pequena só
+        # re-traduz e re-sintetiza as sentenças alteradas
+        self.sentence_level = sentence_level
+        # Opcional: sentenças consecutivas vão juntas ao TTS até este tamanho
+        # (UTF-8). Menos requisições, mas uma edição re-sintetiza o grupo
+        # inteiro e desloca os grupos seguintes; 0 (padrão) é uma por sentença
+        self.tts_pack_bytes = tts_pack_bytes
+        self._segment_executor = ThreadPoolExecutor(max_workers=segment_workers,
+                                                    thread_name_prefix="tts-segment")
+        
+        # Memória de tradução consultada antes de chamar a API
+        self.translation_cache = translation_cache or get_default_translation_cache()
+        
+        # Micro-batching: traduções concorrentes (de vários vídeos) para o mesmo
+        # idioma dentro da janela são enviadas em uma única requisição
+        self.translation_batcher = None
+        if translation_batch_window_ms:
+            self.translation_batcher = TranslationBatcher(
+                self.google_service.translate_batch,
+                window_ms=translation_batch_window_ms,
+                max_segments=MAX_TRANSLATE_SEGMENTS,
+                max_chars=MAX_TRANSLATE_CHARS
+            )
+    
+    def process_multilingual_video(self, 
+                                 original_text: str, 
+                                 target_languages: List[str],
+                                 provider: str = "google_cloud",
+                                 concurrent: bool = True,
+                                 deadline_seconds: Optional[float] = None) -> Dict:
+        """Processa um vídeo para múltiplos idiomas (em paralelo por padrão)
+        
+        deadline_seconds limita o tempo total do vídeo, incluindo retentativas.
+        """
+        
+        start_time = time.time()
+        deadline = Deadline(deadline_seconds if deadline_seconds is not None else self.deadline_seconds)
+        
+        if concurrent and len(target_languages) > 1:
+            lang_results = self._process_languages_concurrently(original_text, target_languages, provider, deadline)
+        else:
+            lang_results = [
+                self._process_single_language(original_text, lang, provider, deadline)
+                for lang in target_languages
+            ]
+        
+        return self._summarize_video(original_text, provider, lang_results, start_time)
+    
+    def process_videos(self,
+                       videos: Iterable[Tuple],
+                       target_languages: List[str],
+                       provider: str = "google_cloud",
+                       translate_concurrency: int = 4,
+                       synthesize_concurrency: int = 8,
+                       max_videos_in_flight: int = 16,
+                       deadline_seconds: Optional[float] = None) -> Iterator[Dict]:
+        """Processa vários vídeos pelo pipeline tradução → síntese
+        
+        Os resultados saem na ordem de conclusão, cada um com seu video_id.
+        Itens (video_id, texto, idiomas) substituem target_languages para o vídeo.
+        As métricas por estágio ficam em self.last_pipeline.metrics().
+        """
+        self.last_pipeline = TranslateTTSPipeline(
+            self,
+            translate_concurrency=translate_concurrency,
+            synthesize_concurrency=synthesize_concurrency,
+            max_videos_in_flight=max_videos_in_flight,
+            deadline_seconds=deadline_seconds if deadline_seconds is not None else self.deadline_seconds
+        )
+        return self.last_pipeline.run(videos, target_languages, provider)
+    
+    def _summarize_video(self, original_text: str, provider: str, lang_results: List[Dict], start_time: float) -> Dict:
+        """Agrega os resultados por idioma de um vídeo"""
+        
+        results = {
+            "original_text": original_text,
+            "provider": provider,
+            "languages": [],
+            "total_cost": 0,
+            "total_time": 0,
+            "languages_time": 0,
+            "total_cost_saved": 0,
+            "success_count": 0,
+            "retries": 0,
+            "backoff_time": 0,
+            "failovers": 0,
+            "hedged_segments": 0
+        }
+        
+        for lang_result in lang_results:
+            self._record_language_metrics(lang_result, provider)
+            results["languages"].append(lang_result)
+            results["languages_time"] += lang_result.get("processing_time", 0)
+            results["retries"] += lang_result.get("retries", 0)
+            results["backoff_time"] += lang_result.get("backoff_time", 0)
+            results["failovers"] += 1 if lang_result.get("failover") else 0
+            results["hedged_segments"] += lang_result.get("hedged_segments", 0)
+            
+            if lang_result["success"]:
+                results["success_count"] += 1
+                results["total_cost"] += lang_result["total_cost"]
+                results["total_cost_saved"] += lang_result.get("cost_saved", 0)
+        
+        # total_time é o tempo de parede; languages_time é a soma por idioma
+        results["total_time"] = time.time() - start_time
+        
+        return results
+    
+    def _record_language_metrics(self, lang_result: Dict, provider: str):
+        """Tempo total, backoff e tamanho do áudio de um idioma nos histogramas"""
+        provider = lang_result.get("provider_used", provider)
+        language = lang_result.get("language", "")
+        self.metrics.observe_stage("language_total", lang_result.get("processing_time", 0), provider, language)
+        if lang_result.get("retries"):
+            self.metrics.observe_stage("retry_backoff", lang_result.get("backoff_time", 0.0), provider, language)
+        if lang_result.get("audio_bytes"):
+            self.metrics.observe(AUDIO_BYTES, lang_result["audio_bytes"], provider=provider, language=language)
+    
+    def _process_languages_concurrently(self,
+                                        text: str,
+                                        target_languages: List[str],
+                                        provider: str,
+                                        deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Processa os idiomas em um pool de threads limitado, mantendo a ordem"""
+        
+        workers = min(self.max_workers, len(target_languages))
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            process = _with_script_ctx(self._process_single_language)
+            futures = [
+                executor.submit(process, text, lang, provider, deadline)
+                for lang in target_languages
+            ]
+            
+            lang_results = []
+            for lang, future in zip(target_languages, futures):
+                try:
+                    lang_results.append(future.result())
+                except Exception as e:
+                    lang_results.append({"success": False, "error": str(e), "language": lang})
+        
+        return lang_results
+    
+    def _translate_segments(self,
+                            segments: List[str],
+                            target_lang: str,
+                            source_lang: str = "pt",
+                            deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Traduz sentenças consultando a memória de tradução antes da API"""
+        results: List[Optional[Dict]] = [None] * len(segments)
+        misses = []
+        
+        for i, segment in enumerate(segments):
+            cached = self.translation_cache.get(segment, source_lang, target_lang)
+            if cached is not None:
+                results[i] = {
+                    "success": True,
+                    "translated_text": cached,
+                    "source_language": source_lang,
+                    "target_language": target_lang,
+                    "characters": len(segment),
+                    "cost_estimate": 0,
+                    "cost_saved": self.google_service._calculate_translate_cost(len(segment)),
+                    "cache_hit": True
+                }
+            else:
+                misses.append(i)
+        
+        if misses:
+            miss_texts = [segments[i] for i in misses]
+            if self.translation_batcher is not None:
+                futures = [self.translation_batcher.submit(t, target_lang, source_lang, deadline)
+                           for t in miss_texts]
+                translated = [future.result(timeout=deadline.remaining() if deadline else None)
+                              for future in futures]
+            else:
+                translated = self.google_service.translate_batch(miss_texts, target_lang, source_lang, deadline)
+            
+            for i, result in zip(misses, translated):
+                results[i] = result
+                # Traduções simuladas não entram no cache
+                if result["success"] and not result.get("simulated"):
+                    self.translation_cache.put(segments[i], source_lang, target_lang, result["translated_text"])
+        
+        return results
+    
+    def provider_health(self) -> Dict[str, Dict]:
+        """Estado dos circuit breakers por endpoint (closed, half_open, open)"""
+        return self.breakers.stats()
+    
+    def _failover_provider(self, provider: str) -> Optional[str]:
+        """Provedor alternativo de TTS, se configurado e com o circuito fechado"""
+        fallback = FAILOVER_PROVIDERS.get(provider)
+        if not self.failover or fallback is None:
+            return None
+        service = self._tts_service(fallback)
+        # Sem credenciais o alternativo só simularia: melhor falhar de verdade
+        if not service.configured or self.breakers.get(f"{fallback}:tts").state == OPEN:
+            return None
+        return fallback
+    
+    def _tts_service(self, provider: str):
+        return self.google_service if provider == "google_cloud" else self.elevenlabs_service
+    
+    def _tts_cost(self, provider: str, characters: int) -> float:
+        """Custo estimado de uma requisição de TTS no provedor"""
+        if provider == "google_cloud":
+            return self.google_service._calculate_tts_cost(characters)
+        return self.elevenlabs_service._calculate_elevenlabs_cost(characters)
+    
+    def _synthesize(self, text: str, tts_lang_code: str, provider: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Sintetiza um segmento no provedor escolhido (com hedge, se habilitado)"""
+        if self.hedger is None or not self._tts_service(provider).configured:
+            return self._call_tts(text, tts_lang_code, provider, deadline)
+        
+        hedge_provider = provider
+        if self.hedge_to_alternate:
+            hedge_provider = self._failover_provider(provider) or provider
+        
+        call_tts = _with_script_ctx(self._call_tts)
+        return self.hedger.run(
+            f"{provider}:tts",
+            lambda cancel: call_tts(text, tts_lang_code, provider, deadline, cancel),
+            lambda cancel: call_tts(text, tts_lang_code, hedge_provider, deadline, cancel),
+            hedge_key=f"{hedge_provider}:tts",
+            primary_cost=self._tts_cost(provider, len(text)),
+            hedge_cost=self._tts_cost(hedge_provider, len(text))
+        )
+    
+    def _call_tts(self,
+                  text: str,
+                  tts_lang_code: str,
+                  provider: str,
+                  deadline: Optional[Deadline] = None,
+                  cancel: Optional[CancelToken] = None) -> Dict:
+        """Uma chamada de TTS no provedor escolhido (o resultado diz qual foi)"""
+        if provider == "google_cloud":
+            result = self.google_service.synthesize_speech(text, tts_lang_code, deadline, cancel)
+        else:
+            result = self.elevenlabs_service.synthesize_speech(text, deadline=deadline, language=tts_lang_code,
+                                                               cancel=cancel)
+        return dict(result, provider=provider)
+    
+    def _pack_tts_segments(self, segments: List[str]) -> List[List[str]]:
+        """Agrupa sentenças consecutivas respeitando o limite de bytes por requisição de TTS"""
+        packs = []
+        current = []
+        current_bytes = 0
+        
+        for segment in segments:
+            # +1 pelo espaço que join_sentences coloca entre as sentenças
+            size = len(segment.encode("utf-8")) + (1 if current else 0)
+            if current and current_bytes + size > self.tts_pack_bytes:
+                packs.append(current)
+                current = []
+                current_bytes = 0
+                size -= 1
+            current.append(segment)
+            current_bytes += size
+        
+        if current:
+            packs.append(current)
+        return packs
+    
+    def _synthesize_segments(self,
+                             segments: List[str],
+                             tts_lang_code: str,
+                             provider: str,
+                             deadline: Optional[Deadline] = None) -> List[Dict]:
+        """Sintetiza os trechos em paralelo (áudio inalterado vem do cache)"""
+        if len(segments) == 1:
+            return [self._synthesize(segments[0], tts_lang_code, provider, deadline)]
+        synthesize = _with_script_ctx(self._synthesize)
+        return list(self._segment_executor.map(
+            lambda segment: synthesize(segment, tts_lang_code, provider, deadline),
+            segments
+        ))
+    
+    def _process_single_language(self,
+                                 text: str,
+                                 target_lang: str,
+                                 provider: str,
+                                 deadline: Optional[Deadline] = None) -> Dict:
+        """Processa um único idioma, sentença a sentença"""
+        state = self._translate_stage(text, target_lang, deadline)
+        if not state["success"]:
+            return state
+        return self._synthesize_stage(state, provider)
+    
+    def _translate_stage(self, text: str, target_lang: str, deadline: Optional[Deadline] = None) -> Dict:
+        """Etapa 1: segmenta e traduz o roteiro para um idioma"""
+        
+        start_time = time.time()
+        
+        # Só as sentenças alteradas chegam às APIs; as demais vêm dos caches
+        segments = (split_sentences(text) if self.sentence_level else None) or [text]
+        
+        try:
+            if target_lang != "pt":
+                translation_results = self._translate_segments(segments, target_lang, deadline=deadline)
+                failed = [result for result in translation_results if not result["success"]]
+                if failed:
+                    return self._error_result(target_lang, f"Translation failed: {failed[0]['error']}",
+                                              start_time, translation_results)
+                
+                translated_segments = [result["translated_text"] for result in translation_results]
+            else:
+                translation_results = []
+                translated_segments = segments
+        except Exception as e:
+            return self._error_result(target_lang, e, start_time)
+        
+        return {
+            "success": True,
+            "language": target_lang,
+            "original_text": text,
+            "segments": segments,
+            "translation_results": translation_results,
+            "translated_segments": translated_segments,
+            "start_time": start_time,
+            "deadline": deadline
+        }
+    
+    def _synthesize_stage(self, state: Dict, provider: str) -> Dict:
+        """Etapa 2: sintetiza as sentenças traduzidas e monta o resultado do idioma"""
+        
+        target_lang = state["language"]
+        
+        # Mapear códigos de idioma
+        lang_codes = {
+            "en": "en-US",
+            "es": "es-ES", 
+            "fr": "fr-FR",
+            "de": "de-DE",
+            "it": "it-IT",
+            "pt": "pt-BR"
+        }
+        
+        tts_lang_code = lang_codes.get(target_lang, f"{target_lang}-{target_lang.upper()}")
+        
+        if provider not in ("google_cloud", "elevenlabs"):
+            return {"success": False, "error": f"Provider {provider} not supported", "language": target_lang}
+        
+        try:
+            translation_results = state["translation_results"]
+            translated_segments = state["translated_segments"]
+            deadline = state.get("deadline")
+            
+            # Circuito aberto: vai direto ao alternativo, sem esperar timeouts
+            provider_used = provider
+            fallback = self._failover_provider(provider)
+            if fallback and self.breakers.get(f"{provider}:tts").state == OPEN:
+                provider_used = fallback
+            
+            # Uma requisição por grupo de sentenças, não por sentença
+            packs = self._pack_tts_segments(translated_segments)
+            tts_texts = [join_sentences(pack) for pack in packs]
+            
+            tts_results = self._synthesize_segments(tts_texts, tts_lang_code, provider_used, deadline)
+            failed = [result for result in tts_results if not result["success"]]
+            discarded_results = []
+            
+            if failed and provider_used == provider and fallback:
+                # Idioma inteiro no alternativo, para não misturar vozes
+                logger.warning(f"TTS {provider} falhou para {target_lang}; usando {fallback}")
+                discarded_results = tts_results
+                provider_used = fallback
+                tts_results = self._synthesize_segments(tts_texts, tts_lang_code, provider_used, deadline)
+                failed = [result for result in tts_results if not result["success"]]
+            
+            if failed:
+                return self._error_result(target_lang, f"TTS failed: {failed[0]['error']}",
+                                          state["start_time"], translation_results + discarded_results + tts_results)
+            
+            # Juntar os segmentos de áudio na ordem do roteiro (bytes brutos, sem base64)
+            audio = AudioPayload(concat_mp3(result["audio"].data for result in tts_results))
+            
+            translated_text = join_sentences(translated_segments)
+            translate_cost = sum(result["cost_estimate"] for result in translation_results)
+            # Trechos já cobrados pelo provedor principal antes do failover também contam
+            tts_cost = sum(result.get("cost_estimate", 0) for result in discarded_results + tts_results)
+            hedge_extra_cost = sum(result.get("hedge_extra_cost", 0) for result in discarded_results + tts_results)
+            cost_saved = sum(result.get("cost_saved", 0) for result in translation_results + tts_results)
+            
+            processing_time = time.time() - state["start_time"]
+            
+            return {
+                "success": True,
+                "language": target_lang,
+                "original_text": state["original_text"],
+                "translated_text": translated_text,
+                "audio_duration": sum(result["duration_seconds"] for result in tts_results),
+                "characters": len(translated_text),
+                "translate_cost": translate_cost,
+                "tts_cost": tts_cost,
+                "total_cost": translate_cost + tts_cost + hedge_extra_cost,
+                "cost_saved": cost_saved,
+                "segments": len(state["segments"]),
+                "segments_translated": sum(1 for result in translation_results if not result.get("cache_hit")),
+                "segments_synthesized": sum(len(pack) for pack, result in zip(packs, tts_results)
+                                            if not result.get("cache_hit")),
+                "tts_requests": len(packs),
+                "translation_cache_hit": all(result.get("cache_hit", False) for result in translation_results) if translation_results else False,
+                "audio_cache_hit": all(result.get("cache_hit", False) for result in tts_results),
+                "processing_time": processing_time,
+                "audio": audio,
+                "audio_bytes": len(audio),
+                "simulated": any(result.get("simulated", False) for result in tts_results),
+                "provider_used": provider_used,
+                # Com hedge no alternativo, cada trecho pode vir de um provedor (e voz)
+                "segment_providers": [result.get("provider", provider_used) for result in tts_results],
+                "failover": provider_used != provider,
+                "hedged_segments": sum(1 for result in tts_results if result.get("hedged")),
+                "hedge_extra_cost": hedge_extra_cost,
+                **_retry_totals(translation_results + discarded_results + tts_results)
+            }
+            
+        except Exception as e:
+            return self._error_result(target_lang, e, state["start_time"])
+    
+    def _error_result(self,
+                      target_lang: str,
+                      error: Union[Exception, str],
+                      start_time: Optional[float] = None,
+                      call_results: Iterable[Dict] = ()) -> Dict:
+        """Resultado de falha de um idioma"""
+        return {
+            "success": False,
+            "error": str(error) or type(error).__name__,
+            "language": target_lang,
+            "processing_time": time.time() - start_time if start_time else 0,
+            **_retry_totals(call_results)
+        }
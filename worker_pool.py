@@ -0,0 +1,242 @@
+# Pool de processos workers sobre o job store
+#
+# Cada processo tem o seu VideoProcessor (e o seu GIL): assinatura JWT,
+# base64 e junção de MP3 deixam de competir entre si. Os workers
+# reivindicam vídeos do mesmo arquivo SQLite, então vários hosts podem
+# rodar o pool apontando para um job store em disco compartilhado. Uso:
+#
+#   python batch_cli.py roteiros.csv --job-store jobs.sqlite3 --enqueue-only
+#   python worker_pool.py --job-store jobs.sqlite3 --processes 4 --output-dir saida
+#
+# Ctrl+C / SIGTERM: os workers param de reivindicar, terminam o que está em
+# andamento e devolvem o restante para a fila. Um segundo sinal encerra à força.
+
+import argparse
+import multiprocessing
+import os
+import queue
+import signal
+import sys
+import time
+from collections import Counter
+from typing import Dict, List
+
+from batch_cli import (ThroughputReporter, claimed_videos, release_dead_local_workers, summarize_result,
+                       worker_id_for, write_result)
+from job_store import PENDING, RUNNING, JobStore, LeaseHeartbeat
+
+
+def _worker_main(index: int, options: Dict, stop_event, events):
+    """Loop de um processo worker: reivindica, processa e registra"""
+    # O Ctrl+C chega a todo o grupo de processos; quem decide é o supervisor
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+
+    # Importado só no filho: cada processo monta seus próprios clientes HTTP
+    from hedging import Hedger
+    from metrics import MetricsRegistry, TextfileExporter
+    from video_core import VideoProcessor
+
+    worker_id = worker_id_for(os.getpid())
+    store = JobStore(options["job_store"], max_attempts=options["max_attempts"])
+    metrics = MetricsRegistry(const_labels={"worker": worker_id})
+    exporter = None
+    if options["metrics_dir"]:
+        exporter = TextfileExporter(
+            metrics, os.path.join(options["metrics_dir"], f"metrics-{worker_id}.prom")
+        ).start()
+    processor = VideoProcessor(
+        metrics=metrics,
+        translation_batch_window_ms=options["batch_window_ms"],
+        deadline_seconds=options["deadline"],
+        hedger=Hedger(percentile=options["hedge_percentile"]) if options["hedge_percentile"] else None,
+        hedge_to_alternate=options["hedge_alternate"]
+    )
+
+    heartbeat = LeaseHeartbeat(store, worker_id).start()
+    videos = claimed_videos(
+        store, worker_id, options["concurrency"],
+        should_stop=stop_event.is_set,
+        poll_interval=options["poll_interval"] if options["follow"] else None
+    )
+    results_path = os.path.join(options["output_dir"], f"results-{worker_id}.jsonl")
+
+    try:
+        with open(results_path, "a", encoding="utf-8") as results_file:
+            results = processor.process_videos(
+                videos,
+                [],
+                options["provider"],
+                translate_concurrency=options["translate_concurrency"],
+                synthesize_concurrency=options["synthesize_concurrency"],
+                max_videos_in_flight=options["concurrency"]
+            )
+            for result in results:
+                write_result(result, options["output_dir"], results_file, save_audio=options["save_audio"])
+                store.record(worker_id, result)
+                events.put(("result", index, summarize_result(result)))
+    finally:
+        heartbeat.stop()
+        store.release(worker_id)
+        store.close()
+        if exporter is not None:
+            exporter.stop()
+        events.put(("exit", index, worker_id))
+
+
+class WorkerPool:
+    """Supervisor: inicia os workers, agrega a vazão e coordena o encerramento"""
+
+    def __init__(self, options: Dict, processes: int, report_interval: float = 10.0):
+        self.options = options
+        self.processes = processes
+        self.reporter = ThroughputReporter(interval=report_interval)
+        self.videos_per_worker: Counter = Counter()
+
+        self._context = multiprocessing.get_context("spawn")
+        self._stop_event = self._context.Event()
+        self._events = self._context.Queue()
+        self._workers: List = []
+        self._signals = 0
+
+    def run(self) -> int:
+        previous = {
+            signum: signal.signal(signum, self._handle_signal)
+            for signum in (signal.SIGINT, signal.SIGTERM)
+        }
+        try:
+            for index in range(self.processes):
+                worker = self._context.Process(
+                    target=_worker_main,
+                    args=(index, self.options, self._stop_event, self._events),
+                    name=f"video-worker-{index}"
+                )
+                worker.start()
+                self._workers.append(worker)
+
+            while any(worker.is_alive() for worker in self._workers):
+                self._drain(timeout=0.5)
+            self._drain()
+            for worker in self._workers:
+                worker.join()
+        finally:
+            for signum, handler in previous.items():
+                signal.signal(signum, handler)
+
+        self._release_crashed()
+        self.reporter.report(final=True)
+        for index, worker in enumerate(self._workers):
+            print(f"  worker {index} (pid {worker.pid}): {self.videos_per_worker[index]} vídeos, "
+                  f"exit {worker.exitcode}", file=sys.stderr, flush=True)
+
+        crashed = any(worker.exitcode != 0 for worker in self._workers)
+        return 1 if crashed or self.reporter.languages_failed else 0
+
+    def stop(self):
+        """Encerramento gracioso: para de reivindicar e drena o que está em andamento"""
+        self._stop_event.set()
+
+    def _handle_signal(self, signum, frame):
+        self._signals += 1
+        if self._signals == 1:
+            print("Encerrando: aguardando os vídeos em andamento (sinal de novo força a saída)",
+                  file=sys.stderr, flush=True)
+            self.stop()
+        else:
+            for worker in self._workers:
+                if worker.is_alive():
+                    worker.kill()
+
+    def _drain(self, timeout: float = 0.0):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                kind, index, payload = self._events.get(timeout=max(deadline - time.monotonic(), 0.0))
+            except queue.Empty:
+                return
+            if kind == "result":
+                self.videos_per_worker[index] += 1
+                self.reporter.add(**payload)
+
+    def _release_crashed(self):
+        """Devolve à fila o que workers encerrados à força deixaram reivindicado"""
+        crashed = [worker for worker in self._workers if worker.exitcode != 0]
+        if not crashed:
+            return
+        store = JobStore(self.options["job_store"])
+        try:
+            released = sum(store.release(worker_id_for(worker.pid), crashed=True) for worker in crashed)
+        finally:
+            store.close()
+        if released:
+            print(f"{released} unidades devolvidas à fila", file=sys.stderr, flush=True)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Processa o job store com vários processos workers")
+    parser.add_argument("--job-store", required=True, help="Arquivo SQLite preenchido com batch_cli.py --enqueue-only")
+    parser.add_argument("--output-dir", default="batch_output", help="Diretório de saída")
+    parser.add_argument("--provider", default="google_cloud", choices=["google_cloud", "elevenlabs"])
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1, help="Processos workers")
+    parser.add_argument("--concurrency", type=int, default=8, help="Vídeos em processamento simultâneo por worker")
+    parser.add_argument("--translate-concurrency", type=int, default=16)
+    parser.add_argument("--synthesize-concurrency", type=int, default=8)
+    parser.add_argument("--batch-window-ms", type=float, default=50, help="Janela de micro-batching das traduções")
+    parser.add_argument("--hedge-percentile", type=float, default=None,
+                        help="Duplica chamadas de TTS acima deste percentil de latência (ex.: 95)")
+    parser.add_argument("--hedge-alternate", action="store_true",
+                        help="Envia a cópia de hedge ao provedor alternativo")
+    parser.add_argument("--deadline", type=float, default=None,
+                        help="Orçamento de tempo por vídeo, em segundos, incluindo retentativas")
+    parser.add_argument("--max-attempts", type=int, default=3, help="Tentativas por (vídeo, idioma) no job store")
+    parser.add_argument("--report-interval", type=float, default=10, help="Segundos entre relatórios de vazão")
+    parser.add_argument("--no-audio", action="store_true", help="Não gravar os MP3")
+    parser.add_argument("--follow", action="store_true", help="Continuar aguardando novos jobs quando a fila esvaziar")
+    parser.add_argument("--poll-interval", type=float, default=5, help="Segundos entre consultas com --follow")
+    parser.add_argument("--metrics-dir", default=None,
+                        help="Cada worker grava metrics-<worker>.prom aqui (textfile collector do Prometheus)")
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {
+        "job_store": os.path.abspath(args.job_store),
+        "output_dir": os.path.abspath(args.output_dir),
+        "provider": args.provider,
+        "concurrency": args.concurrency,
+        "translate_concurrency": args.translate_concurrency,
+        "synthesize_concurrency": args.synthesize_concurrency,
+        "batch_window_ms": args.batch_window_ms,
+        "deadline": args.deadline,
+        "hedge_percentile": args.hedge_percentile,
+        "hedge_alternate": args.hedge_alternate,
+        "max_attempts": args.max_attempts,
+        "save_audio": not args.no_audio,
+        "follow": args.follow,
+        "poll_interval": args.poll_interval,
+        "metrics_dir": os.path.abspath(args.metrics_dir) if args.metrics_dir else None
+    }
+    store = JobStore(options["job_store"])
+    released = release_dead_local_workers(store)
+    if released:
+        print(f"Job store: {released} unidades de uma execução interrompida devolvidas à fila",
+              file=sys.stderr, flush=True)
+
+    pool = WorkerPool(options, max(args.processes, 1), report_interval=args.report_interval)
+    code = pool.run()
+
+    counts = store.counts()
+    print(f"Job store: {counts}", file=sys.stderr, flush=True)
+    store.close()
+    if counts[PENDING] or counts[RUNNING]:
+        print(f"Job store: {counts[PENDING] + counts[RUNNING]} unidades não concluídas; "
+              f"execute de novo para retomá-las", file=sys.stderr, flush=True)
+        return code or 1
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())